@@ -0,0 +1,517 @@
+import numpy as np
+from compiled_mdp import DIRECTIONS
+
+
+class ArrayStateSpace():
+    """
+    Description
+    -----------
+    Class that stores the same information as a StateSpace(), but as
+    flat arrays indexed by integer ids instead of one State() object,
+    one ActionSet() and four Action() objects per state.
+
+    The states can still be accessed by name with `get_state`, which
+    returns a small StateView() that reads from the arrays, so the
+    solvers can run on it without changes. The views are created
+    when requested and are not stored.
+
+    Each action is stored as offset-indexed arrays, like a CSR matrix:
+    the end states of state `i` taking action `a` are
+    `indices[a][indptr[a][i]:indptr[a][i + 1]]`. An action that is not
+    available has no end states.
+
+    Parameters
+    ----------
+    parsed: ParsedNet() \\
+        -- The parsed file the arrays are built from.
+
+    Attributes
+    ----------
+    names: list \\
+        -- Names of the states, the index of each name is the state's id.
+
+    index: dict \\
+        -- A dict containing (name of the state, id of the state) tuples.
+
+    x: numpy.ndarray \\
+        -- Value of x of each state.
+
+    y: numpy.ndarray \\
+        -- Value of y of each state.
+
+    indptr: list \\
+        -- For each direction in `DIRECTIONS`, the offsets of the end
+        states of each state in `indices` and `probabilities`.
+
+    indices: list \\
+        -- For each direction in `DIRECTIONS`, the ids of the end states.
+
+    probabilities: list \\
+        -- For each direction in `DIRECTIONS`, the probability
+        of each end state.
+
+    action_costs: numpy.ndarray \\
+        -- A (number of directions, number of states) array with
+        the cost of each action.
+
+    predecessors_indptr: numpy.ndarray \\
+        -- Offsets of the predecessors of each state in
+        `predecessors_indices`.
+
+    predecessors_indices: numpy.ndarray \\
+        -- Ids of the predecessors, in the same order `State.predecessors`
+        would have them, without repetitions and without the state itself.
+
+    costs: list \\
+        -- The `cost` of each state, None until it is updated.
+
+    policies: list \\
+        -- The `policy` of each state, None until it is updated.
+
+    policy_predecessors: dict \\
+        -- A dict containing (id of the state, list of ids) tuples,
+        only for the states that have policy predecessors.
+    """
+
+    def __init__(self, parsed):
+        self.names = list(parsed.names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        self.x = np.array(parsed.x, dtype=np.int64)
+        self.y = np.array(parsed.y, dtype=np.int64)
+
+        self.indptr = []
+        self.indices = []
+        self.probabilities = []
+
+        self.action_costs = np.zeros((len(DIRECTIONS), len(self.names)))
+
+        self.predecessors_indptr = None
+        self.predecessors_indices = None
+
+        self.costs = [None] * len(self.names)
+        self.policies = [None] * len(self.names)
+
+        self.policy_predecessors = {}
+
+        self.load_actions(parsed)
+        self.load_predecessors(parsed)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f'ArrayStateSpace({len(self.names)})'
+
+    def load_actions(self, parsed):
+        """
+        Description
+        -----------
+        Sorts the transitions of each action by their source state, so
+        that they can be offset-indexed, keeping the order of the file
+        among the end states of the same state.
+
+        Parameters
+        ----------
+        parsed: ParsedNet() \\
+            -- The parsed file.
+        """
+
+        for a in range(len(DIRECTIONS)):
+            sources = np.asarray(parsed.sources[a])
+
+            order = np.argsort(sources, kind='stable')
+
+            counts = np.bincount(sources, minlength=len(self.names))
+
+            indptr = np.zeros(len(self.names) + 1, dtype=np.int64)
+            np.cumsum(counts, out=indptr[1:])
+
+            self.indptr.append(indptr)
+            self.indices.append(
+                np.asarray(parsed.destinations[a], dtype=np.int64)[order]
+            )
+            self.probabilities.append(
+                np.asarray(parsed.probabilities[a], dtype=float)[order]
+            )
+
+        self.action_costs[parsed.cost_actions, parsed.cost_states] = (
+            parsed.cost_values
+        )
+
+    def load_predecessors(self, parsed):
+        """
+        Description
+        -----------
+        Builds the predecessors of every state from the transitions.
+
+        `State.update_action` appends a predecessor the first time it
+        shows up while reading the file, so the (state, predecessor)
+        pairs are kept on the order of their first appearance.
+
+        Parameters
+        ----------
+        parsed: ParsedNet() \\
+            -- The parsed file.
+        """
+
+        sources = np.concatenate([
+            np.asarray(parsed.sources[a]) for a in parsed.action_order
+        ])
+        destinations = np.concatenate([
+            np.asarray(parsed.destinations[a]) for a in parsed.action_order
+        ])
+
+        not_loop = sources != destinations
+
+        sources = sources[not_loop]
+        destinations = destinations[not_loop]
+
+        keys = destinations * len(self.names) + sources
+
+        keys, first = np.unique(keys, return_index=True)
+
+        first = np.sort(first)
+
+        destinations = destinations[first]
+
+        order = np.argsort(destinations, kind='stable')
+
+        counts = np.bincount(destinations, minlength=len(self.names))
+
+        self.predecessors_indptr = np.zeros(
+            len(self.names) + 1, dtype=np.int64
+        )
+        np.cumsum(counts, out=self.predecessors_indptr[1:])
+
+        self.predecessors_indices = sources[first][order]
+
+    def update_coordinates(self, grid):
+        """
+        Description
+        -----------
+        Function used to update the coordinates for each state,
+        just like `StateSpace.update_coordinates`.
+
+        Parameters
+        ----------
+        grid: Grid() \\
+            -- Grid object that has the information needed to compute
+            the new coordinates.
+        """
+
+        self.x = self.x - 1
+        self.y = grid.shape[1] - self.y
+
+    def get_state(self, name):
+        """
+        Description
+        -----------
+        Function used to get a state by its name.
+
+        Parameters
+        ----------
+        name: str \\
+            -- String representing the name of the state.
+
+        Returns
+        -------
+        StateView() \\
+            -- A view of the state requested.
+        """
+
+        return StateView(self, self.index[name])
+
+    def get_state_by_id(self, i):
+        """
+        Description
+        -----------
+        Function used to get a state by its id.
+
+        Parameters
+        ----------
+        i: int \\
+            -- Id of the state.
+
+        Returns
+        -------
+        StateView() \\
+            -- A view of the state requested.
+        """
+
+        return StateView(self, i)
+
+
+class StateView():
+    """
+    Description
+    -----------
+    Class that gives the same interface as a State() to a state
+    stored in an ArrayStateSpace().
+
+    Parameters
+    ----------
+    space: ArrayStateSpace() \\
+        -- Where the state is stored.
+
+    i: int \\
+        -- Id of the state.
+
+    Attributes
+    ----------
+    space: ArrayStateSpace() \\
+        -- Where the state is stored.
+
+    id: int \\
+        -- Id of the state.
+    """
+
+    __slots__ = ('space', 'id')
+
+    def __init__(self, space, i):
+        self.space = space
+        self.id = i
+
+    def __repr__(self):
+        return f'State({self.name}, [{self.x}, {self.y}])'
+
+    def __str__(self):
+        return f'Name: {self.name}, Coordinates: ({self.y}, {self.x})'
+
+    def __eq__(self, other):
+        if isinstance(other, StateView):
+            return self.id == other.id
+
+        return self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    @property
+    def name(self):
+        return self.space.names[self.id]
+
+    @property
+    def x(self):
+        return int(self.space.x[self.id])
+
+    @property
+    def y(self):
+        return int(self.space.y[self.id])
+
+    @property
+    def actions(self):
+        return ActionSetView(self)
+
+    @property
+    def cost(self):
+        return self.space.costs[self.id]
+
+    @property
+    def policy(self):
+        return self.space.policies[self.id]
+
+    @property
+    def predecessors(self):
+        start = self.space.predecessors_indptr[self.id]
+        end = self.space.predecessors_indptr[self.id + 1]
+
+        return [
+            StateView(self.space, i)
+            for i in self.space.predecessors_indices[start:end].tolist()
+        ]
+
+    @property
+    def policy_predecessors(self):
+        return [
+            StateView(self.space, i)
+            for i in self.space.policy_predecessors.get(self.id, [])
+        ]
+
+    def update_policy(self, direction):
+        """
+        Description
+        -----------
+        Function used to update the `policy` attribute.
+
+        Parameters
+        ----------
+        direction: str \\
+            -- New direction to which the state should move.
+        """
+
+        self.space.policies[self.id] = direction
+
+    def update_cost(self, cost):
+        """
+        Description
+        -----------
+        Function used to update the `cost` attribute.
+
+        Parameters
+        ----------
+        cost: int \\
+            -- New cost.
+        """
+
+        self.space.costs[self.id] = cost
+
+    def add_policy_predecessor(self, state):
+        """
+        Description
+        -----------
+        Function used to append a new state to the
+        `policy_predecessors` attribute.
+
+        Parameters
+        ----------
+        state: StateView() \\
+            -- State to be appended.
+        """
+
+        if state != self:
+            self.space.policy_predecessors.setdefault(self.id, []).append(
+                state.id
+            )
+
+    def clean_policy_predecessors(self):
+        """
+        Description
+        -----------
+        Function used to clean the `policy_predecessors` attribute.
+        """
+
+        self.space.policy_predecessors.pop(self.id, None)
+
+
+class ActionSetView():
+    """
+    Description
+    -----------
+    Class that gives the same interface as an ActionSet() to the
+    actions of a StateView().
+
+    Parameters
+    ----------
+    state: StateView() \\
+        -- State where the actions begin.
+
+    Attributes
+    ----------
+    start: StateView() \\
+        -- State where the actions begin.
+    """
+
+    __slots__ = ('start',)
+
+    def __init__(self, state):
+        self.start = state
+
+    def __iter__(self):
+        action_list = [
+            ActionView(self.start, a) for a in range(len(DIRECTIONS))
+        ]
+
+        action_list = [i for i in action_list if i.size() > 0]
+
+        return iter(action_list)
+
+    def __repr__(self):
+        return f'ActionSet({self.start})'
+
+    def get_action(self, direction):
+        """
+        Description
+        -----------
+        Returns an action based on a string.
+
+        Parameters
+        -------
+        direction: str \\
+            -- String used to retrieve the action.
+
+        Returns
+        -------
+        ActionView() \\
+            -- The action requested.
+        """
+
+        for a, name in enumerate(DIRECTIONS):
+            if name in direction:
+                return ActionView(self.start, a)
+
+
+class ActionView():
+    """
+    Description
+    -----------
+    Class that gives the same interface as an Action() to an action
+    stored in an ArrayStateSpace().
+
+    Parameters
+    ----------
+    state: StateView() \\
+        -- State where the action begins.
+
+    a: int \\
+        -- Index of the direction in `DIRECTIONS`.
+
+    Attributes
+    ----------
+    start: StateView() \\
+        -- State where the action begins.
+
+    a: int \\
+        -- Index of the direction in `DIRECTIONS`.
+    """
+
+    __slots__ = ('start', 'a')
+
+    def __init__(self, state, a):
+        self.start = state
+        self.a = a
+
+    def __repr__(self):
+        return f'Action({self.start}, {self.direction})'
+
+    @property
+    def direction(self):
+        return DIRECTIONS[self.a]
+
+    @property
+    def cost(self):
+        return float(self.start.space.action_costs[self.a, self.start.id])
+
+    @property
+    def end(self):
+        space = self.start.space
+
+        start = space.indptr[self.a][self.start.id]
+        end = space.indptr[self.a][self.start.id + 1]
+
+        return [
+            (StateView(space, i), probability)
+            for i, probability in zip(
+                space.indices[self.a][start:end].tolist(),
+                space.probabilities[self.a][start:end].tolist()
+            )
+        ]
+
+    def size(self):
+        """
+        Description
+        -----------
+        Returns the number of end states, without building them.
+
+        Returns
+        -------
+        int \\
+            -- The number of end states, 0 if the action is not available.
+        """
+
+        indptr = self.start.space.indptr[self.a]
+
+        return int(indptr[self.start.id + 1] - indptr[self.start.id])
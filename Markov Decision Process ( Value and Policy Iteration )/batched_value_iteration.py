@@ -0,0 +1,268 @@
+import os
+import time
+import numpy as np
+from compiled_mdp import CompiledMDP, DIRECTIONS
+from solver_session import GoalSolution
+
+
+class BatchedValueIteration():
+    """
+    Description
+    -----------
+    Class that runs Value Iteration for many goals on the same map
+    at once.
+
+    The costs are a (number of states, number of goals) matrix, one
+    column per goal, and each iteration computes the cost of every
+    action for every goal with a single sparse matrix times dense
+    matrix product per action:
+
+    Q(a) = c(a) + P(a) * costs
+
+    Where P(a) is the transition matrix of the action and c(a) its
+    expected cost on each state. A goal stops being updated once its
+    own residual is smaller than `epsilon`, so each goal converges
+    just like a `ValueIteration` with that goal would.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object with the map. Its goal is not used.
+
+    goals: list \\
+        -- Names of the goal states.
+
+    epsilon: float \\
+        -- Used to stop tha algorithm. default = 1.0.
+
+    Attributes
+    ----------
+    folder_name: str \\
+        -- Folder where the test file is stored.
+
+    file_name: str \\
+        -- Name of the test file.
+
+    states: StateSpace() \\
+        -- StateSpace() object containing all the states.
+
+    goals: list \\
+        -- Names of the goal states.
+
+    epsilon: float \\
+        -- Stopping criteria of every goal.
+
+    mdp: CompiledMDP() \\
+        -- The compiled map.
+
+    transition_matrices: list \\
+        -- The transition matrix of each action.
+
+    expected_costs: list \\
+        -- The expected cost of each action on each state,
+        `inf` where the action is not available.
+
+    time_elapsed: float \\
+        -- The time in milliseconds it took for the algorithm to run,
+        not including the compilation.
+
+    compile_time_elapsed: float \\
+        -- Time in milliseconds spent compiling the map.
+
+    iterations: int \\
+        -- The number of iterations until every goal converged.
+
+    solutions: dict \\
+        -- A dict containing (name of the goal, GoalSolution()) tuples.
+    """
+
+    def __init__(self, test, goals, epsilon=1.0):
+        self.folder_name = test.folder_name
+        self.file_name = test.file_name
+
+        self.states = test.states
+
+        self.goals = list(goals)
+
+        self.epsilon = epsilon
+
+        self.mdp = None
+        self.transition_matrices = []
+        self.expected_costs = []
+
+        self.time_elapsed = 0
+        self.compile_time_elapsed = 0
+        self.iterations = 0
+
+        self.solutions = {}
+
+    def __repr__(self):
+        return f'BatchedValueIteration({self.file_name}, {len(self.goals)})'
+
+    def __str__(self):
+        iterations = {
+            goal: solution.iterations
+            for goal, solution in self.solutions.items()
+        }
+
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Goals: {len(self.goals)}
+Epsilon: {self.epsilon}
+
+Time: {self.time_elapsed} ms
+    Compile Time: {self.compile_time_elapsed} ms
+Iterations: {self.iterations}
+Iterations per Goal: {iterations}'''
+
+    def run(self):
+        """
+        Description
+        -----------
+        Runs the algorithm, storing a GoalSolution() for each goal.
+        """
+
+        start = time.perf_counter_ns()
+
+        self.compile()
+
+        self.compile_time_elapsed = (time.perf_counter_ns() - start) / 1e6
+
+        start = time.perf_counter_ns()
+
+        self.solve()
+
+        self.time_elapsed = (time.perf_counter_ns() - start) / 1e6
+
+        # The goals are solved together, so they share the time
+        for solution in self.solutions.values():
+            solution.time_elapsed = self.time_elapsed
+
+    def compile(self):
+        """
+        Description
+        -----------
+        Compiles the map and builds the matrices of each action.
+        """
+
+        self.mdp = CompiledMDP(self.states)
+
+        for a in range(len(DIRECTIONS)):
+            self.transition_matrices.append(self.mdp.transition_matrix(a))
+            self.expected_costs.append(self.mdp.expected_costs(a))
+
+    def calculate_initial_cost(self, goal_ids):
+        """
+        Description
+        -----------
+        Computes the initial cost matrix, the manhattan distance from
+        each state to each goal, just like `ValueIteration`.
+
+        Parameters
+        ----------
+        goal_ids: numpy.ndarray \\
+            -- Id of each goal.
+
+        Returns
+        -------
+        numpy.ndarray \\
+            -- Matrix shaped (number of states, number of goals).
+        """
+
+        x, y = self.mdp.x, self.mdp.y
+
+        return (
+            np.abs(x[:, None] - x[goal_ids][None, :])
+            + np.abs(y[:, None] - y[goal_ids][None, :])
+        ).astype(float)
+
+    def bellman_backup(self, costs, goal_ids):
+        """
+        Description
+        -----------
+        Computes the new costs and the policies of every goal.
+
+        Ties are broken the same way `ValueIteration.get_min_cost` does,
+        the last action with the minimum cost is the one selected.
+
+        Parameters
+        ----------
+        costs: numpy.ndarray \\
+            -- Matrix shaped (number of states, number of goals).
+
+        goal_ids: numpy.ndarray \\
+            -- Id of the goal of each column.
+
+        Returns
+        -------
+        new_costs: numpy.ndarray \\
+            -- The new costs, same shape as `costs`.
+
+        policies: numpy.ndarray \\
+            -- Index in `DIRECTIONS` of the action selected for each
+            state and goal, -1 when there is no action.
+        """
+
+        q = np.stack([
+            self.expected_costs[a][:, None]
+            + self.transition_matrices[a] @ costs
+            for a in range(len(DIRECTIONS))
+        ])
+
+        last = len(DIRECTIONS) - 1
+
+        policies = last - np.argmin(q[::-1], axis=0)
+
+        new_costs = np.take_along_axis(q, policies[None], axis=0)[0]
+
+        no_action = np.isinf(new_costs)
+
+        new_costs[no_action] = 0.0
+        policies[no_action] = -1
+
+        columns = np.arange(len(goal_ids))
+
+        new_costs[goal_ids, columns] = 0.0
+        policies[goal_ids, columns] = -1
+
+        return new_costs, policies
+
+    def solve(self):
+        """
+        Description
+        -----------
+        Updates every goal that has not converged yet, until all of
+        them have, then stores their solutions.
+        """
+
+        goal_ids = np.array(
+            [self.mdp.index[goal] for goal in self.goals], dtype=np.int64
+        )
+
+        costs = self.calculate_initial_cost(goal_ids)
+        policies = np.full(costs.shape, -1, dtype=np.int64)
+
+        iterations = np.zeros(len(self.goals), dtype=np.int64)
+
+        active = np.arange(len(self.goals))
+
+        while active.size > 0:
+            new_costs, new_policies = self.bellman_backup(
+                costs[:, active], goal_ids[active]
+            )
+
+            residuals = np.max(np.abs(new_costs - costs[:, active]), axis=0)
+
+            costs[:, active] = new_costs
+            policies[:, active] = new_policies
+
+            iterations[active] += 1
+
+            self.iterations += 1
+
+            active = active[residuals >= self.epsilon]
+
+        for g, goal in enumerate(self.goals):
+            self.solutions[goal] = GoalSolution(
+                self.mdp, int(goal_ids[g]), costs[:, g], policies[:, g],
+                int(iterations[g]), 0
+            )
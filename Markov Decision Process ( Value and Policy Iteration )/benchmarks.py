@@ -0,0 +1,1531 @@
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+import datetime
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from tests import Test, list_test_files
+from states import State
+from net_parser import parse_net_file
+from net_cache import NetCache
+from value_iteration import ValueIteration, INITIAL_COSTS
+from prioritized_sweeping import PrioritizedSweeping
+from topological_value_iteration import TopologicalValueIteration
+from labeled_rtdp import LabeledRTDP
+from sparse_value_iteration import SparseValueIteration
+from parallel_value_iteration import ParallelValueIteration
+from stencil_value_iteration import StencilValueIteration
+from multigrid_value_iteration import MultigridValueIteration
+from jit_value_iteration import JitValueIteration
+from jit_kernels import NUMBA_AVAILABLE
+from policy_iteration import PolicyIteration, INITIAL_POLICIES
+from modified_policy_iteration import ModifiedPolicyIteration
+from net_generator import NavigationGrid
+from solver_session import SolverSession, WARM_STARTS
+from batched_value_iteration import BatchedValueIteration
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Solvers that can be used by the scaling benchmark.
+SCALING_ALGORITHMS = {
+    'vi': ValueIteration,
+    'sparse': SparseValueIteration,
+    'stencil': StencilValueIteration,
+    'multigrid': MultigridValueIteration,
+    'pi': PolicyIteration,
+    'mpi': ModifiedPolicyIteration,
+    'lrtdp': LabeledRTDP
+}
+
+HISTORY_COLUMNS = [
+    'date', 'commit', 'python', 'algorithm', 'width', 'height',
+    'wall_density', 'slip', 'seed', 'states', 'time_ms', 'iterations',
+    'backups', 'backups_per_s', 'peak_rss_kib'
+]
+
+
+def get_test_files():
+    """
+    Description
+    -----------
+    Function used to list every test file, in the same
+    order used by `LoadTests`.
+
+    Returns
+    -------
+    list \\
+        -- A list of paths to the test files.
+    """
+
+    return list_test_files('FixedGoal') + list_test_files('RandomGoal')
+
+
+def get_test_name(path):
+    """
+    Description
+    -----------
+    Function used to get the name used on the reports,
+    which is the folder and the file name.
+
+    Parameters
+    ----------
+    path: str \\
+        -- Path to the test file.
+
+    Returns
+    -------
+    str \\
+        -- The name of the test.
+    """
+
+    folder_name = os.path.basename(os.path.dirname(path))
+
+    return os.path.join(folder_name, os.path.basename(path))
+
+
+def best_time(func, repeat, *args):
+    """
+    Description
+    -----------
+    Runs a function `repeat` times and returns the best time.
+
+    Parameters
+    ----------
+    func: function \\
+        -- Function to time.
+
+    repeat: int \\
+        -- Number of runs.
+
+    *args: list \\
+        -- Arguments to be passed on to the function as parameters.
+
+    Returns
+    -------
+    float \\
+        -- The smallest time in milliseconds.
+    """
+
+    times = []
+
+    for i in range(0, repeat):
+        start = time.perf_counter()
+
+        func(*args)
+
+        times.append((time.perf_counter() - start) * 1000)
+
+    return round(min(times), 2)
+
+
+def load_test(path, parser):
+    """
+    Description
+    -----------
+    Loads a Test() from a path, closing the file afterwards.
+
+    Parameters
+    ----------
+    path: str \\
+        -- Path to the test file.
+
+    parser: str \\
+        -- Parser used by the Test().
+
+    Returns
+    -------
+    Test() \\
+        -- The loaded test.
+    """
+
+    with open(path, 'r') as test_file:
+        return Test(test_file, parser=parser)
+
+
+def build_test(path, parser, parsed):
+    """
+    Description
+    -----------
+    Builds a Test() from an already parsed file, so that only
+    the construction of the states is measured.
+
+    Parameters
+    ----------
+    path: str \\
+        -- Path to the test file.
+
+    parser: str \\
+        -- 'bulk' for a StateSpace(), 'array' for an ArrayStateSpace().
+
+    parsed: ParsedNet() \\
+        -- The parsed file.
+
+    Returns
+    -------
+    Test() \\
+        -- The loaded test.
+    """
+
+    with open(path, 'r') as test_file:
+        return Test(test_file, parser=parser, parsed_net=parsed)
+
+
+def measure_memory(func, *args):
+    """
+    Description
+    -----------
+    Measures the memory allocated by a function with tracemalloc,
+    which also tracks the buffers of the NumPy arrays.
+
+    Parameters
+    ----------
+    func: function \\
+        -- Function to measure.
+
+    *args: list \\
+        -- Arguments to be passed on to the function as parameters.
+
+    Returns
+    -------
+    float \\
+        -- Memory in KiB still allocated while the result is alive.
+    """
+
+    tracemalloc.start()
+
+    result = func(*args)
+
+    current, peak = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+
+    del result
+
+    return round(current / 1024, 1)
+
+
+def add_predecessor_list_scan(state, predecessor):
+    """
+    Description
+    -----------
+    The previous `State.add_predecessor`, which checks if the
+    predecessor was already added by walking the list.
+    Kept only as a reference for `benchmark_predecessors`.
+
+    Parameters
+    ----------
+    state: State() \\
+        -- State receiving the predecessor.
+
+    predecessor: State() \\
+        -- State to be appended.
+    """
+
+    if predecessor not in state.predecessors and predecessor != state:
+        state.predecessors.append(predecessor)
+
+
+def print_table(columns, rows):
+    """
+    Description
+    -----------
+    Prints the results of a benchmark as a table.
+
+    Parameters
+    ----------
+    columns: list \\
+        -- Names of the columns.
+
+    rows: list \\
+        -- A list of lists with a value for each column.
+    """
+
+    widths = [
+        max([len(str(column))] + [len(str(row[i])) for row in rows])
+        for i, column in enumerate(columns)
+    ]
+
+    print('  '.join(str(c).ljust(w) for c, w in zip(columns, widths)))
+
+    for row in rows:
+        print('  '.join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+
+def benchmark_parser(args):
+    """
+    Description
+    -----------
+    Compares the line by line loader of `Test` with `parse_net_file`,
+    both only parsing the file and also populating the objects.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        rows.append([
+            get_test_name(path),
+            os.path.getsize(path),
+            best_time(load_test, args.repeat, path, 'line'),
+            best_time(parse_net_file, args.repeat, path),
+            best_time(load_test, args.repeat, path, 'bulk')
+        ])
+
+    print_table(
+        ['test_name', 'bytes', 'line_ms', 'bulk_parse_ms', 'bulk_test_ms'],
+        rows
+    )
+
+
+def benchmark_cache(args):
+    """
+    Description
+    -----------
+    Compares parsing each file from text with loading it from a
+    NetCache() stored in a temporary folder.
+    """
+
+    with tempfile.TemporaryDirectory() as folder:
+        net_cache = NetCache(folder)
+
+        rows = []
+
+        for path in get_test_files():
+            net_cache.get(path)
+
+            rows.append([
+                get_test_name(path),
+                best_time(parse_net_file, args.repeat, path),
+                best_time(net_cache.get, args.repeat, path)
+            ])
+
+    print_table(['test_name', 'parse_ms', 'cache_ms'], rows)
+
+
+def benchmark_predecessors(args):
+    """
+    Description
+    -----------
+    Compares loading each file, line by line and in bulk, with the
+    set based `State.add_predecessor` and with the list scan it
+    replaced. Both build the same predecessors, in the same order.
+    """
+
+    add_predecessor = State.add_predecessor
+
+    rows = []
+
+    for path in get_test_files():
+        row = [get_test_name(path)]
+
+        for parser in ['line', 'bulk']:
+            State.add_predecessor = add_predecessor_list_scan
+
+            try:
+                list_time = best_time(load_test, args.repeat, path, parser)
+            finally:
+                State.add_predecessor = add_predecessor
+
+            set_time = best_time(load_test, args.repeat, path, parser)
+
+            row += [list_time, set_time]
+
+        rows.append(row)
+
+    print_table(
+        [
+            'test_name', 'line_list_ms', 'line_set_ms',
+            'bulk_list_ms', 'bulk_set_ms'
+        ],
+        rows
+    )
+
+
+def benchmark_states(args):
+    """
+    Description
+    -----------
+    Compares the construction time and memory of a StateSpace(), made
+    of State() and Action() objects, with an ArrayStateSpace().
+    The file is parsed once beforehand, so parsing is not measured.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        parsed = parse_net_file(path)
+
+        rows.append([
+            get_test_name(path),
+            len(parsed.names),
+            best_time(build_test, args.repeat, path, 'bulk', parsed),
+            measure_memory(build_test, path, 'bulk', parsed),
+            best_time(build_test, args.repeat, path, 'array', parsed),
+            measure_memory(build_test, path, 'array', parsed)
+        ])
+
+    print_table(
+        [
+            'test_name', 'states', 'object_ms', 'object_kib',
+            'array_ms', 'array_kib'
+        ],
+        rows
+    )
+
+
+def benchmark_sweeping(args):
+    """
+    Description
+    -----------
+    Compares the work done by the full sweeps of `ValueIteration`
+    with the single state updates of `PrioritizedSweeping`, whose
+    iterations are its backups as full sweeps.
+
+    Then checks the largest Bellman residual left by the
+    `PrioritizedSweeping`, and exits with an error if it is not
+    smaller than `epsilon`.
+    """
+
+    rows = []
+
+    failures = []
+
+    for path in get_test_files():
+        row = [get_test_name(path)]
+
+        for algorithm in [ValueIteration, PrioritizedSweeping]:
+            solver = algorithm(load_test(path, 'bulk'), epsilon=args.epsilon)
+
+            solver.run()
+
+            if algorithm is PrioritizedSweeping:
+                row.append(solver.updates)
+
+            row += [
+                solver.iterations, solver.backups,
+                round(solver.time_elapsed, 2)
+            ]
+
+        residual = max(
+            abs(
+                solver.get_bellman_cost(solver.states.get_state(name))
+                - solver.costs[name]
+            )
+            for name in solver.states
+        )
+
+        row.append(round(residual, 4))
+
+        if residual >= args.epsilon:
+            failures.append(get_test_name(path))
+
+        rows.append(row)
+
+    print_table(
+        [
+            'test_name', 'vi_iter', 'vi_backups', 'vi_time',
+            'ps_updates', 'ps_iter', 'ps_backups', 'ps_time', 'ps_residual'
+        ],
+        rows
+    )
+
+    if failures:
+        sys.exit(f'Residual not below epsilon: {", ".join(failures)}')
+
+
+def benchmark_convergence(args):
+    """
+    Description
+    -----------
+    Compares the stopping criteria of `ValueIteration`: the residual,
+    the residual skipping the converged states, and the gap between
+    the bounds, which is the only one that bounds the error.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        row = [get_test_name(path)]
+
+        for options in [{}, {'skip_converged': True}, {'bounded': True}]:
+            solver = ValueIteration(
+                load_test(path, 'bulk'), epsilon=args.epsilon, **options
+            )
+
+            solver.run()
+
+            row += [
+                solver.iterations, solver.backups,
+                round(solver.time_elapsed, 2)
+            ]
+
+        row.append(round(solver.gap, 4))
+
+        rows.append(row)
+
+    print_table(
+        [
+            'test_name', 'vi_iter', 'vi_backups', 'vi_time',
+            'skip_iter', 'skip_backups', 'skip_time',
+            'bounded_iter', 'bounded_backups', 'bounded_time', 'gap'
+        ],
+        rows
+    )
+
+
+def benchmark_topological(args):
+    """
+    Description
+    -----------
+    Compares `ValueIteration` with `TopologicalValueIteration`, showing
+    how many components each file is split into and the size of the
+    largest one, which bounds how much work the decomposition can save.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        row = [get_test_name(path)]
+
+        for algorithm in [ValueIteration, TopologicalValueIteration]:
+            solver = algorithm(load_test(path, 'bulk'), epsilon=args.epsilon)
+
+            solver.run()
+
+            row += [
+                solver.iterations, solver.backups,
+                round(solver.time_elapsed, 2)
+            ]
+
+        row += [
+            len(solver.components),
+            max([len(component) for component in solver.components]),
+            round(solver.scc_time_elapsed, 2)
+        ]
+
+        rows.append(row)
+
+    print_table(
+        [
+            'test_name', 'vi_iter', 'vi_backups', 'vi_time',
+            'tvi_iter', 'tvi_backups', 'tvi_time',
+            'components', 'largest', 'scc_time'
+        ],
+        rows
+    )
+
+
+def benchmark_heuristic(args):
+    """
+    Description
+    -----------
+    Compares the full sweeps of `ValueIteration` with `LabeledRTDP`,
+    which only updates the states reachable from the initial state,
+    showing how many states each one updated.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        row = [get_test_name(path)]
+
+        solver = ValueIteration(load_test(path, 'bulk'), epsilon=args.epsilon)
+
+        solver.run()
+
+        row += [
+            len(solver.costs), solver.backups, round(solver.time_elapsed, 2)
+        ]
+
+        solver = LabeledRTDP(
+            load_test(path, 'bulk'), epsilon=args.epsilon, seed=args.seed
+        )
+
+        solver.run()
+
+        row += [
+            solver.iterations, len(solver.expanded), solver.backups,
+            round(solver.time_elapsed, 2)
+        ]
+
+        rows.append(row)
+
+    print_table(
+        [
+            'test_name', 'states', 'vi_backups', 'vi_time',
+            'trials', 'expanded', 'lrtdp_backups', 'lrtdp_time'
+        ],
+        rows
+    )
+
+
+def benchmark_incremental(args):
+    """
+    Description
+    -----------
+    Compares `PolicyIteration` evaluating every state on each iteration
+    with evaluating only the states affected by the improvement.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        row = [get_test_name(path)]
+
+        for incremental in [False, True]:
+            solver = PolicyIteration(
+                load_test(path, 'bulk'), incremental=incremental
+            )
+
+            solver.run()
+
+            row += [
+                sum(solver.evaluated_states),
+                round(solver.evaluation_time_elapsed, 2)
+            ]
+
+        row.insert(1, solver.iterations)
+
+        rows.append(row)
+
+    print_table(
+        [
+            'test_name', 'iterations', 'full_evaluated', 'full_time',
+            'incremental_evaluated', 'incremental_time'
+        ],
+        rows
+    )
+
+
+def benchmark_initial(args):
+    """
+    Description
+    -----------
+    Runs `ValueIteration` from each of `INITIAL_COSTS` and
+    `PolicyIteration` from each of `INITIAL_POLICIES`, showing the
+    iterations each one takes. The time spent on `get_goal_distances`
+    is shown apart, but it is also part of the total.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        for initial_cost in INITIAL_COSTS:
+            solver = ValueIteration(
+                load_test(path, 'bulk'), epsilon=args.epsilon,
+                initial_cost=initial_cost
+            )
+
+            solver.run()
+
+            rows.append([
+                get_test_name(path), 'vi', initial_cost, solver.iterations,
+                round(solver.initial_time_elapsed, 2),
+                round(solver.time_elapsed, 2)
+            ])
+
+        for initial_policy in INITIAL_POLICIES:
+            solver = PolicyIteration(
+                load_test(path, 'bulk'), initial_policy=initial_policy
+            )
+
+            solver.run()
+
+            rows.append([
+                get_test_name(path), 'pi', initial_policy, solver.iterations,
+                round(solver.initial_time_elapsed, 2),
+                round(solver.time_elapsed, 2)
+            ])
+
+    print_table(
+        [
+            'test_name', 'solver', 'start', 'iterations', 'initial_ms',
+            'total_ms'
+        ],
+        rows
+    )
+
+
+def benchmark_modified(args):
+    """
+    Description
+    -----------
+    Runs `ModifiedPolicyIteration` with each number of evaluation sweeps,
+    showing the tradeoff between fewer iterations and more work on each
+    one. 0 sweeps is the same as `ValueIteration`.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        for sweeps in args.sweeps:
+            solver = ModifiedPolicyIteration(
+                load_test(path, 'bulk'), epsilon=args.epsilon,
+                sweeps=sweeps, adaptive=args.adaptive
+            )
+
+            solver.run()
+
+            rows.append([
+                get_test_name(path), sweeps, solver.iterations,
+                solver.evaluation_sweeps, solver.backups,
+                round(solver.improvement_time_elapsed, 2),
+                round(solver.evaluation_time_elapsed, 2),
+                round(solver.time_elapsed, 2)
+            ])
+
+    print_table(
+        [
+            'test_name', 'k', 'iterations', 'eval_sweeps', 'backups',
+            'improvement_ms', 'evaluation_ms', 'total_ms'
+        ],
+        rows
+    )
+
+
+def benchmark_parallel(args):
+    """
+    Description
+    -----------
+    Compares `SparseValueIteration` with `ParallelValueIteration` for
+    each number of workers, showing the speedup of each one. The time
+    to start the workers is shown apart, it is not part of the speedup.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        solver = SparseValueIteration(
+            load_test(path, 'bulk'), epsilon=args.epsilon
+        )
+
+        solver.run()
+
+        sparse_time = solver.time_elapsed
+
+        for workers in args.workers:
+            solver = ParallelValueIteration(
+                load_test(path, 'bulk'), epsilon=args.epsilon,
+                workers=workers
+            )
+
+            solver.run()
+
+            rows.append([
+                get_test_name(path), workers, solver.iterations,
+                round(sparse_time, 2), round(solver.time_elapsed, 2),
+                round(solver.startup_time_elapsed, 2),
+                round(sparse_time / solver.time_elapsed, 2)
+            ])
+
+    print(f'CPUs: {os.cpu_count()}')
+
+    print_table(
+        [
+            'test_name', 'workers', 'iterations', 'sparse_ms',
+            'parallel_ms', 'startup_ms', 'speedup'
+        ],
+        rows
+    )
+
+
+def benchmark_stencil(args):
+    """
+    Description
+    -----------
+    Compares `SparseValueIteration` with `StencilValueIteration` and
+    `JitValueIteration`, the best of `repeat` runs of each, without the
+    time to compile the StateSpace() nor the kernels. The layout is
+    'sparse' when the test doesn't fit on a grid and the stencil falls
+    back to the `SparseValueIteration`.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        row = [get_test_name(path)]
+
+        times = []
+
+        for algorithm in [
+            SparseValueIteration, StencilValueIteration, JitValueIteration
+        ]:
+            algorithm_times = []
+
+            for i in range(0, args.repeat):
+                solver = algorithm(
+                    load_test(path, 'bulk'), epsilon=args.epsilon
+                )
+
+                solver.run()
+
+                algorithm_times.append(solver.time_elapsed)
+
+            if algorithm is SparseValueIteration:
+                row.append(solver.iterations)
+            elif algorithm is StencilValueIteration:
+                row.append('sparse' if solver.stencil is None else 'grid')
+
+            times.append(min(algorithm_times))
+
+        sparse_time, stencil_time, jit_time = times
+
+        rows.append(row + [
+            round(sparse_time, 2), round(stencil_time, 2),
+            round(jit_time, 2), round(sparse_time / stencil_time, 2),
+            round(sparse_time / jit_time, 2)
+        ])
+
+    print(f'Kernel: {"numba" if NUMBA_AVAILABLE else "numpy"}')
+
+    print_table(
+        [
+            'test_name', 'iterations', 'layout', 'sparse_ms', 'stencil_ms',
+            'jit_ms', 'stencil_speedup', 'jit_speedup'
+        ],
+        rows
+    )
+
+
+def benchmark_multigrid(args):
+    """
+    Description
+    -----------
+    Compares `SparseValueIteration` with `MultigridValueIteration` for
+    each number of coarse levels, showing the sweeps of the full grid,
+    the sweeps and time of each coarse level, coarsest first, and the
+    total time, coarse levels included.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        solver = SparseValueIteration(
+            load_test(path, 'bulk'), epsilon=args.epsilon
+        )
+
+        solver.run()
+
+        rows.append([
+            get_test_name(path), 0, solver.iterations, '-', 0, 0,
+            round(solver.time_elapsed, 2)
+        ])
+
+        for levels in args.levels:
+            solver = MultigridValueIteration(
+                load_test(path, 'bulk'), epsilon=args.epsilon,
+                factor=args.factor, levels=levels, cycle=args.cycle
+            )
+
+            solver.run()
+
+            level_iterations = '/'.join(
+                str(iterations) for iterations in solver.level_iterations
+            )
+
+            rows.append([
+                get_test_name(path), levels, solver.iterations,
+                level_iterations, solver.corrections,
+                round(solver.coarse_time_elapsed, 2),
+                round(solver.time_elapsed, 2)
+            ])
+
+    print_table(
+        [
+            'test_name', 'levels', 'iterations', 'level_iterations',
+            'corrections', 'coarse_ms', 'total_ms'
+        ],
+        rows
+    )
+
+
+def run_cold_query(test, algorithm, initial, goal, epsilon):
+    """
+    Description
+    -----------
+    Answers a query the way it is done without a SolverSession(),
+    changing the initial and goal states of the Test() and running
+    a new solver on it.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object with the map.
+
+    algorithm: class \\
+        -- ValueIteration or SparseValueIteration.
+
+    initial: str \\
+        -- Name of the initial state.
+
+    goal: str \\
+        -- Name of the goal state.
+
+    epsilon: float \\
+        -- Stopping criteria of the solver.
+    """
+
+    test.initial_state = test.states.get_state(initial)
+    test.goal_state = test.states.get_state(goal)
+
+    algorithm(test, epsilon=epsilon).run()
+
+
+def compare_solutions(mdp, goal, costs, policies, reference_costs,
+                      tolerance):
+    """
+    Description
+    -----------
+    Compares a solution with the costs of a reference solver. A policy
+    is the same as the reference when its action is also the best one
+    under the reference costs, within `tolerance`, so that actions
+    tied with the reference action are not counted.
+
+    Parameters
+    ----------
+    mdp: CompiledMDP() \\
+        -- The compiled map.
+
+    goal: int \\
+        -- Id of the goal state.
+
+    costs: numpy.ndarray \\
+        -- Cost of each state.
+
+    policies: numpy.ndarray \\
+        -- Index in `DIRECTIONS` of the policy of each state.
+
+    reference_costs: numpy.ndarray \\
+        -- Cost of each state found by the reference solver.
+
+    tolerance: float \\
+        -- Largest difference accepted between two costs.
+
+    Returns
+    -------
+    max_cost_diff: float \\
+        -- The largest difference between the costs.
+
+    policy_diffs: int \\
+        -- The number of states whose policy is not the best one.
+    """
+
+    max_cost_diff = float(np.max(np.abs(costs - reference_costs)))
+
+    q = mdp.q_values(reference_costs)
+
+    best = q.min(axis=0)
+
+    has_policy = policies >= 0
+    has_policy[goal] = False
+
+    ids = np.flatnonzero(has_policy)
+
+    worse = q[policies[ids], ids] > best[ids] + tolerance
+
+    # States with no policy must have no action either
+    missing = np.isfinite(best) & ~has_policy
+    missing[goal] = False
+
+    return max_cost_diff, int(np.sum(worse) + np.sum(missing))
+
+
+def check_session(path, queries, epsilon, tolerance):
+    """
+    Description
+    -----------
+    Solves the goals of the queries with a SolverSession() for each
+    warm start and with a cold SparseValueIteration, which gives the
+    same answers as the ValueIteration, both until the residual is
+    below `epsilon`, and compares them with `compare_solutions`.
+
+    Parameters
+    ----------
+    path: str \\
+        -- Path to the test file.
+
+    queries: list \\
+        -- The (initial, goal) of each query.
+
+    epsilon: float \\
+        -- Stopping criteria of the solvers, small enough for both to
+        be close to the real costs.
+
+    tolerance: float \\
+        -- See `compare_solutions`.
+
+    Returns
+    -------
+    dict \\
+        -- A dict containing (warm start, (largest cost difference,
+        number of different policies)) tuples.
+    """
+
+    test = load_test(path, 'bulk')
+
+    reference = {}
+
+    for initial, goal in queries:
+        run_cold_query(test, SparseValueIteration, initial, goal, epsilon)
+
+        reference[goal] = {
+            name: test.states.get_state(name).cost for name in test.states
+        }
+
+    results = {}
+
+    for warm_start in WARM_STARTS:
+        session = SolverSession(
+            load_test(path, 'bulk'), epsilon=epsilon, warm_start=warm_start
+        )
+
+        max_cost_diff = 0.0
+        policy_diffs = 0
+
+        for initial, goal in queries:
+            solution = session.solve(goal)
+
+            reference_costs = np.array([
+                reference[goal][name] for name in session.mdp.names
+            ])
+
+            cost_diff, diffs = compare_solutions(
+                session.mdp, solution.goal, solution.costs,
+                solution.policies, reference_costs, tolerance
+            )
+
+            max_cost_diff = max(max_cost_diff, cost_diff)
+            policy_diffs += diffs
+
+        results[warm_start] = (max_cost_diff, policy_diffs)
+
+    return results
+
+
+def benchmark_session(args):
+    """
+    Description
+    -----------
+    Compares the latency of answering goal queries on the same map
+    with a cold solver per query and with a SolverSession(), for new
+    goals and for goals already solved with another initial state.
+    The queries are random, with a fixed seed.
+
+    Then checks that every warm start gives the same costs and
+    policies as the cold solver, see `check_session`, and exits with
+    an error if any of them doesn't.
+    """
+
+    rows = []
+    check_rows = []
+
+    failures = []
+
+    for path in list_test_files('RandomGoal'):
+        test = load_test(path, 'bulk')
+
+        names = list(test.states)
+
+        generator = random.Random(args.seed)
+
+        queries = [
+            generator.sample(names, 2) for i in range(0, args.queries)
+        ]
+
+        row = [get_test_name(path)]
+
+        for algorithm in [ValueIteration, SparseValueIteration]:
+            row.append(round(sum(
+                best_time(
+                    run_cold_query, 1, test, algorithm, initial, goal,
+                    args.epsilon
+                )
+                for initial, goal in queries
+            ) / len(queries), 2))
+
+        start = time.perf_counter()
+
+        session = SolverSession(
+            test, epsilon=args.epsilon, warm_start=args.warm_start
+        )
+
+        row.append(round((time.perf_counter() - start) * 1000, 2))
+
+        new_goal = [
+            best_time(session.query, 1, initial, goal)
+            for initial, goal in queries
+        ]
+
+        # Same goals, the initial states are shifted between queries
+        same_goal = [
+            best_time(session.query, 1, queries[i - 1][0], goal)
+            for i, (initial, goal) in enumerate(queries)
+        ]
+
+        row += [
+            round(sum(new_goal) / len(queries), 2),
+            round(sum(same_goal) / len(queries), 2),
+            round(sum(
+                session.solve(goal).iterations for initial, goal in queries
+            ) / len(queries), 1)
+        ]
+
+        rows.append(row)
+
+        results = check_session(
+            path, queries, args.check_epsilon, args.tolerance
+        )
+
+        for warm_start, (max_cost_diff, policy_diffs) in results.items():
+            check_rows.append([
+                get_test_name(path), warm_start, round(max_cost_diff, 6),
+                policy_diffs
+            ])
+
+            if max_cost_diff > args.tolerance or policy_diffs > 0:
+                failures.append(f'{get_test_name(path)} {warm_start}')
+
+    print_table(
+        [
+            'test_name', 'cold_vi_ms', 'cold_sparse_ms', 'session_init_ms',
+            'new_goal_ms', 'same_goal_ms', 'session_iter'
+        ],
+        rows
+    )
+
+    print_table(
+        ['test_name', 'warm_start', 'max_cost_diff', 'policy_diffs'],
+        check_rows
+    )
+
+    if failures:
+        sys.exit(f'Different from the cold solver: {", ".join(failures)}')
+
+
+def run_independent_goals(path, goals, epsilon):
+    """
+    Description
+    -----------
+    Solves each goal with its own SparseValueIteration, loading
+    the map once.
+
+    Parameters
+    ----------
+    path: str \\
+        -- Path to the test file.
+
+    goals: list \\
+        -- Names of the goal states.
+
+    epsilon: float \\
+        -- Stopping criteria of the solver.
+    """
+
+    test = load_test(path, 'bulk')
+
+    for goal in goals:
+        test.goal_state = test.states.get_state(goal)
+
+        SparseValueIteration(test, epsilon=epsilon).run()
+
+
+def run_batched_goals(path, goals, epsilon):
+    """
+    Description
+    -----------
+    Solves every goal with a single BatchedValueIteration.
+
+    Parameters
+    ----------
+    path: str \\
+        -- Path to the test file.
+
+    goals: list \\
+        -- Names of the goal states.
+
+    epsilon: float \\
+        -- Stopping criteria of the solver.
+    """
+
+    BatchedValueIteration(load_test(path, 'bulk'), goals, epsilon).run()
+
+
+def benchmark_batched(args):
+    """
+    Description
+    -----------
+    Compares solving random goals on each map one at a time with
+    SparseValueIteration against a single BatchedValueIteration.
+    Both include loading and compiling the map.
+    """
+
+    rows = []
+
+    for path in get_test_files():
+        names = parse_net_file(path).names
+
+        goals = random.Random(args.seed).sample(
+            names, min(args.goals, len(names))
+        )
+
+        rows.append([
+            get_test_name(path),
+            len(goals),
+            best_time(
+                run_independent_goals, args.repeat, path, goals, args.epsilon
+            ),
+            best_time(
+                run_batched_goals, args.repeat, path, goals, args.epsilon
+            )
+        ])
+
+    print_table(['test_name', 'goals', 'independent_ms', 'batched_ms'], rows)
+
+
+def get_commit():
+    """
+    Description
+    -----------
+    Returns the short hash of the current git commit, so that each
+    line of the history can be traced to a version of the code.
+
+    Returns
+    -------
+    str \\
+        -- The hash, empty if git is not available.
+    """
+
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_scaling_job(path, algorithm, epsilon):
+    """
+    Description
+    -----------
+    Loads a generated file and runs a solver on it.
+    It is executed on a new process each time, so that the peak RSS
+    belongs to this job only.
+
+    Parameters
+    ----------
+    path: str \\
+        -- Path to the generated file.
+
+    algorithm: str \\
+        -- One of the keys of `SCALING_ALGORITHMS`.
+
+    epsilon: float \\
+        -- Stopping criteria of the Value Iteration solvers.
+
+    Returns
+    -------
+    dict \\
+        -- The number of states, the time, iterations and backups
+        reported by the solver and the peak RSS in KiB.
+    """
+
+    test = load_test(path, 'bulk')
+
+    if algorithm == 'pi':
+        solver = PolicyIteration(test)
+    else:
+        solver = SCALING_ALGORITHMS[algorithm](test, epsilon=epsilon)
+
+    solver.run()
+
+    peak_rss = None
+
+    # ru_maxrss is in KiB on Linux, but in bytes on macOS
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        if sys.platform == 'darwin':
+            peak_rss = peak_rss // 1024
+
+    return {
+        'states': len(list(test.states)),
+        'time_ms': round(solver.time_elapsed, 3),
+        'iterations': solver.iterations,
+        'backups': solver.backups,
+        'peak_rss_kib': peak_rss
+    }
+
+
+def append_history(rows, path):
+    """
+    Description
+    -----------
+    Appends rows to the history file, writing the header
+    if the file is new.
+
+    Parameters
+    ----------
+    rows: list \\
+        -- A list of dicts with the keys in `HISTORY_COLUMNS`.
+
+    path: str \\
+        -- Path to the csv file.
+    """
+
+    is_new = not os.path.isfile(path)
+
+    with open(path, 'a', newline='') as history_file:
+        writer = csv.DictWriter(history_file, fieldnames=HISTORY_COLUMNS)
+
+        if is_new:
+            writer.writeheader()
+
+        writer.writerows(rows)
+
+
+def benchmark_scaling(args):
+    """
+    Description
+    -----------
+    Generates square navigation grids of increasing size and runs
+    each solver on them, each run on a new process. The results are
+    printed and appended to the history file, so that runs of
+    different versions of the code can be compared.
+    """
+
+    date = datetime.datetime.now().isoformat(timespec='seconds')
+    commit = get_commit()
+
+    rows = []
+
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            path = os.path.join(folder, f'navigation_{size}.net')
+
+            NavigationGrid(
+                size, size, wall_density=args.wall_density,
+                slip=args.slip, seed=args.seed
+            ).write(path)
+
+            for algorithm in args.algorithms:
+                with ProcessPoolExecutor(
+                    max_workers=1, max_tasks_per_child=1
+                ) as executor:
+                    result = executor.submit(
+                        run_scaling_job, path, algorithm, args.epsilon
+                    ).result()
+
+                seconds = result['time_ms'] / 1000
+
+                rows.append({
+                    'date': date,
+                    'commit': commit,
+                    'python': platform.python_version(),
+                    'algorithm': algorithm,
+                    'width': size,
+                    'height': size,
+                    'wall_density': args.wall_density,
+                    'slip': args.slip,
+                    'seed': args.seed,
+                    **result,
+                    'backups_per_s': (
+                        round(result['backups'] / seconds) if seconds else ''
+                    )
+                })
+
+    columns = ['algorithm', 'width'] + HISTORY_COLUMNS[9:]
+
+    print_table(
+        columns, [[row[column] for column in columns] for row in rows]
+    )
+
+    append_history(rows, args.history)
+
+
+def main():
+    """
+    Description
+    -----------
+    Parses the command line and runs the selected benchmark.
+    """
+
+    parser = argparse.ArgumentParser(description='MDP benchmarks')
+
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='number of runs, the best one is reported'
+    )
+    parser.add_argument(
+        '--epsilon', type=float, default=0.1,
+        help='stopping criteria of the solvers'
+    )
+
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    subparsers.add_parser(
+        'parser', help='line by line loader against parse_net_file'
+    ).set_defaults(func=benchmark_parser)
+
+    subparsers.add_parser(
+        'cache', help='parse_net_file against loading from NetCache'
+    ).set_defaults(func=benchmark_cache)
+
+    subparsers.add_parser(
+        'predecessors', help='list scan against set on add_predecessor'
+    ).set_defaults(func=benchmark_predecessors)
+
+    subparsers.add_parser(
+        'states', help='StateSpace against ArrayStateSpace'
+    ).set_defaults(func=benchmark_states)
+
+    subparsers.add_parser(
+        'sweeping', help='ValueIteration against PrioritizedSweeping'
+    ).set_defaults(func=benchmark_sweeping)
+
+    subparsers.add_parser(
+        'topological', help='ValueIteration against TopologicalValueIteration'
+    ).set_defaults(func=benchmark_topological)
+
+    subparsers.add_parser(
+        'convergence', help='residual, skipped states and bounded stopping'
+    ).set_defaults(func=benchmark_convergence)
+
+    subparsers.add_parser(
+        'incremental', help='full against incremental policy evaluation'
+    ).set_defaults(func=benchmark_incremental)
+
+    subparsers.add_parser(
+        'initial', help='manhattan and breadth-first against Dijkstra starts'
+    ).set_defaults(func=benchmark_initial)
+
+    modified = subparsers.add_parser(
+        'modified', help='ModifiedPolicyIteration for each number of sweeps'
+    )
+    modified.add_argument(
+        '--sweeps', type=int, nargs='+', default=[0, 1, 2, 5, 10, 20],
+        help='numbers of evaluation sweeps to run'
+    )
+    modified.add_argument(
+        '--adaptive', action='store_true',
+        help='stop the evaluation when its residual is below epsilon'
+    )
+    modified.set_defaults(func=benchmark_modified)
+
+    parallel = subparsers.add_parser(
+        'parallel', help='SparseValueIteration against parallel workers'
+    )
+    parallel.add_argument(
+        '--workers', type=int, nargs='+', default=[1, 2, 4],
+        help='numbers of worker processes to run'
+    )
+    parallel.set_defaults(func=benchmark_parallel)
+
+    subparsers.add_parser(
+        'stencil', help='SparseValueIteration against stencil and kernels'
+    ).set_defaults(func=benchmark_stencil)
+
+    multigrid = subparsers.add_parser(
+        'multigrid', help='SparseValueIteration against coarse to fine'
+    )
+    multigrid.add_argument(
+        '--levels', type=int, nargs='+', default=[1, 2, 3],
+        help='numbers of coarse levels to run'
+    )
+    multigrid.add_argument(
+        '--factor', type=int, default=2,
+        help='cells on each side of a block of the next coarser level'
+    )
+    multigrid.add_argument(
+        '--cycle', type=int, default=10,
+        help='sweeps of the full grid between corrections, 0 for none'
+    )
+    multigrid.set_defaults(func=benchmark_multigrid)
+
+    heuristic = subparsers.add_parser(
+        'heuristic', help='ValueIteration against LabeledRTDP'
+    )
+    heuristic.add_argument(
+        '--seed', type=int, default=0,
+        help='seed used to sample the trials'
+    )
+    heuristic.set_defaults(func=benchmark_heuristic)
+
+    session = subparsers.add_parser(
+        'session', help='cold solvers against SolverSession on goal queries'
+    )
+    session.add_argument(
+        '--queries', type=int, default=3,
+        help='number of random queries per map'
+    )
+    session.add_argument(
+        '--warm-start', default='distance', choices=WARM_STARTS
+    )
+    session.add_argument('--seed', type=int, default=0)
+    session.add_argument(
+        '--check-epsilon', type=float, default=1e-6,
+        help='stopping criteria of the solvers compared by the check'
+    )
+    session.add_argument(
+        '--tolerance', type=float, default=1e-3,
+        help='largest cost difference accepted by the check'
+    )
+    session.set_defaults(func=benchmark_session)
+
+    batched = subparsers.add_parser(
+        'batched', help='one SparseValueIteration per goal against batched'
+    )
+    batched.add_argument(
+        '--goals', type=int, default=16,
+        help='number of random goals per map'
+    )
+    batched.add_argument('--seed', type=int, default=0)
+    batched.set_defaults(func=benchmark_batched)
+
+    scaling = subparsers.add_parser(
+        'scaling', help='solvers on generated grids of increasing size'
+    )
+    scaling.add_argument(
+        '--sizes', type=int, nargs='+', default=[20, 40, 80],
+        help='edge sizes of the generated grids'
+    )
+    scaling.add_argument(
+        '--algorithms', nargs='+', default=['vi', 'sparse', 'pi'],
+        choices=list(SCALING_ALGORITHMS)
+    )
+    scaling.add_argument(
+        '--wall-density', type=float, default=0.2,
+        help='chance of each cell being a wall'
+    )
+    scaling.add_argument(
+        '--slip', type=float, default=0.5,
+        help='chance of a move staying on the same cell'
+    )
+    scaling.add_argument('--seed', type=int, default=0)
+    scaling.add_argument(
+        '--history', default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            'outputs', 'scaling_history.csv'
+        ),
+        help='csv file the results are appended to'
+    )
+    scaling.set_defaults(func=benchmark_scaling)
+
+    args = parser.parse_args()
+
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+import numpy as np
+from scipy import sparse
+
+
+# Same order used by ActionSet() when iterating,
+# it matters when breaking ties between actions.
+DIRECTIONS = ['north', 'south', 'east', 'west']
+
+
+class CompiledMDP():
+    """
+    Description
+    -----------
+    Class that compiles a StateSpace() into flat arrays, so that the
+    Bellman backups can be computed with NumPy instead of walking
+    through every State() and Action() object.
+
+    Every state gets an integer id, which is its position in `names`.
+    Each action is stored as a CSR structure containing only the states
+    where the action is available.
+
+    Parameters
+    ----------
+    states: StateSpace() \\
+        -- StateSpace() object containing all the states.
+
+    Attributes
+    ----------
+    names: list \\
+        -- Names of the states, the index of each name is the state's id.
+
+    index: dict \\
+        -- A dict containing (name of the state, id of the state) tuples.
+
+    x: numpy.ndarray \\
+        -- Converted x coordinate of each state.
+
+    y: numpy.ndarray \\
+        -- Converted y coordinate of each state.
+
+    rows: list \\
+        -- For each action, the ids of the states where it is available.
+
+    indptr: list \\
+        -- For each action, the offsets of each row in
+        `indices` and `probabilities`.
+
+    indices: list \\
+        -- For each action, the ids of the end states.
+
+    probabilities: list \\
+        -- For each action, the probability of each end state.
+
+    costs: list \\
+        -- For each action, the cost of taking it repeated for
+        each of its end states.
+    """
+
+    def __init__(self, states):
+        self.names = list(states)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        self.x = np.zeros(len(self.names), dtype=np.int64)
+        self.y = np.zeros(len(self.names), dtype=np.int64)
+
+        self.rows = []
+        self.indptr = []
+        self.indices = []
+        self.probabilities = []
+        self.costs = []
+
+        self.compile(states)
+
+    def __repr__(self):
+        return f'CompiledMDP({len(self.names)})'
+
+    def __len__(self):
+        return len(self.names)
+
+    def compile(self, states):
+        """
+        Description
+        -----------
+        Fills the arrays by reading each state and its actions once.
+
+        Parameters
+        ----------
+        states: StateSpace() \\
+            -- StateSpace() object containing all the states.
+        """
+
+        for i, name in enumerate(self.names):
+            state = states.get_state(name)
+
+            self.x[i] = state.x
+            self.y[i] = state.y
+
+        for direction in DIRECTIONS:
+            rows = []
+            indptr = [0]
+            indices = []
+            probabilities = []
+            costs = []
+
+            for i, name in enumerate(self.names):
+                action = states.get_state(name).actions.get_action(direction)
+
+                if action.end == []:
+                    continue
+
+                rows.append(i)
+
+                for end_state, probability in action.end:
+                    indices.append(self.index[end_state.name])
+                    probabilities.append(probability)
+                    costs.append(action.cost)
+
+                indptr.append(len(indices))
+
+            self.rows.append(np.array(rows, dtype=np.int64))
+            self.indptr.append(np.array(indptr, dtype=np.int64))
+            self.indices.append(np.array(indices, dtype=np.int64))
+            self.probabilities.append(np.array(probabilities))
+            self.costs.append(np.array(costs))
+
+    def get_id(self, state):
+        """
+        Description
+        -----------
+        Returns the id of a state.
+
+        Parameters
+        ----------
+        state: State() \\
+            -- The state whose id is requested.
+
+        Returns
+        -------
+        int \\
+            -- The id of the state.
+        """
+
+        return self.index[state.name]
+
+    def q_values(self, costs):
+        """
+        Description
+        -----------
+        Computes the cost of taking each action on each state.
+
+        It follows the same equation used by `ValueIteration.compute_cost`
+        term by term, so that the results are the same as the ones
+        computed by the object based algorithm.
+
+        cost(a) = sum( all( probability * (cost(a) + cost(end_state)) ) )
+
+        Parameters
+        ----------
+        costs: numpy.ndarray \\
+            -- Current cost of each state.
+
+        Returns
+        -------
+        numpy.ndarray \\
+            -- Array shaped (number of actions, number of states),
+            actions that are not available cost `inf`.
+        """
+
+        q = np.full((len(DIRECTIONS), len(self.names)), np.inf)
+
+        for a in range(len(DIRECTIONS)):
+            if self.rows[a].size == 0:
+                continue
+
+            terms = self.probabilities[a] * (
+                self.costs[a] + costs[self.indices[a]]
+            )
+
+            q[a, self.rows[a]] = np.add.reduceat(terms, self.indptr[a][:-1])
+
+        return q
+
+    def bellman_backup(self, costs, goal):
+        """
+        Description
+        -----------
+        Computes the new cost and the policy for every state.
+
+        Ties are broken the same way `ValueIteration.get_min_cost` does,
+        the last action with the minimum cost is the one selected.
+
+        Parameters
+        ----------
+        costs: numpy.ndarray \\
+            -- Current cost of each state.
+
+        goal: int \\
+            -- Id of the goal state.
+
+        Returns
+        -------
+        new_costs: numpy.ndarray \\
+            -- The new cost of each state.
+
+        policies: numpy.ndarray \\
+            -- Index in `DIRECTIONS` of the action selected for each
+            state, -1 when there is no action (goal included).
+        """
+
+        return self.select_actions(self.q_values(costs), goal)
+
+    def select_actions(self, q, goal):
+        """
+        Description
+        -----------
+        Selects the least costly action of every state, the second half
+        of `bellman_backup`, split so that it can be timed on its own.
+
+        Parameters
+        ----------
+        q: numpy.ndarray \\
+            -- The values returned by `q_values`.
+
+        goal: int \\
+            -- Id of the goal state.
+
+        Returns
+        -------
+        new_costs: numpy.ndarray \\
+            -- The new cost of each state.
+
+        policies: numpy.ndarray \\
+            -- Index in `DIRECTIONS` of the action selected for each
+            state, -1 when there is no action (goal included).
+        """
+
+        last = len(DIRECTIONS) - 1
+
+        policies = last - np.argmin(q[::-1], axis=0)
+
+        new_costs = q[policies, np.arange(len(self.names))]
+
+        no_action = np.isinf(new_costs)
+
+        new_costs[no_action] = 0.0
+        policies[no_action] = -1
+
+        new_costs[goal] = 0.0
+        policies[goal] = -1
+
+        return new_costs, policies
+
+    def transition_matrix(self, a):
+        """
+        Description
+        -----------
+        Builds the transition matrix of an action.
+        Rows of states where the action is not available are empty.
+
+        Parameters
+        ----------
+        a: int \\
+            -- Index of the action in `DIRECTIONS`.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix \\
+            -- Matrix shaped (number of states, number of states).
+        """
+
+        n = len(self.names)
+
+        row_ids = np.repeat(self.rows[a], np.diff(self.indptr[a]))
+
+        return sparse.csr_matrix(
+            (self.probabilities[a], (row_ids, self.indices[a])), shape=(n, n)
+        )
+
+    def expected_costs(self, a):
+        """
+        Description
+        -----------
+        Computes the expected immediate cost of an action for each state,
+        which is the cost of the action times the sum of its probabilities.
+
+        Parameters
+        ----------
+        a: int \\
+            -- Index of the action in `DIRECTIONS`.
+
+        Returns
+        -------
+        numpy.ndarray \\
+            -- Expected cost of each state, `inf` where the
+            action is not available.
+        """
+
+        costs = np.full(len(self.names), np.inf)
+
+        if self.rows[a].size > 0:
+            costs[self.rows[a]] = np.add.reduceat(
+                self.probabilities[a] * self.costs[a], self.indptr[a][:-1]
+            )
+
+        return costs
+
+    def to_dicts(self, costs, policies, goal):
+        """
+        Description
+        -----------
+        Converts the arrays back to the dicts used by the algorithms.
+
+        Parameters
+        ----------
+        costs: numpy.ndarray \\
+            -- Cost of each state.
+
+        policies: numpy.ndarray \\
+            -- Index in `DIRECTIONS` of the action selected for each state.
+
+        goal: int \\
+            -- Id of the goal state.
+
+        Returns
+        -------
+        costs: dict \\
+            -- A dict containing (name of the state, cost of the state).
+
+        policies: dict \\
+            -- A dict containing (name of the state, direction to follow).
+        """
+
+        costs_dict = dict(zip(self.names, costs.tolist()))
+
+        policies_dict = {
+            name: DIRECTIONS[policy] if policy >= 0 else '-'
+            for name, policy in zip(self.names, policies.tolist())
+        }
+
+        # The object based algorithms store the goal's cost as an int
+        costs_dict[self.names[goal]] = 0
+
+        for i in np.flatnonzero(policies < 0).tolist():
+            costs_dict[self.names[i]] = 0
+
+        return costs_dict, policies_dict
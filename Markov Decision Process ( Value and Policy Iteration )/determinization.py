@@ -0,0 +1,142 @@
+import heapq
+
+
+# 'all-outcome' turns every end state of an action into a move of its
+# own, 'most-likely' keeps only the most likely end state of each action.
+DETERMINIZATIONS = ['all-outcome', 'most-likely']
+
+
+def get_goal_distances(states, goal, determinization='all-outcome'):
+    """
+    Description
+    -----------
+    Runs Dijkstra backwards from the goal, following the predecessors,
+    on a deterministic version of the StateSpace(), giving a cost to
+    the goal and a policy for every state that can reach it. Unlike the
+    manhattan distance, the costs go around the walls.
+
+    With 'all-outcome' each move costs the cost of its action, so the
+    costs are never larger than the real ones, like the manhattan
+    distance.
+
+    With 'most-likely' each move costs the cost of its action divided
+    by the probability of the move, the expected cost of repeating the
+    action until it moves, which is the real cost when the other end
+    states of the action are the state itself. Ending on the state
+    itself is never the most likely move.
+
+    Parameters
+    ----------
+    states: StateSpace() \\
+        -- StateSpace() object containing all the states.
+
+    goal: State() \\
+        -- The goal state.
+
+    determinization: str \\
+        -- One of `DETERMINIZATIONS`. default = 'all-outcome'.
+
+    Returns
+    -------
+    costs: dict \\
+        -- A dict containing (name of the state, cost to the goal),
+        only for the states that can reach the goal.
+
+    policies: dict \\
+        -- A dict containing (name of the state, direction to follow),
+        '-' for the goal.
+    """
+
+    if determinization not in DETERMINIZATIONS:
+        raise ValueError(
+            f'Unknown determinization {determinization}, '
+            f'use one of {DETERMINIZATIONS}'
+        )
+
+    costs = {goal.name: 0.0}
+    policies = {goal.name: '-'}
+
+    done = set()
+
+    # (cost, order of insertion, state), the order breaks the ties
+    # so that the State() objects are never compared
+    heap = [(0.0, 0, goal)]
+
+    pushed = 1
+
+    while heap:
+        cost, _, current_state = heapq.heappop(heap)
+
+        if current_state.name in done:
+            continue
+
+        done.add(current_state.name)
+
+        for state in current_state.predecessors:
+            if state.name in done:
+                continue
+
+            for action in state.actions:
+                move_cost = get_move_cost(
+                    action, current_state, determinization
+                )
+
+                if move_cost is None:
+                    continue
+
+                new_cost = cost + move_cost
+
+                if new_cost < costs.get(state.name, float('inf')):
+                    costs[state.name] = new_cost
+                    policies[state.name] = action.direction
+
+                    heapq.heappush(heap, (new_cost, pushed, state))
+
+                    pushed += 1
+
+    return costs, policies
+
+
+def get_move_cost(action, end_state, determinization):
+    """
+    Description
+    -----------
+    Returns the cost of the move from the state of an action to
+    an end state, on the deterministic version of the action.
+
+    Parameters
+    ----------
+    action: Action() \\
+        -- The action taken.
+
+    end_state: State() \\
+        -- Where the move leads to.
+
+    determinization: str \\
+        -- One of `DETERMINIZATIONS`.
+
+    Returns
+    -------
+    float \\
+        -- The cost of the move, None if the deterministic
+        action doesn't lead to `end_state`.
+    """
+
+    moves = [
+        (state, probability) for state, probability in action.end
+        if state != action.start
+    ]
+
+    if determinization == 'most-likely':
+        moves = sorted(moves, key=lambda tup: tup[1], reverse=True)[:1]
+
+    for state, probability in moves:
+        if state != end_state:
+            continue
+
+        if determinization == 'most-likely':
+            return action.cost / probability
+
+        return action.cost
+
+    return None
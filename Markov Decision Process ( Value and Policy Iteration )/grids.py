@@ -1,5 +1,87 @@
 
 
+import numpy as np
+from compiled_mdp import DIRECTIONS
+
+
+# The arrow drawn for each policy letter, the initial state's policy
+# is uppercase and drawn as a triangle.
+ARROWS = {
+    'n': '↑', 's': '↓', 'e': '→', 'w': '←',
+    'N': '▲', 'S': '▼', 'E': '▶', 'W': '◀'
+}
+
+# Index in `DIRECTIONS` of the policy drawn by each arrow.
+POLICY_CODES = {
+    arrow: DIRECTIONS.index(direction)
+    for direction in DIRECTIONS
+    for arrow in [ARROWS[direction[0]], ARROWS[direction[0].upper()]]
+}
+
+
+def grid_to_str(grid):
+    """
+    Description
+    -----------
+    Joins the rows of a grid into a single string, each item followed
+    by a space and each row followed by a new line.
+
+    Parameters
+    ----------
+    grid: list \\
+        -- List of rows, or a 2-dimensional numpy.ndarray.
+
+    Returns
+    -------
+    str \\
+        -- The grid as text.
+    """
+
+    # Converting the whole array at once is much faster than
+    # converting its items one by one
+    if isinstance(grid, np.ndarray):
+        grid = grid.tolist()
+
+    return ''.join(
+        ' '.join([str(item) for item in row]) + ' \n' for row in grid
+    )
+
+
+def lookup(grid, table, default=None):
+    """
+    Description
+    -----------
+    Replaces every item of a grid by its value on a table, looking up
+    each distinct item only once.
+
+    Parameters
+    ----------
+    grid: numpy.ndarray \\
+        -- The grid.
+
+    table: dict \\
+        -- The value of each item.
+
+    default: object \\
+        -- Value of the items that are not on the table, None keeps
+        the item. default = None.
+
+    Returns
+    -------
+    numpy.ndarray \\
+        -- A grid with the same shape.
+    """
+
+    values, inverse = np.unique(grid, return_inverse=True)
+
+    replaced = np.array([
+        table.get(value, value if default is None else default)
+        for value in values.tolist()
+    ])
+
+    return replaced[inverse.reshape(-1)].reshape(grid.shape)
+
+
 class Grid():
     """
     Description
@@ -26,15 +108,7 @@ class Grid():
         return 'Grid()'
 
     def __str__(self):
-        grid_str = ''
-
-        for row in self.grid:
-            for item in row:
-                grid_str = grid_str + str(item) + ' '
-
-            grid_str = grid_str + '\n'
-
-        return f'Shape: {self.shape}\n\n{grid_str}'
+        return f'Shape: {self.shape}\n\n{grid_to_str(self.grid)}'
 
     def add_row(self, row):
         """
@@ -179,8 +253,9 @@ class AnswerGrid():
     shape: list \\
         -- Shape of the list of list.
 
-    grid: list \\
-        -- The answer grid as a list of lists.
+    grid: numpy.ndarray \\
+        -- The answer grid as an array of characters,
+        one row per line of the grid.
 
     arrow_grid: str \\
         -- Same grid, but instead of letters, uses arrows as
@@ -210,15 +285,7 @@ class AnswerGrid():
         return 'AnswerGrid()'
 
     def __str__(self):
-        grid_str = ''
-
-        for row in self.grid:
-            for item in row:
-                grid_str = grid_str + str(item) + ' '
-
-            grid_str = grid_str + '\n'
-
-        return f'Shape: {self.shape}\n\n{grid_str}'
+        return f'Shape: {self.shape}\n\n{grid_to_str(self.grid)}'
 
     def init_grid(self):
         """
@@ -227,13 +294,8 @@ class AnswerGrid():
         Starts the grid in the shape specified filled with empty squares.
         """
 
-        for i in range(0, self.shape[0]):
-            aux_row = []
-
-            for j in range(0, self.shape[1]):
-                aux_row.append('□')
-
-            self.grid.append(aux_row)
+        # shape is [columns, rows]
+        self.grid = np.full((self.shape[1], self.shape[0]), '□')
 
     def update_grid(self):
         """
@@ -246,7 +308,7 @@ class AnswerGrid():
         for name in self.policies:
             state = self.states.get_state(name)
 
-            self.grid[state.y][state.x] = self.policies[name][0]
+            self.grid[state.y, state.x] = self.policies[name][0]
 
     def highlight_special_states(self):
         """
@@ -256,10 +318,10 @@ class AnswerGrid():
         initial state to uppercase and exchanging the goal state with G.
         """
 
-        self.grid[self.initial_state.y][self.initial_state.x] = str.upper(
-            self.grid[self.initial_state.y][self.initial_state.x]
-        )
-        self.grid[self.goal_state.y][self.goal_state.x] = 'G'
+        initial = (self.initial_state.y, self.initial_state.x)
+
+        self.grid[initial] = str.upper(str(self.grid[initial]))
+        self.grid[self.goal_state.y, self.goal_state.x] = 'G'
 
     def create_arrow_grid(self):
         """
@@ -283,16 +345,16 @@ class ArrowGrid():
 
     Parameters
     ----------
-    grid: list \\
-        -- List of lists representing an AnswerGrid().
+    grid: numpy.ndarray \\
+        -- The grid of an AnswerGrid(), a list of lists also works.
 
     shape: list \\
         -- Shape of the list of lists.
 
     Attributes
     ----------
-    grid: list \\
-        -- List of lists containing the arrows as policies.
+    grid: numpy.ndarray \\
+        -- Array of characters containing the arrows as policies.
 
     shape: list \\
         -- Shape of the list of lists.
@@ -306,15 +368,7 @@ class ArrowGrid():
         return 'ArrowGrid()'
 
     def __str__(self):
-        grid_str = ''
-
-        for row in self.grid:
-            for item in row:
-                grid_str = grid_str + str(item) + ' '
-
-            grid_str = grid_str + '\n'
-
-        return f'Shape: {self.shape}\n\n{grid_str}'
+        return f'Shape: {self.shape}\n\n{grid_to_str(self.grid)}'
 
     def convert_grid_to_arrow_grid(self, grid):
         """
@@ -326,44 +380,34 @@ class ArrowGrid():
         Replaces the letter for the direction into and arrow ponting
         to that direction. Except from the initial state, which is
         replaced by an tringle ponting to that direction, so that it
-        is highlighted in the grid.
+        is highlighted in the grid. See `ARROWS`.
 
         Parameters
         -----------
-        grid: list \\
-            -- List of lists representing an AnswerGrid().
+        grid: numpy.ndarray \\
+            -- The grid of an AnswerGrid().
+
+        Returns
+        -------
+        arrow_grid: numpy.ndarray \\
+            -- The grid of an ArrowGrid().
+        """
+
+        return lookup(np.asarray(grid), ARROWS)
+
+    def to_policy_array(self):
+        """
+        Description
+        -----------
+        Returns the policies as integers, for tools that read the
+        answer instead of printing it.
 
         Returns
         -------
-        arrow_grid: list \\
-            -- List of lists representing an ArrowGrid().
+        numpy.ndarray \\
+            -- A (rows, columns) array with the index in `DIRECTIONS`
+            of the policy on each position, -1 on the goal and on the
+            positions without a policy.
         """
 
-        arrow_grid = []
-
-        for row in grid:
-            aux_row = []
-
-            for item in row:
-                if item == 'n':
-                    aux_row.append('↑')
-                elif item == 's':
-                    aux_row.append('↓')
-                elif item == 'e':
-                    aux_row.append('→')
-                elif item == 'w':
-                    aux_row.append('←')
-                elif item == 'N':
-                    aux_row.append('▲')
-                elif item == 'S':
-                    aux_row.append('▼')
-                elif item == 'E':
-                    aux_row.append('▶')
-                elif item == 'W':
-                    aux_row.append('◀')
-                else:
-                    aux_row.append(item)
-
-            arrow_grid.append(aux_row)
-
-        return arrow_grid
+        return lookup(self.grid, POLICY_CODES, default=-1).astype(np.int8)
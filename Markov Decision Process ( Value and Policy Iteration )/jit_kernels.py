@@ -0,0 +1,322 @@
+import time
+import numpy as np
+from compiled_mdp import DIRECTIONS
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# Numba is optional, without it the kernels run on NumPy.
+NUMBA_AVAILABLE = numba is not None
+
+if NUMBA_AVAILABLE:
+    prange = numba.prange
+else:
+    prange = range
+
+
+def flatten(mdp):
+    """
+    Description
+    -----------
+    Converts a CompiledMDP() into the flat arrays read by the kernels,
+    with the end states of every action stored one after the other.
+
+    The end states of state `i` taking action `a` are the entries from
+    `offsets[a, i]` to `offsets[a, i + 1]`, none if the action is not
+    available.
+
+    Parameters
+    ----------
+    mdp: CompiledMDP() \\
+        -- The compiled StateSpace().
+
+    Returns
+    -------
+    offsets: numpy.ndarray \\
+        -- Array shaped (number of actions, number of states + 1).
+
+    destinations: numpy.ndarray \\
+        -- Id of the end state of each entry.
+
+    probabilities: numpy.ndarray \\
+        -- Probability of each entry.
+
+    costs: numpy.ndarray \\
+        -- Cost of the action of each entry.
+    """
+
+    n = len(mdp)
+
+    offsets = np.zeros((len(DIRECTIONS), n + 1), dtype=np.int64)
+
+    start = 0
+
+    for a in range(len(DIRECTIONS)):
+        counts = np.zeros(n, dtype=np.int64)
+        counts[mdp.rows[a]] = np.diff(mdp.indptr[a])
+
+        offsets[a, 0] = start
+        np.cumsum(counts, out=offsets[a, 1:])
+        offsets[a, 1:] += start
+
+        start = offsets[a, -1]
+
+    destinations = np.concatenate(mdp.indices).astype(np.int64)
+    probabilities = np.concatenate(mdp.probabilities).astype(float)
+    costs = np.concatenate(mdp.costs).astype(float)
+
+    return offsets, destinations, probabilities, costs
+
+
+def bellman_backup_loops(offsets, destinations, probabilities, costs,
+                         values, goal):
+    """
+    Description
+    -----------
+    Computes the new cost and the policy of every state, one state
+    per loop iteration, which Numba runs in parallel.
+
+    Ties are broken like `CompiledMDP.select_actions`, the last action
+    with the minimum cost is the one selected.
+
+    Parameters
+    ----------
+    offsets, destinations, probabilities, costs: numpy.ndarray \\
+        -- The arrays returned by `flatten`.
+
+    values: numpy.ndarray \\
+        -- Current cost of each state.
+
+    goal: int \\
+        -- Id of the goal state.
+
+    Returns
+    -------
+    new_values: numpy.ndarray \\
+        -- The new cost of each state.
+
+    policies: numpy.ndarray \\
+        -- Index in `DIRECTIONS` of the action selected for each
+        state, -1 when there is no action (goal included).
+    """
+
+    n = values.size
+
+    new_values = np.zeros(n)
+    policies = np.full(n, -1, dtype=np.int64)
+
+    for i in prange(n):
+        if i == goal:
+            continue
+
+        best = np.inf
+        best_action = -1
+
+        for a in range(offsets.shape[0]):
+            start = offsets[a, i]
+            end = offsets[a, i + 1]
+
+            if start == end:
+                continue
+
+            q = 0.0
+
+            for k in range(start, end):
+                q += probabilities[k] * (costs[k] + values[destinations[k]])
+
+            if q <= best:
+                best = q
+                best_action = a
+
+        if best_action >= 0:
+            new_values[i] = best
+            policies[i] = best_action
+
+    return new_values, policies
+
+
+def policy_backup_loops(offsets, destinations, probabilities, costs,
+                        values, policies, goal):
+    """
+    Description
+    -----------
+    Computes the cost of following the policy of every state, one state
+    per loop iteration, which Numba runs in parallel.
+
+    Parameters
+    ----------
+    offsets, destinations, probabilities, costs: numpy.ndarray \\
+        -- The arrays returned by `flatten`.
+
+    values: numpy.ndarray \\
+        -- Current cost of each state.
+
+    policies: numpy.ndarray \\
+        -- Index in `DIRECTIONS` of the policy of each state,
+        -1 when there is none.
+
+    goal: int \\
+        -- Id of the goal state.
+
+    Returns
+    -------
+    numpy.ndarray \\
+        -- The new cost of each state.
+    """
+
+    n = values.size
+
+    new_values = np.zeros(n)
+
+    for i in prange(n):
+        a = policies[i]
+
+        if i == goal or a < 0:
+            continue
+
+        q = 0.0
+
+        for k in range(offsets[a, i], offsets[a, i + 1]):
+            q += probabilities[k] * (costs[k] + values[destinations[k]])
+
+        new_values[i] = q
+
+    return new_values
+
+
+def q_values_numpy(offsets, destinations, probabilities, costs, values):
+    """
+    Description
+    -----------
+    Computes the cost of taking each action on each state with NumPy,
+    used when Numba is not installed.
+
+    Parameters
+    ----------
+    offsets, destinations, probabilities, costs: numpy.ndarray \\
+        -- The arrays returned by `flatten`.
+
+    values: numpy.ndarray \\
+        -- Current cost of each state.
+
+    Returns
+    -------
+    numpy.ndarray \\
+        -- Array shaped (number of actions, number of states),
+        actions that are not available cost `inf`.
+    """
+
+    terms = probabilities * (costs + values[destinations])
+
+    q = np.full((offsets.shape[0], values.size), np.inf)
+
+    for a in range(offsets.shape[0]):
+        rows = np.flatnonzero(np.diff(offsets[a]))
+
+        if rows.size == 0:
+            continue
+
+        # Only the entries of this action, so that the sum of its
+        # last state doesn't run into the entries of the next action
+        first = offsets[a, 0]
+
+        q[a, rows] = np.add.reduceat(
+            terms[first:offsets[a, -1]], offsets[a, rows] - first
+        )
+
+    return q
+
+
+def bellman_backup_numpy(offsets, destinations, probabilities, costs,
+                         values, goal):
+    """
+    Description
+    -----------
+    Same as `bellman_backup_loops`, with NumPy.
+    """
+
+    q = q_values_numpy(offsets, destinations, probabilities, costs, values)
+
+    last = offsets.shape[0] - 1
+
+    policies = last - np.argmin(q[::-1], axis=0)
+
+    new_values = q[policies, np.arange(values.size)]
+
+    no_action = np.isinf(new_values)
+
+    new_values[no_action] = 0.0
+    policies[no_action] = -1
+
+    new_values[goal] = 0.0
+    policies[goal] = -1
+
+    return new_values, policies
+
+
+def policy_backup_numpy(offsets, destinations, probabilities, costs,
+                        values, policies, goal):
+    """
+    Description
+    -----------
+    Same as `policy_backup_loops`, with NumPy.
+    """
+
+    q = q_values_numpy(offsets, destinations, probabilities, costs, values)
+
+    selected = policies >= 0
+
+    new_values = np.zeros(values.size)
+
+    new_values[selected] = q[policies[selected], np.flatnonzero(selected)]
+
+    new_values[goal] = 0.0
+
+    return new_values
+
+
+if NUMBA_AVAILABLE:
+    bellman_backup = numba.njit(parallel=True)(bellman_backup_loops)
+    policy_backup = numba.njit(parallel=True)(policy_backup_loops)
+else:
+    bellman_backup = bellman_backup_numpy
+    policy_backup = policy_backup_numpy
+
+
+def compile_kernels():
+    """
+    Description
+    -----------
+    Compiles the kernels by calling them on a tiny problem, so that
+    the compilation is not mixed with the time of the solvers.
+    Numba compiles each kernel once per process, so only the first
+    call takes time.
+
+    Returns
+    -------
+    float \\
+        -- Time in milliseconds spent compiling, close to 0 without
+        Numba or when they were already compiled.
+    """
+
+    offsets = np.array([[0, 1, 1]] * len(DIRECTIONS), dtype=np.int64)
+    offsets[1:] = 1
+
+    destinations = np.array([1], dtype=np.int64)
+    probabilities = np.array([1.0])
+    costs = np.array([1.0])
+
+    values = np.zeros(2)
+    policies = np.array([0, -1], dtype=np.int64)
+
+    start = time.perf_counter_ns()
+
+    bellman_backup(offsets, destinations, probabilities, costs, values, 1)
+    policy_backup(
+        offsets, destinations, probabilities, costs, values, policies, 1
+    )
+
+    return (time.perf_counter_ns() - start) / 1_000_000
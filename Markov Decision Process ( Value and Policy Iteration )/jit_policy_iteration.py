@@ -0,0 +1,254 @@
+import os
+import numpy as np
+import jit_kernels
+from compiled_mdp import CompiledMDP, DIRECTIONS
+from policy_iteration import PolicyIteration
+
+
+class JitPolicyIteration(PolicyIteration):
+    """
+    Description
+    -----------
+    Class that defines the Policy Iteration algorithm using the kernels
+    of `jit_kernels`, compiled by Numba and run in parallel over the
+    states when it is installed, on NumPy otherwise.
+
+    It starts from the same initial policy as `PolicyIteration`. The
+    improvement is a Bellman backup of every state and the evaluation
+    repeats sweeps of the policies until the costs change by less than
+    `tolerance`.
+
+    It inherits most of its attributes and methods from
+    the `PolicyIteration` class.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object, based on which the algorithm will run.
+
+    tolerance: float \\
+        -- The evaluation stops when no cost changes more than this
+        on a sweep. default = 1e-6.
+
+    max_sweeps: int \\
+        -- Maximum number of sweeps of each evaluation. default = 100000.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    Attributes
+    ----------
+    tolerance: float \\
+        -- Stopping criteria of the evaluation.
+
+    max_sweeps: int \\
+        -- Maximum number of sweeps of each evaluation.
+
+    arrays: tuple \\
+        -- The arrays returned by `jit_kernels.flatten`.
+
+    cost_vector: numpy.ndarray \\
+        -- Current cost of each state, indexed by the state's id.
+
+    policy_vector: numpy.ndarray \\
+        -- Index in `DIRECTIONS` of the policy of each state.
+
+    goal_id: int \\
+        -- Id of the goal state.
+
+    evaluation_sweeps: int \\
+        -- Total number of evaluation sweeps.
+
+    compile_time_elapsed: float \\
+        -- Time in milliseconds spent compiling the StateSpace(),
+        not included in `time_elapsed`.
+
+    jit_compile_time_elapsed: float \\
+        -- Time in milliseconds spent compiling the kernels, not
+        included in `time_elapsed` nor in `compile_time_elapsed`.
+    """
+
+    def __init__(self, test, tolerance=1e-6, max_sweeps=100000,
+                 profiler=None):
+        super().__init__(test, profiler=profiler)
+
+        self.tolerance = tolerance
+        self.max_sweeps = max_sweeps
+
+        self.arrays = None
+
+        self.cost_vector = None
+        self.policy_vector = None
+
+        self.goal_id = None
+
+        self.evaluation_sweeps = 0
+
+        self.compile_time_elapsed = 0
+        self.jit_compile_time_elapsed = 0
+
+    def __repr__(self):
+        return f'JitPolicyIteration({self.file_name})'
+
+    def __str__(self):
+        kernel = 'numba' if jit_kernels.NUMBA_AVAILABLE else 'numpy'
+
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Initial: {self.init}
+Goal: {self.goal}
+Kernel: {kernel}
+
+Total Time: {self.time_elapsed} ms
+    Improvement Time: {self.improvement_time_elapsed} ms
+    Evaluation Time: {self.evaluation_time_elapsed} ms
+    Compile Time: {self.compile_time_elapsed} ms
+    JIT Compile Time: {self.jit_compile_time_elapsed} ms
+Iterations: {self.iterations}
+Evaluation Sweeps: {self.evaluation_sweeps}
+
+Costs: {self.costs}
+Policies: {self.policies}
+
+Grid: {self.grid}
+
+InitialPolicyGrid: {self.initial_policy_grid}
+
+AnswerGrid: {self.answer_grid}'''
+
+    def run(self):
+        """
+        Description
+        -----------
+        Runs the algorithm, storing number of iterations and time elapsed.
+        """
+
+        self.jit_compile_time_elapsed = jit_kernels.compile_kernels()
+
+        self.compile_time_elapsed = self.time_it(self.compile, span='compile')
+
+        self.calculate_initial_cost()
+
+        run = True
+
+        while run:
+            old_policies = self.policy_vector.copy()
+
+            self.improvement_time_elapsed += self.time_it(
+                self.update_costs_and_policies, span='improvement'
+            )
+
+            self.evaluation_time_elapsed += self.time_it(
+                self.evaluate_policies, span='evaluation'
+            )
+
+            self.iterations += 1
+
+            if np.array_equal(old_policies, self.policy_vector):
+                run = False
+
+        self.time_elapsed = (
+            self.improvement_time_elapsed + self.evaluation_time_elapsed
+        )
+
+        self.update_states()
+
+        self.update_answer()
+
+    def compile(self):
+        """
+        Description
+        -----------
+        Compiles the StateSpace() into a CompiledMDP() and flattens it.
+        """
+
+        self.mdp = CompiledMDP(self.states)
+
+        self.goal_id = self.mdp.get_id(self.goal)
+
+        self.arrays = jit_kernels.flatten(self.mdp)
+
+    def calculate_initial_cost(self):
+        """
+        Description
+        -----------
+        Gets the initial cost and policy vectors from the
+        initial policy.
+        """
+
+        super().calculate_initial_cost()
+
+        self.cost_vector = np.array([
+            self.costs.get(name, 0.0) for name in self.mdp.names
+        ], dtype=float)
+
+        self.policy_vector = np.array([
+            DIRECTIONS.index(self.policies[name])
+            if self.policies.get(name) in DIRECTIONS else -1
+            for name in self.mdp.names
+        ], dtype=np.int64)
+
+        self.policy_vector[self.goal_id] = -1
+
+    def update_costs_and_policies(self):
+        """
+        Description
+        -----------
+        Updates the cost and the repective policy for each state
+        with the Bellman backup kernel.
+        """
+
+        self.cost_vector, self.policy_vector = jit_kernels.bellman_backup(
+            *self.arrays, self.cost_vector, self.goal_id
+        )
+
+        self.backups += len(self.mdp) - 1
+
+    def evaluate_policies(self):
+        """
+        Description
+        -----------
+        Repeats sweeps of the policies until no cost changes more
+        than `tolerance`, or `max_sweeps` is reached.
+        """
+
+        for sweep in range(self.max_sweeps):
+            new_costs = jit_kernels.policy_backup(
+                *self.arrays, self.cost_vector, self.policy_vector,
+                self.goal_id
+            )
+
+            residual = float(np.max(np.abs(new_costs - self.cost_vector)))
+
+            self.cost_vector = new_costs
+
+            self.evaluation_sweeps += 1
+
+            if residual < self.tolerance:
+                break
+
+    def update_states(self):
+        """
+        Description
+        -----------
+        Converts the vectors to the `costs` and `policies` dicts and
+        updates each State() the same way the `ValueIteration` does.
+        """
+
+        self.costs, self.policies = self.mdp.to_dicts(
+            self.cost_vector, self.policy_vector, self.goal_id
+        )
+
+        for name in self.states:
+            self.states.get_state(name).clean_policy_predecessors()
+
+        for name in self.states:
+            state = self.states.get_state(name)
+
+            policy = self.policies[name]
+
+            state.update_cost(self.costs[name])
+            state.update_policy(policy)
+
+            if policy in DIRECTIONS:
+                for end, probability in state.actions.get_action(policy).end:
+                    end.add_policy_predecessor(state)
@@ -0,0 +1,127 @@
+import os
+import numpy as np
+import jit_kernels
+from sparse_value_iteration import SparseValueIteration
+
+
+class JitValueIteration(SparseValueIteration):
+    """
+    Description
+    -----------
+    Class that defines the Value Iteration algorithm using the kernels
+    of `jit_kernels`, compiled by Numba and run in parallel over the
+    states when it is installed, on NumPy otherwise.
+
+    It produces the same `costs`, `policies` and `answer_grid`
+    as the `SparseValueIteration` class.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object, based on which the algorithm will run.
+
+    epsilon: float \\
+        -- Used to stop tha algorithm. default = 1.0.
+
+    initial_cost: str \\
+        -- One of `INITIAL_COSTS`, see `ValueIteration`.
+        default = 'manhattan'.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    Attributes
+    ----------
+    arrays: tuple \\
+        -- The arrays returned by `jit_kernels.flatten`.
+
+    jit_compile_time_elapsed: float \\
+        -- Time in milliseconds spent compiling the kernels, not
+        included in `time_elapsed` nor in `compile_time_elapsed`.
+    """
+
+    def __init__(self, test, epsilon=1.0, initial_cost='manhattan',
+                 profiler=None):
+        super().__init__(
+            test, epsilon=epsilon, initial_cost=initial_cost,
+            profiler=profiler
+        )
+
+        self.arrays = None
+
+        self.jit_compile_time_elapsed = 0
+
+    def __repr__(self):
+        return f'JitValueIteration({self.file_name})'
+
+    def __str__(self):
+        kernel = 'numba' if jit_kernels.NUMBA_AVAILABLE else 'numpy'
+
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Initial: {self.init}
+Goal: {self.goal}
+Epsilon: {self.epsilon}
+Kernel: {kernel}
+
+Time: {self.time_elapsed} ms
+    Compile Time: {self.compile_time_elapsed} ms
+    JIT Compile Time: {self.jit_compile_time_elapsed} ms
+Iterations: {self.iterations}
+
+Costs: {self.costs}
+Policies: {self.policies}
+
+Grid: {self.grid}
+
+AnswerGrid: {self.answer_grid}'''
+
+    def run(self):
+        """
+        Description
+        -----------
+        Compiles the kernels, then runs the algorithm like
+        `SparseValueIteration.run`.
+        """
+
+        self.jit_compile_time_elapsed = jit_kernels.compile_kernels()
+
+        super().run()
+
+    def compile(self):
+        """
+        Description
+        -----------
+        Compiles the StateSpace() into a CompiledMDP() and flattens it.
+        """
+
+        super().compile()
+
+        self.arrays = jit_kernels.flatten(self.mdp)
+
+    def update_costs_and_policies(self):
+        """
+        Description
+        -----------
+        Updates the cost and the repective policy for each state
+        with the Bellman backup kernel.
+
+        Then computes the difference between each new cost and the old cost.
+        """
+
+        start = self.profiler.start()
+
+        new_costs, self.policy_vector = jit_kernels.bellman_backup(
+            *self.arrays, self.cost_vector, self.goal_id
+        )
+
+        self.profiler.stop('backup', start)
+
+        start = self.profiler.start()
+
+        self.max_residual = float(np.max(np.abs(new_costs - self.cost_vector)))
+
+        self.profiler.stop('residual', start)
+
+        self.cost_vector = new_costs
+
+        self.backups += len(self.mdp) - 1
@@ -0,0 +1,379 @@
+import os
+import random
+from value_iteration import ValueIteration
+
+
+class LabeledRTDP(ValueIteration):
+    """
+    Description
+    -----------
+    Class that defines the Labeled Real-Time Dynamic Programming
+    algorithm (LRTDP).
+
+    Instead of sweeping the whole StateSpace(), it runs trials from the
+    initial state, following the greedy policy and sampling the end
+    state of each action, updating only the states it goes through.
+    After each trial the states are checked, from the last one back
+    to the first: a state is labeled as solved when its residual and
+    the residuals of every state reachable from it by the greedy
+    policy are smaller than `epsilon`. It stops when the initial state
+    is solved.
+
+    The cost of a state starts as the manhattan distance to the goal,
+    like in `ValueIteration.calculate_initial_cost`, but it is only
+    computed when the state is first reached.
+
+    It inherits most of its attributes and methods from
+    the `ValueIteration` class.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object, based on which the algorithm will run.
+
+    epsilon: float \\
+        -- Used to stop tha algorithm. default = 1.0.
+
+    seed: int \\
+        -- Seed used to sample the end states, the same seed always
+        runs the same trials. default = 0.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    Attributes
+    ----------
+    iterations: int \\
+        -- The number of trials.
+
+    costs: dict \\
+        -- A dict containing (name of the state, cost of the state)
+        tuples, only for the states that were reached.
+
+    policies: dict \\
+        -- A dict containing (
+            name of the state, direction to follow while on the state
+        ) tuples, only for the states reachable from the initial state
+        following the policy.
+
+    solved: set \\
+        -- Names of the states labeled as solved.
+
+    expanded: set \\
+        -- Names of the states whose cost was updated at least once.
+
+    generator: random.Random \\
+        -- Used to sample the end states.
+    """
+
+    def __init__(self, test, epsilon=1.0, seed=0, profiler=None):
+        super().__init__(test, epsilon=epsilon, profiler=profiler)
+
+        self.solved = set()
+        self.expanded = set()
+
+        self.generator = random.Random(seed)
+
+    def __repr__(self):
+        return f'LabeledRTDP({self.file_name})'
+
+    def __str__(self):
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Initial: {self.init}
+Goal: {self.goal}
+Epsilon: {self.epsilon}
+
+Time: {self.time_elapsed} ms
+Iterations: {self.iterations}
+Backups: {self.backups}
+Expanded States: {len(self.expanded)} of {len(list(self.states))}
+
+Costs: {self.costs}
+Policies: {self.policies}
+
+Grid: {self.grid}
+
+AnswerGrid: {self.answer_grid}'''
+
+    def run(self):
+        """
+        Description
+        -----------
+        Runs trials until the initial state is solved, storing number
+        of trials and time elapsed.
+        """
+
+        self.time_elapsed += self.time_it(self.run_trials, span='backup')
+
+        self.time_elapsed += self.time_it(self.update_policies, span='argmin')
+
+        self.update_answer()
+
+    def run_trials(self):
+        """
+        Description
+        -----------
+        Runs trials from the initial state until it is solved.
+        """
+
+        while self.init.name not in self.solved:
+            self.trial()
+
+            self.iterations += 1
+
+    def get_cost(self, state):
+        """
+        Description
+        -----------
+        Returns the current cost of a state, starting it with the
+        manhattan distance to the goal when it is first reached.
+
+        Parameters
+        ----------
+        state: State() \\
+            -- The state.
+
+        Returns
+        -------
+        float \\
+            -- The cost of the state.
+        """
+
+        cost = self.costs.get(state.name)
+
+        if cost is None:
+            if state == self.goal:
+                cost = 0
+            else:
+                cost = float(
+                    abs(state.x - self.goal.x) + abs(state.y - self.goal.y)
+                )
+
+            self.costs[state.name] = cost
+
+        return cost
+
+    def get_greedy_action(self, state):
+        """
+        Description
+        -----------
+        Computes the least costly action of a state, breaking ties
+        just like `ValueIteration.get_min_cost`, without changing
+        anything.
+
+        Parameters
+        ----------
+        state: State() \\
+            -- The state.
+
+        Returns
+        -------
+        min_cost: float \\
+            -- The cost of the action, 0 if the state has no actions.
+
+        action: Action() \\
+            -- The action, None if the state has no actions.
+        """
+
+        min_cost = 0
+        action_used = None
+
+        for action in state.actions:
+            cost = 0
+
+            for end, probability in action.end:
+                cost += probability * (action.cost + self.get_cost(end))
+
+            if min_cost == 0 or min_cost >= cost:
+                min_cost = cost
+                action_used = action
+
+        return min_cost, action_used
+
+    def update(self, state):
+        """
+        Description
+        -----------
+        Updates the cost of a state with its least costly action.
+
+        Parameters
+        ----------
+        state: State() \\
+            -- The state.
+
+        Returns
+        -------
+        Action() \\
+            -- The greedy action, None if the state has no actions.
+        """
+
+        cost, action = self.get_greedy_action(state)
+
+        self.costs[state.name] = cost
+
+        self.expanded.add(state.name)
+
+        self.backups += 1
+
+        return action
+
+    def sample(self, action):
+        """
+        Description
+        -----------
+        Samples the end state of an action.
+
+        Parameters
+        ----------
+        action: Action() \\
+            -- The action taken.
+
+        Returns
+        -------
+        State() \\
+            -- The end state.
+        """
+
+        threshold = self.generator.random()
+
+        for end, probability in action.end:
+            threshold -= probability
+
+            if threshold < 0:
+                return end
+
+        return action.end[-1][0]
+
+    def trial(self):
+        """
+        Description
+        -----------
+        Follows the greedy policy from the initial state until reaching
+        a solved state, updating each state on the way, then checks the
+        visited states from the last to the first.
+        """
+
+        visited = []
+
+        state = self.init
+
+        while state.name not in self.solved:
+            visited.append(state)
+
+            if state == self.goal:
+                break
+
+            action = self.update(state)
+
+            if action is None:
+                break
+
+            state = self.sample(action)
+
+        while visited:
+            if not self.check_solved(visited.pop()):
+                break
+
+    def check_solved(self, state):
+        """
+        Description
+        -----------
+        Checks if a state can be labeled as solved, which happens when
+        every state reachable from it following the greedy policy,
+        itself included, has a residual smaller than `epsilon`.
+
+        If so, all of them are labeled, otherwise they are all updated.
+
+        Parameters
+        ----------
+        state: State() \\
+            -- The state to check.
+
+        Returns
+        -------
+        bool \\
+            -- True if the state was labeled as solved.
+        """
+
+        solved = True
+
+        if state.name in self.solved:
+            return True
+
+        open_states = [state]
+        closed_states = []
+
+        seen = {state.name}
+
+        while open_states:
+            state = open_states.pop()
+
+            closed_states.append(state)
+
+            if state == self.goal:
+                continue
+
+            cost, action = self.get_greedy_action(state)
+
+            if abs(cost - self.get_cost(state)) >= self.epsilon:
+                solved = False
+
+                continue
+
+            if action is None:
+                continue
+
+            for end, probability in action.end:
+                if end.name not in self.solved and end.name not in seen:
+                    seen.add(end.name)
+
+                    open_states.append(end)
+
+        if solved:
+            for state in closed_states:
+                self.solved.add(state.name)
+        else:
+            while closed_states:
+                self.update(closed_states.pop())
+
+        return solved
+
+    def update_policies(self):
+        """
+        Description
+        -----------
+        Computes the policy of each state reachable from the initial
+        state following the policies, which is the part of the
+        StateSpace() the algorithm solved, and updates those states.
+        """
+
+        for name in self.costs:
+            self.states.get_state(name).clean_policy_predecessors()
+
+        stack = [self.init]
+
+        self.policies = {self.init.name: '-'}
+
+        while stack:
+            state = stack.pop()
+
+            policy = '-'
+
+            if state != self.goal:
+                cost, action = self.get_greedy_action(state)
+
+                if action is not None:
+                    policy = action.direction
+
+                    for end, probability in action.end:
+                        end.add_policy_predecessor(state)
+
+                        if end.name not in self.policies:
+                            self.policies[end.name] = '-'
+
+                            stack.append(end)
+
+            self.policies[state.name] = policy
+
+            state.update_cost(self.get_cost(state))
+            state.update_policy(policy)
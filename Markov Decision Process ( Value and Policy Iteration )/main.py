@@ -1,13 +1,31 @@
 import os
 import sys
 import json
+import argparse
+import numpy as np
 import pandas as pd
 from tests import LoadTests
-from value_iteration import ValueIteration
+from value_iteration import ValueIteration, INITIAL_COSTS
+from sparse_value_iteration import SparseValueIteration
+from stencil_value_iteration import StencilValueIteration
+from jit_value_iteration import JitValueIteration
 from policy_iteration import PolicyIteration
+from jit_policy_iteration import JitPolicyIteration
+from profiler import (
+    Profiler, export_csv, export_samples_csv, export_json
+)
+
+
+METRICS_COLUMNS = [
+    'test_name', 'vi_time', 'vi_iter', 'vi_compile_time',
+    'pi_time', 'pi_iter', 'pi_compile_time'
+]
 
 
-def execute_value_iteration_test(test, epsilon, output='console'):
+def execute_value_iteration_test(test, epsilon, output='console',
+                                 backend='python', profiler=None,
+                                 policy_array=False,
+                                 initial_cost='manhattan'):
     """
     Description
     -----------
@@ -28,6 +46,23 @@ def execute_value_iteration_test(test, epsilon, output='console'):
         -- A string that tells the function where
         its output is expected.
 
+    backend: str \\
+        -- 'python' uses the State() objects, 'sparse' compiles
+        them into arrays first, 'stencil' lays the arrays out on
+        the grid, falling back to 'sparse' when the test is not a grid,
+        and 'numba' runs the kernels of `jit_kernels`, on NumPy when
+        Numba is not installed. All of them give the same answer.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    policy_array: bool \\
+        -- See `output_processing`. default = False.
+
+    initial_cost: str \\
+        -- One of `INITIAL_COSTS`, used by every backend.
+        default = 'manhattan'.
+
     Returns
     -------
     ValueIteration() \\
@@ -35,17 +70,41 @@ def execute_value_iteration_test(test, epsilon, output='console'):
         returns the instance of the value_iteration used.
     """
 
-    value_iteration = ValueIteration(test, epsilon=epsilon)
+    if backend == 'sparse':
+        value_iteration = SparseValueIteration(
+            test, epsilon=epsilon, initial_cost=initial_cost,
+            profiler=profiler
+        )
+    elif backend == 'stencil':
+        value_iteration = StencilValueIteration(
+            test, epsilon=epsilon, initial_cost=initial_cost,
+            profiler=profiler
+        )
+    elif backend == 'numba':
+        value_iteration = JitValueIteration(
+            test, epsilon=epsilon, initial_cost=initial_cost,
+            profiler=profiler
+        )
+    else:
+        value_iteration = ValueIteration(
+            test, epsilon=epsilon, initial_cost=initial_cost,
+            profiler=profiler
+        )
 
     value_iteration.run()
 
     if output in ['console', 'file']:
-        output_processing(output, test, value_iteration, 'ValueIteration')
+        output_processing(
+            output, test, value_iteration, 'ValueIteration',
+            policy_array=policy_array
+        )
 
     return value_iteration
 
 
-def execute_policy_iteration_test(test, output='console'):
+def execute_policy_iteration_test(test, output='console', evaluator='sweep',
+                                  backend='python', profiler=None,
+                                  policy_array=False):
     """
     Description
     -----------
@@ -62,6 +121,20 @@ def execute_policy_iteration_test(test, output='console'):
         -- A string that tells the function where
         its output is expected.
 
+    evaluator: str \\
+        -- How the policies are evaluated, see `PolicyIteration`.
+
+    backend: str \\
+        -- 'numba' runs the kernels of `jit_kernels`, on NumPy when
+        Numba is not installed, ignoring `evaluator`. Any other value
+        uses the `PolicyIteration`. default = 'python'.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    policy_array: bool \\
+        -- See `output_processing`. default = False.
+
     Returns
     -------
     PolicyIteration() \\
@@ -69,17 +142,26 @@ def execute_policy_iteration_test(test, output='console'):
         returns the instance of the policy_iteration used.
     """
 
-    policy_iteration = PolicyIteration(test)
+    if backend == 'numba':
+        policy_iteration = JitPolicyIteration(test, profiler=profiler)
+    else:
+        policy_iteration = PolicyIteration(
+            test, evaluator=evaluator, profiler=profiler
+        )
 
     policy_iteration.run()
 
     if output in ['console', 'file']:
-        output_processing(output, test, policy_iteration, 'PolicyIteration')
+        output_processing(
+            output, test, policy_iteration, 'PolicyIteration',
+            policy_array=policy_array
+        )
 
     return policy_iteration
 
 
-def output_processing(output, test, algorithm, algorithm_name):
+def output_processing(output, test, algorithm, algorithm_name,
+                      policy_array=False):
     """
     Description
     -----------
@@ -102,6 +184,11 @@ def output_processing(output, test, algorithm, algorithm_name):
 
     algorithm_name: str \\
         -- The name of the algorithm, used as folder name.
+
+    policy_array: bool \\
+        -- If True and `output` is 'file', the policies are also saved
+        as a .npy file next to the .txt, see `ArrowGrid.to_policy_array`.
+        default = False.
     """
 
     if output == 'file':
@@ -111,69 +198,214 @@ def output_processing(output, test, algorithm, algorithm_name):
 
         file_name = test.file_name + '.txt'
 
-        output_file = open(
-            f'{os.path.join(folder, file_name)}', 'a+', encoding='utf-8'
-        )
-
-        # Truncating files, so that it doesn't append on existing content
-        output_file.truncate(0)
+        # The whole text is built first and written at once
+        with open(
+            os.path.join(folder, file_name), 'w', encoding='utf-8'
+        ) as output_file:
+            output_file.write(str(algorithm))
 
-        output_file.write(str(algorithm))
-
-        output_file.close()
+        if policy_array:
+            np.save(
+                os.path.join(folder, test.file_name + '.npy'),
+                algorithm.answer_grid.to_policy_array()
+            )
 
     elif output == 'console':
         print(algorithm)
 
 
-tests = LoadTests()
+def run_suite(tests, epsilon, output='file', backend='python',
+              initial_cost='manhattan', policy_array=False, profile=False,
+              sample_every=0):
+    """
+    Description
+    -----------
+    Function used to run the value_iteration and the policy_iteration
+    for every test of a TestSet(), one test at a time.
+
+    Parameters
+    ----------
+    tests: TestSet() \\
+        -- The tests to run.
 
-fixed_goal = tests.fixed_goal_tests
-random_goal = tests.random_goal_tests
+    epsilon: float \\
+        -- Stopping criteria of the value_iteration.
 
-del tests
+    output: str \\
+        -- See `output_processing`. default = 'file'.
 
-epsilon = 0.1
+    backend: str \\
+        -- See `execute_value_iteration_test` and
+        `execute_policy_iteration_test`. default = 'python'.
 
-# file or console
-output = 'file'
+    initial_cost: str \\
+        -- See `execute_value_iteration_test`. default = 'manhattan'.
 
-metrics_df = pd.DataFrame(columns=[
-    'test_name', 'vi_time', 'vi_iter', 'pi_time', 'pi_iter'
-])
+    policy_array: bool \\
+        -- See `output_processing`. default = False.
 
-for test in fixed_goal:
-    value_iteration = execute_value_iteration_test(test, epsilon, output=output)
-    policy_iteration = execute_policy_iteration_test(test, output=output)
+    profile: bool \\
+        -- If True, the time of each step is recorded. default = False.
 
-    metrics_dict = {
-        'test_name': str(os.path.join(test.folder_name, test.file_name)),
-        'vi_time': value_iteration.time_elapsed,
-        'vi_iter': value_iteration.iterations,
-        'pi_time': policy_iteration.time_elapsed,
-        'pi_iter': policy_iteration.iterations
-    }
+    sample_every: int \\
+        -- See `Profiler`. default = 0.
 
-    metrics_df = metrics_df.append(metrics_dict, ignore_index=True)
+    Returns
+    -------
+    metrics_rows: list \\
+        -- A dict with the `METRICS_COLUMNS` for each test.
 
-for test in random_goal:
-    value_iteration = execute_value_iteration_test(test, epsilon, output=output)
-    policy_iteration = execute_policy_iteration_test(test, output=output)
+    profilers: list \\
+        -- The Profiler() of the loading, the value_iteration and the
+        policy_iteration of each test.
+    """
 
-    metrics_dict = {
-        'test_name': str(os.path.join(test.folder_name, test.file_name)),
-        'vi_time': value_iteration.time_elapsed,
-        'vi_iter': value_iteration.iterations,
-        'pi_time': policy_iteration.time_elapsed,
-        'pi_iter': policy_iteration.iterations
-    }
+    metrics_rows = []
 
-    metrics_df = metrics_df.append(metrics_dict, ignore_index=True)
+    profilers = []
 
-metrics_df.to_csv(
-    os.path.join(
-        os.path.join(os.path.dirname(__file__), 'outputs'),
-        'metrics.csv'
-    ),
-    index=False
-)
+    for test in tests:
+        vi_profiler = Profiler(
+            label=f'{test.profiler.label}/vi', enabled=profile,
+            sample_every=sample_every
+        )
+        pi_profiler = Profiler(
+            label=f'{test.profiler.label}/pi', enabled=profile
+        )
+
+        value_iteration = execute_value_iteration_test(
+            test, epsilon, output=output, backend=backend,
+            profiler=vi_profiler, policy_array=policy_array,
+            initial_cost=initial_cost
+        )
+        policy_iteration = execute_policy_iteration_test(
+            test, output=output, backend=backend,
+            profiler=pi_profiler, policy_array=policy_array
+        )
+
+        profilers += [test.profiler, vi_profiler, pi_profiler]
+
+        metrics_rows.append({
+            'test_name': str(os.path.join(test.folder_name, test.file_name)),
+            'vi_time': value_iteration.time_elapsed,
+            'vi_iter': value_iteration.iterations,
+            'vi_compile_time': getattr(
+                value_iteration, 'jit_compile_time_elapsed', 0
+            ),
+            'pi_time': policy_iteration.time_elapsed,
+            'pi_iter': policy_iteration.iterations,
+            'pi_compile_time': getattr(
+                policy_iteration, 'jit_compile_time_elapsed', 0
+            )
+        })
+
+        # So that the states of this test can be freed
+        # before the next one is read
+        del test, value_iteration, policy_iteration
+
+    return metrics_rows, profilers
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Runs Value and Policy Iteration on every test'
+    )
+
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='parse the .net files from text instead of using the cache'
+    )
+    parser.add_argument(
+        '--rebuild-cache', action='store_true',
+        help='parse every .net file again and rewrite the cache'
+    )
+    parser.add_argument(
+        '--states', default='objects', choices=['objects', 'arrays'],
+        help='store the states as State() objects or as flat arrays'
+    )
+    parser.add_argument(
+        '--profile', action='store_true',
+        help='write the time of each step to outputs/profile.csv and .json'
+    )
+    parser.add_argument(
+        '--sample-every', type=int, default=0,
+        help='with --profile, sample the residual every N iterations'
+    )
+
+    parser.add_argument(
+        '--backend', default='python',
+        choices=['python', 'sparse', 'stencil', 'numba'],
+        help='how the backups are computed, numba also applies to the '
+             'Policy Iteration'
+    )
+    parser.add_argument(
+        '--initial-cost', default='manhattan', choices=INITIAL_COSTS,
+        help='costs the Value Iteration starts from'
+    )
+    parser.add_argument(
+        '--policy-npy', action='store_true',
+        help='also save the policies of each test as a .npy array'
+    )
+    parser.add_argument(
+        '--tests', nargs='+', default=None,
+        help='only run the tests whose file name matches these patterns'
+    )
+    parser.add_argument(
+        '--max-states', type=int, default=None,
+        help='only run the tests with at most this number of states'
+    )
+
+    args = parser.parse_args()
+
+    tests = LoadTests(
+        parser='array' if args.states == 'arrays' else 'bulk',
+        cache=not args.no_cache, rebuild_cache=args.rebuild_cache,
+        profile=args.profile, names=args.tests, max_states=args.max_states
+    )
+
+    fixed_goal = tests.fixed_goal_tests
+    random_goal = tests.random_goal_tests
+
+    del tests
+
+    epsilon = 0.1
+
+    # file or console
+    output = 'file'
+
+    # DataFrame.append was removed from pandas, the rows are
+    # collected first and the DataFrame is built once
+    metrics_rows = []
+
+    profilers = []
+
+    for testset in [fixed_goal, random_goal]:
+        rows, testset_profilers = run_suite(
+            testset, epsilon, output=output, backend=args.backend,
+            initial_cost=args.initial_cost, policy_array=args.policy_npy,
+            profile=args.profile, sample_every=args.sample_every
+        )
+
+        metrics_rows += rows
+        profilers += testset_profilers
+
+    metrics_df = pd.DataFrame(metrics_rows, columns=METRICS_COLUMNS)
+
+    metrics_df.to_csv(
+        os.path.join(
+            os.path.join(os.path.dirname(__file__), 'outputs'),
+            'metrics.csv'
+        ),
+        index=False
+    )
+
+    if args.profile:
+        outputs_folder = os.path.join(os.path.dirname(__file__), 'outputs')
+
+        export_csv(profilers, os.path.join(outputs_folder, 'profile.csv'))
+        export_json(profilers, os.path.join(outputs_folder, 'profile.json'))
+
+        if args.sample_every > 0:
+            export_samples_csv(
+                profilers, os.path.join(outputs_folder, 'residuals.csv')
+            )
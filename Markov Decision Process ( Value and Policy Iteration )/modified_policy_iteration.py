@@ -0,0 +1,186 @@
+import os
+from value_iteration import ValueIteration
+
+
+class ModifiedPolicyIteration(ValueIteration):
+    """
+    Description
+    -----------
+    Class that defines the Modified Policy Iteration algorithm.
+
+    Each iteration has an improvement step, the same full sweep of
+    `ValueIteration`, which selects the policies, and an evaluation
+    step, which runs `sweeps` sweeps of the selected policies only,
+    updating each state with the cost of its policy instead of the
+    cost of every action. The evaluation sweeps update the costs in
+    place, so each state sees the costs updated before it.
+
+    With 0 sweeps it is the same as `ValueIteration`, and as the
+    number of sweeps grows the evaluation gets closer to the exact
+    evaluation of `PolicyIteration`.
+
+    It stops when the residual of the improvement step is smaller
+    than `epsilon`, just like `ValueIteration`.
+
+    It inherits most of its attributes and methods from
+    the `ValueIteration` class.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object, based on which the algorithm will run.
+
+    epsilon: float \\
+        -- Used to stop tha algorithm. default = 1.0.
+
+    sweeps: int \\
+        -- Number of evaluation sweeps on each iteration. default = 5.
+
+    adaptive: bool \\
+        -- If True, the evaluation also stops when the residual of a
+        sweep is smaller than `epsilon`, so `sweeps` is only the
+        maximum number of sweeps. default = False.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    Attributes
+    ----------
+    sweeps: int \\
+        -- Number of evaluation sweeps on each iteration.
+
+    adaptive: bool \\
+        -- If the evaluation stops on small residuals.
+
+    evaluation_sweeps: int \\
+        -- Total number of evaluation sweeps.
+
+    improvement_time_elapsed: float \\
+        -- Time in milliseconds spent on the improvement step.
+
+    evaluation_time_elapsed: float \\
+        -- Time in milliseconds spent on the evaluation step.
+    """
+
+    def __init__(self, test, epsilon=1.0, sweeps=5, adaptive=False,
+                 profiler=None):
+        super().__init__(test, epsilon=epsilon, profiler=profiler)
+
+        if sweeps < 0:
+            raise ValueError('sweeps must not be negative')
+
+        self.sweeps = sweeps
+        self.adaptive = adaptive
+
+        self.evaluation_sweeps = 0
+
+        self.improvement_time_elapsed = 0
+        self.evaluation_time_elapsed = 0
+
+    def __repr__(self):
+        return f'ModifiedPolicyIteration({self.file_name}, {self.sweeps})'
+
+    def __str__(self):
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Initial: {self.init}
+Goal: {self.goal}
+Epsilon: {self.epsilon}
+Sweeps: {self.sweeps}
+Adaptive: {self.adaptive}
+
+Total Time: {self.time_elapsed} ms
+    Improvement Time: {self.improvement_time_elapsed} ms
+    Evaluation Time: {self.evaluation_time_elapsed} ms
+Iterations: {self.iterations}
+Evaluation Sweeps: {self.evaluation_sweeps}
+Backups: {self.backups}
+
+Costs: {self.costs}
+Policies: {self.policies}
+
+Grid: {self.grid}
+
+AnswerGrid: {self.answer_grid}'''
+
+    def run(self):
+        """
+        Description
+        -----------
+        Runs the algorithm, storing number of iterations and time elapsed.
+        """
+
+        self.calculate_initial_cost()
+
+        while True:
+            self.improvement_time_elapsed += self.time_it(
+                self.update_costs_and_policies, span='improvement'
+            )
+
+            self.iterations += 1
+
+            self.profiler.sample(
+                'residual', self.iterations, self.max_residual
+            )
+
+            if self.max_residual < self.epsilon:
+                break
+
+            self.evaluation_time_elapsed += self.time_it(
+                self.evaluate_policies, span='evaluation'
+            )
+
+        self.time_elapsed = (
+            self.improvement_time_elapsed + self.evaluation_time_elapsed
+        )
+
+        self.update_answer()
+
+    def evaluate_policies(self):
+        """
+        Description
+        -----------
+        Runs the evaluation sweeps of the current policies.
+        """
+
+        for sweep in range(self.sweeps):
+            max_residual = self.evaluate_sweep()
+
+            self.evaluation_sweeps += 1
+
+            if self.adaptive and max_residual < self.epsilon:
+                break
+
+    def evaluate_sweep(self):
+        """
+        Description
+        -----------
+        Updates the cost of each state with the cost of its policy.
+
+        Returns
+        -------
+        float \\
+            -- The largest change of cost on the sweep.
+        """
+
+        max_residual = 0
+
+        for name in self.get_sweep_order():
+            policy = self.policies.get(name, '-')
+
+            if policy == '-' or name == self.goal.name:
+                continue
+
+            action = self.states.get_state(name).actions.get_action(policy)
+
+            cost = self.compute_cost(action, self.costs)
+
+            self.backups += 1
+
+            residual = abs(cost - self.costs[name])
+
+            if residual > max_residual:
+                max_residual = residual
+
+            self.costs.update({name: cost})
+
+        return max_residual
@@ -0,0 +1,517 @@
+import os
+import numpy as np
+import warnings
+from scipy import sparse
+from scipy.sparse import linalg
+from compiled_mdp import DIRECTIONS
+from sparse_value_iteration import SparseValueIteration
+
+
+class CoarseLevel():
+    """
+    Description
+    -----------
+    Class that aggregates the cells of a CompiledMDP() into square
+    blocks of `size` by `size` cells, giving an abstract MDP where each
+    block is a state.
+
+    Taking an action on a block is the average of taking it on each
+    state of the block where it is available:
+
+    P(a)[B, C] = mean( all( probability of going from a state of B
+    to a state of C ) )
+
+    cost(a)[B] = mean( all( expected cost of a on a state of B ) )
+
+    Then staying on the block is removed, scaling the rest by the
+    expected number of steps taken to leave it. So crossing a block of
+    `size` cells costs about `size` steps, and the costs of the blocks
+    are close to the costs of their states. The block with the goal is
+    the goal of the abstract MDP.
+
+    Parameters
+    ----------
+    mdp: CompiledMDP() \\
+        -- The compiled StateSpace().
+
+    size: int \\
+        -- Number of cells on each side of a block.
+
+    goal: int \\
+        -- Id of the goal state.
+
+    Attributes
+    ----------
+    size: int \\
+        -- Number of cells on each side of a block.
+
+    blocks: numpy.ndarray \\
+        -- Id of the block of each state.
+
+    representatives: numpy.ndarray \\
+        -- Id of a state of each block.
+
+    goal: int \\
+        -- Id of the block with the goal.
+
+    transitions: list \\
+        -- For each action, the (blocks, blocks) transition matrix.
+
+    costs: list \\
+        -- For each action, the cost of each block, `inf` where the
+        action is not available on any of its states or never
+        leaves the block.
+
+    sizes: numpy.ndarray \\
+        -- Number of states of each block.
+    """
+
+    def __init__(self, mdp, size, goal):
+        self.size = size
+
+        cells = (mdp.y // size) * (int(mdp.x.max()) // size + 1) + (
+            mdp.x // size
+        )
+
+        _, self.representatives, self.blocks = np.unique(
+            cells, return_index=True, return_inverse=True
+        )
+
+        self.goal = int(self.blocks[goal])
+
+        self.sizes = np.bincount(self.blocks).astype(float)
+
+        self.transitions = []
+        self.costs = []
+
+        self.aggregate(mdp)
+
+    def __repr__(self):
+        return f'CoarseLevel({self.size}, {len(self)})'
+
+    def __len__(self):
+        return self.representatives.size
+
+    def aggregate(self, mdp):
+        """
+        Description
+        -----------
+        Fills `transitions` and `costs` by averaging the actions of the
+        states of each block.
+
+        Parameters
+        ----------
+        mdp: CompiledMDP() \\
+            -- The compiled StateSpace().
+        """
+
+        m = len(self)
+
+        for a in range(len(DIRECTIONS)):
+            counts = np.bincount(
+                self.blocks[mdp.rows[a]], minlength=m
+            ).astype(float)
+
+            with np.errstate(divide='ignore'):
+                scale = np.where(counts > 0, 1.0 / counts, 0.0)
+
+            sources = self.blocks[
+                np.repeat(mdp.rows[a], np.diff(mdp.indptr[a]))
+            ]
+            ends = self.blocks[mdp.indices[a]]
+
+            weights = scale[sources] * mdp.probabilities[a]
+
+            costs = np.bincount(
+                sources, weights=weights * mdp.costs[a], minlength=m
+            )
+
+            # Staying on the block is folded into the cost of leaving it,
+            # so one sweep moves the costs a whole block
+            stays = sources == ends
+
+            stay = np.bincount(
+                sources[stays], weights=weights[stays], minlength=m
+            )
+
+            leaves = (counts > 0) & (stay < 1.0 - 1e-9)
+
+            with np.errstate(divide='ignore'):
+                leave_scale = np.where(leaves, 1.0 / (1.0 - stay), 0.0)
+
+            transitions = sparse.csr_matrix(
+                (
+                    weights[~stays] * leave_scale[sources[~stays]],
+                    (sources[~stays], ends[~stays])
+                ),
+                shape=(m, m)
+            )
+
+            costs = leave_scale * costs
+            costs[~leaves] = np.inf
+
+            self.transitions.append(transitions)
+            self.costs.append(costs)
+
+    def bellman_backup(self, costs):
+        """
+        Description
+        -----------
+        Computes the new cost of every block.
+
+        Parameters
+        ----------
+        costs: numpy.ndarray \\
+            -- Current cost of each block.
+
+        Returns
+        -------
+        numpy.ndarray \\
+            -- The new cost of each block.
+        """
+
+        q = np.stack([
+            self.costs[a] + self.transitions[a] @ costs
+            for a in range(len(DIRECTIONS))
+        ])
+
+        new_costs = np.min(q, axis=0)
+
+        new_costs[np.isinf(new_costs)] = 0.0
+        new_costs[self.goal] = 0.0
+
+        return new_costs
+
+    def correct(self, mdp, policies, changes):
+        """
+        Description
+        -----------
+        Estimates the error of the costs of the states, the same for
+        every state of a block, by solving the error equation of the
+        policies on the blocks:
+
+        (I - mean(P)) * error = mean(residuals)
+
+        Where P are the transitions of the policies and the residuals
+        are how much a sweep following them would change the costs,
+        the `changes` of the last sweep one step further.
+
+        Errors that change slowly across the grid, like a whole region
+        being off by the same amount, barely change the residuals of a
+        sweep, but are removed at once by this correction.
+
+        Parameters
+        ----------
+        mdp: CompiledMDP() \\
+            -- The compiled StateSpace().
+
+        policies: numpy.ndarray \\
+            -- Index in `DIRECTIONS` of the policy of each state.
+
+        changes: numpy.ndarray \\
+            -- How much the last sweep changed the cost of each state.
+
+        Returns
+        -------
+        numpy.ndarray \\
+            -- The error of each state, 0 when the system can't be
+            solved, as when some policies never reach the goal.
+        """
+
+        n = len(mdp)
+        m = len(self)
+
+        states = []
+        ends = []
+        probabilities = []
+
+        for a in range(len(DIRECTIONS)):
+            sources = np.repeat(mdp.rows[a], np.diff(mdp.indptr[a]))
+
+            selected = policies[sources] == a
+
+            states.append(sources[selected])
+            ends.append(mdp.indices[a][selected])
+            probabilities.append(mdp.probabilities[a][selected])
+
+        states = np.concatenate(states)
+        ends = np.concatenate(ends)
+        probabilities = np.concatenate(probabilities)
+
+        residuals = np.bincount(
+            states, weights=probabilities * changes[ends], minlength=n
+        )
+
+        block_residuals = np.bincount(
+            self.blocks, weights=residuals, minlength=m
+        ) / self.sizes
+
+        # The goal's block has no error
+        block_residuals[self.goal] = 0.0
+
+        sources = self.blocks[states]
+        keep = sources != self.goal
+
+        transitions = sparse.csc_matrix(
+            (
+                probabilities[keep] / self.sizes[sources[keep]],
+                (sources[keep], self.blocks[ends[keep]])
+            ),
+            shape=(m, m)
+        )
+
+        system = sparse.identity(m, format='csc') - transitions
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+
+            errors = linalg.spsolve(system, block_residuals)
+
+        if not np.all(np.isfinite(errors)):
+            return np.zeros(n)
+
+        return errors[self.blocks]
+
+
+class MultigridValueIteration(SparseValueIteration):
+    """
+    Description
+    -----------
+    Class that defines a coarse to fine Value Iteration.
+
+    The grid is aggregated into CoarseLevel()s of blocks of `factor`,
+    `factor` ** 2, up to `factor` ** `levels` cells on each side. The
+    coarsest level is solved first, starting from 0, then its costs are
+    prolonged, each block giving its cost to the blocks or states inside
+    it, as the initial costs of the next level, down to the full grid.
+
+    The cost of the goal spreads over many cells on each sweep of a
+    coarse level, so the full grid starts close to its solution and
+    needs far fewer sweeps than starting from the manhattan distance.
+    Every `cycle` sweeps of the full grid, the finest coarse level
+    also corrects the errors left by the prolongation, see
+    `CoarseLevel.correct`.
+
+    It inherits most of its attributes and methods from
+    the `SparseValueIteration` class.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object, based on which the algorithm will run.
+
+    epsilon: float \\
+        -- Used to stop tha algorithm, on every level. default = 1.0.
+
+    factor: int \\
+        -- Number of blocks or cells on each side of a block of
+        the next coarser level. default = 2.
+
+    levels: int \\
+        -- Number of coarse levels, 0 is the same as the
+        `SparseValueIteration`. default = 3.
+
+    max_iterations: int \\
+        -- Maximum number of sweeps of each coarse level.
+        default = 10000.
+
+    cycle: int \\
+        -- Number of sweeps of the full grid between corrections by
+        the finest coarse level, 0 for none. default = 10.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    Attributes
+    ----------
+    iterations: int \\
+        -- Number of sweeps of the full grid.
+
+    coarse_levels: list \\
+        -- The CoarseLevel()s, coarsest first.
+
+    level_iterations: list \\
+        -- Number of sweeps of each coarse level, coarsest first.
+
+    level_time_elapsed: list \\
+        -- Time in milliseconds spent solving each coarse level,
+        coarsest first.
+
+    coarse_time_elapsed: float \\
+        -- Time in milliseconds spent aggregating and solving the
+        coarse levels, included in `time_elapsed`.
+
+    corrections: int \\
+        -- Number of corrections of the full grid.
+    """
+
+    def __init__(self, test, epsilon=1.0, factor=2, levels=3,
+                 max_iterations=10000, cycle=10, profiler=None):
+        super().__init__(test, epsilon=epsilon, profiler=profiler)
+
+        if factor < 2:
+            raise ValueError('The factor must be at least 2')
+
+        self.factor = factor
+        self.levels = levels
+        self.max_iterations = max_iterations
+        self.cycle = cycle
+
+        self.coarse_levels = []
+
+        self.level_iterations = []
+        self.level_time_elapsed = []
+
+        self.coarse_time_elapsed = 0
+
+        self.corrections = 0
+
+    def __repr__(self):
+        return f'MultigridValueIteration({self.file_name})'
+
+    def __str__(self):
+        levels = [
+            f'{level.size}x{level.size}: {len(level)} blocks, '
+            f'{iterations} iterations, {time_elapsed} ms'
+            for level, iterations, time_elapsed in zip(
+                self.coarse_levels, self.level_iterations,
+                self.level_time_elapsed
+            )
+        ]
+
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Initial: {self.init}
+Goal: {self.goal}
+Epsilon: {self.epsilon}
+
+Time: {self.time_elapsed} ms
+    Compile Time: {self.compile_time_elapsed} ms
+    Coarse Time: {self.coarse_time_elapsed} ms
+Iterations: {self.iterations}
+Corrections: {self.corrections}
+Levels: {levels}
+
+Costs: {self.costs}
+Policies: {self.policies}
+
+Grid: {self.grid}
+
+AnswerGrid: {self.answer_grid}'''
+
+    def calculate_initial_cost(self):
+        """
+        Description
+        -----------
+        Computes the initial cost of each state by solving the coarse
+        levels, instead of using the manhattan distance.
+        """
+
+        self.coarse_time_elapsed = self.time_it(
+            self.solve_coarse_levels, span='coarse'
+        )
+
+        self.time_elapsed += self.coarse_time_elapsed
+
+    def solve_coarse_levels(self):
+        """
+        Description
+        -----------
+        Aggregates and solves each coarse level, coarsest first,
+        then prolongs the costs of the finest one to `cost_vector`.
+        """
+
+        if self.levels < 1:
+            return super().calculate_initial_cost()
+
+        self.coarse_levels = [
+            CoarseLevel(self.mdp, self.factor ** level, self.goal_id)
+            for level in range(self.levels, 0, -1)
+        ]
+
+        costs = np.zeros(len(self.coarse_levels[0]))
+
+        for i, level in enumerate(self.coarse_levels):
+            if i > 0:
+                previous = self.coarse_levels[i - 1]
+
+                costs = costs[previous.blocks[level.representatives]]
+
+            time_elapsed, (costs, iterations) = self.time_it(
+                self.solve_level, level, costs, span='level'
+            )
+
+            self.level_time_elapsed.append(time_elapsed)
+            self.level_iterations.append(iterations)
+
+        self.cost_vector = costs[self.coarse_levels[-1].blocks]
+
+    def solve_level(self, level, costs):
+        """
+        Description
+        -----------
+        Runs the Value Iteration on a CoarseLevel() until the largest
+        residual is smaller than `epsilon`, or `max_iterations`.
+
+        Parameters
+        ----------
+        level: CoarseLevel() \\
+            -- The level to be solved.
+
+        costs: numpy.ndarray \\
+            -- Initial cost of each block.
+
+        Returns
+        -------
+        costs: numpy.ndarray \\
+            -- Cost of each block.
+
+        iterations: int \\
+            -- Number of sweeps.
+        """
+
+        for iteration in range(1, self.max_iterations + 1):
+            new_costs = level.bellman_backup(costs)
+
+            residual = float(np.max(np.abs(new_costs - costs)))
+
+            costs = new_costs
+
+            if residual < self.epsilon:
+                break
+
+        return costs, iteration
+
+    def update_costs_and_policies(self):
+        """
+        Description
+        -----------
+        Runs a sweep like `SparseValueIteration.update_costs_and_policies`
+        and, every `cycle` sweeps, corrects the costs with the finest
+        coarse level.
+
+        The prolonged costs are off by about the same amount on every
+        state of a block, which the residual of a sweep barely shows,
+        so without the corrections the algorithm could stop while
+        they are still wrong.
+        """
+
+        old_costs = self.cost_vector
+
+        super().update_costs_and_policies()
+
+        if (
+            self.cycle < 1 or not self.coarse_levels
+            or self.max_residual < self.epsilon
+            or (self.iterations + 1) % self.cycle != 0
+        ):
+            return
+
+        start = self.profiler.start()
+
+        self.cost_vector = self.cost_vector + self.coarse_levels[-1].correct(
+            self.mdp, self.policy_vector, self.cost_vector - old_costs
+        )
+
+        self.corrections += 1
+
+        self.profiler.stop('correction', start)
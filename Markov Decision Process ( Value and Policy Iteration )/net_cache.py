@@ -0,0 +1,285 @@
+import os
+import json
+import hashlib
+import numpy as np
+from compiled_mdp import DIRECTIONS
+from net_parser import ParsedNet, parse_net_file
+
+
+class NetCache():
+    """
+    Description
+    -----------
+    Class that stores compiled versions of the .net files, so that
+    they are only parsed from text when they change.
+
+    Each file gets a folder inside `folder`, with one .npy file per
+    array of the ParsedNet() and a meta.json file with the key used
+    to validate the entry, which is the source path, its modification
+    time and its size.
+
+    The arrays are saved as plain .npy files, so they can be
+    memory-mapped when loaded instead of being read.
+
+    Parameters
+    ----------
+    folder: str \\
+        -- Folder where the cache is stored.
+
+    rebuild: bool \\
+        -- If True, every file is parsed again and its entry is
+        rewritten, even if it is valid. default = False.
+
+    Attributes
+    ----------
+    folder: str \\
+        -- Folder where the cache is stored.
+
+    rebuild: bool \\
+        -- If True, the entries are always rewritten.
+
+    hits: int \\
+        -- Number of files loaded from the cache.
+
+    misses: int \\
+        -- Number of files that had to be parsed.
+    """
+
+    def __init__(self, folder, rebuild=False):
+        self.folder = folder
+        self.rebuild = rebuild
+
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f'NetCache({self.folder})'
+
+    def get_entry_folder(self, path):
+        """
+        Description
+        -----------
+        Returns the folder of the entry of a file.
+
+        The full path is hashed, so that files with the same
+        name in different folders do not share an entry.
+
+        Parameters
+        ----------
+        path: str \\
+            -- Path to the .net file.
+
+        Returns
+        -------
+        str \\
+            -- Path to the folder of the entry.
+        """
+
+        path = os.path.abspath(path)
+
+        digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:12]
+
+        return os.path.join(self.folder, f'{os.path.basename(path)}-{digest}')
+
+    def get_key(self, path):
+        """
+        Description
+        -----------
+        Returns the key that identifies the current version of a file.
+
+        Parameters
+        ----------
+        path: str \\
+            -- Path to the .net file.
+
+        Returns
+        -------
+        dict \\
+            -- The source path, its modification time and its size.
+        """
+
+        stat = os.stat(path)
+
+        return {
+            'source': os.path.abspath(path),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size
+        }
+
+    def is_valid(self, path):
+        """
+        Description
+        -----------
+        Checks if the entry of a file exists and matches its key.
+
+        Parameters
+        ----------
+        path: str \\
+            -- Path to the .net file.
+
+        Returns
+        -------
+        bool \\
+            -- True if the entry can be used.
+        """
+
+        meta_path = os.path.join(self.get_entry_folder(path), 'meta.json')
+
+        if not os.path.isfile(meta_path):
+            return False
+
+        with open(meta_path, 'r') as meta_file:
+            meta = json.load(meta_file)
+
+        return meta.get('key') == self.get_key(path)
+
+    def get(self, path):
+        """
+        Description
+        -----------
+        Returns the ParsedNet() of a file, from the cache if its entry is
+        valid, otherwise parsing the file and updating the entry.
+
+        Parameters
+        ----------
+        path: str \\
+            -- Path to the .net file.
+
+        Returns
+        -------
+        ParsedNet() \\
+            -- The parsed file.
+        """
+
+        if not self.rebuild and self.is_valid(path):
+            self.hits += 1
+
+            return self.load(path)
+
+        self.misses += 1
+
+        parsed = parse_net_file(path)
+
+        self.save(path, parsed)
+
+        return parsed
+
+    def save(self, path, parsed):
+        """
+        Description
+        -----------
+        Writes the entry of a file.
+
+        The meta.json file is written last, so that an interrupted
+        write leaves an entry that is not valid.
+
+        Parameters
+        ----------
+        path: str \\
+            -- Path to the .net file.
+
+        parsed: ParsedNet() \\
+            -- The parsed file.
+        """
+
+        entry_folder = self.get_entry_folder(path)
+
+        os.makedirs(entry_folder, exist_ok=True)
+
+        meta_path = os.path.join(entry_folder, 'meta.json')
+
+        if os.path.isfile(meta_path):
+            os.remove(meta_path)
+
+        arrays = {
+            'names': np.array(parsed.names),
+            'x': parsed.x,
+            'y': parsed.y,
+            'action_order': np.array(parsed.action_order, dtype=np.int64),
+            'cost_states': parsed.cost_states,
+            'cost_actions': parsed.cost_actions,
+            'cost_values': parsed.cost_values,
+            'grid_values': np.array(
+                [value for row in parsed.grid for value in row],
+                dtype=np.int64
+            ),
+            'grid_lengths': np.array(
+                [len(row) for row in parsed.grid], dtype=np.int64
+            )
+        }
+
+        for a in range(len(DIRECTIONS)):
+            arrays[f'sources_{a}'] = parsed.sources[a]
+            arrays[f'destinations_{a}'] = parsed.destinations[a]
+            arrays[f'probabilities_{a}'] = parsed.probabilities[a]
+
+        for name, array in arrays.items():
+            np.save(os.path.join(entry_folder, f'{name}.npy'), array)
+
+        meta = {
+            'key': self.get_key(path),
+            'initial_state': parsed.initial_state,
+            'goal_state': parsed.goal_state
+        }
+
+        with open(meta_path, 'w') as meta_file:
+            json.dump(meta, meta_file)
+
+    def load(self, path):
+        """
+        Description
+        -----------
+        Reads the entry of a file, memory-mapping the arrays.
+
+        Parameters
+        ----------
+        path: str \\
+            -- Path to the .net file.
+
+        Returns
+        -------
+        ParsedNet() \\
+            -- The parsed file.
+        """
+
+        entry_folder = self.get_entry_folder(path)
+
+        def load_array(name):
+            return np.load(
+                os.path.join(entry_folder, f'{name}.npy'), mmap_mode='r'
+            )
+
+        with open(os.path.join(entry_folder, 'meta.json'), 'r') as meta_file:
+            meta = json.load(meta_file)
+
+        parsed = ParsedNet()
+
+        parsed.names = load_array('names').tolist()
+
+        parsed.x = load_array('x')
+        parsed.y = load_array('y')
+
+        for a in range(len(DIRECTIONS)):
+            parsed.sources.append(load_array(f'sources_{a}'))
+            parsed.destinations.append(load_array(f'destinations_{a}'))
+            parsed.probabilities.append(load_array(f'probabilities_{a}'))
+
+        parsed.action_order = load_array('action_order').tolist()
+
+        parsed.cost_states = load_array('cost_states')
+        parsed.cost_actions = load_array('cost_actions')
+        parsed.cost_values = load_array('cost_values')
+
+        parsed.initial_state = meta['initial_state']
+        parsed.goal_state = meta['goal_state']
+
+        grid_values = load_array('grid_values').tolist()
+
+        start = 0
+
+        for length in load_array('grid_lengths').tolist():
+            parsed.grid.append(grid_values[start:start + length])
+
+            start += length
+
+        return parsed
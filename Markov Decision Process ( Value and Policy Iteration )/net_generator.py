@@ -0,0 +1,352 @@
+import random
+import argparse
+from collections import deque
+
+
+# Same order as the actions on the TestesGrid files,
+# with the (x, y) step of each one.
+MOVES = [
+    ('south', (0, -1)), ('north', (0, 1)),
+    ('west', (-1, 0)), ('east', (1, 0))
+]
+
+# Codes used on the Grid section of the files.
+FREE = 0
+WALL = 1
+INITIAL = 2
+GOAL = 3
+NEAR_WALL = 4
+
+
+class NavigationGrid():
+    """
+    Description
+    -----------
+    Class that generates a random navigation problem, in the same
+    format as the TestesGrid files, so that the solvers can be
+    measured on grids of any size.
+
+    Coordinates follow the files: x goes from 1 to `width`, left to
+    right, and y goes from 1 to `height`, bottom to top.
+
+    Every move that does not hit a wall or the edge of the grid
+    reaches the next cell with probability 1 - `slip`, otherwise
+    stays on the same cell. Moves that hit a wall always stay.
+    The goal only has moves that stay on it.
+
+    Walls are placed at random, then every cell that can't reach
+    the goal becomes a wall too, since the cost of those cells would
+    never converge.
+
+    Parameters
+    ----------
+    width: int \\
+        -- Number of columns.
+
+    height: int \\
+        -- Number of rows.
+
+    wall_density: float \\
+        -- Chance of each cell being a wall. default = 0.2.
+
+    slip: float \\
+        -- Chance of a move staying on the same cell. default = 0.5.
+
+    random_goal: bool \\
+        -- If True, the initial and goal cells are chosen at random,
+        like the RandomGoal files. Otherwise they are the bottom left
+        and top right cells, like the FixedGoal files. default = False.
+
+    seed: int \\
+        -- Seed of the random generator, the same seed always
+        generates the same grid. default = None.
+
+    Attributes
+    ----------
+    width: int \\
+        -- Number of columns.
+
+    height: int \\
+        -- Number of rows.
+
+    slip: float \\
+        -- Chance of a move staying on the same cell.
+
+    walls: set \\
+        -- (x, y) of every wall.
+
+    initial: tuple \\
+        -- (x, y) of the initial cell.
+
+    goal: tuple \\
+        -- (x, y) of the goal cell.
+    """
+
+    def __init__(self, width, height, wall_density=0.2, slip=0.5,
+                 random_goal=False, seed=None):
+        if width < 2 or height < 2:
+            raise ValueError('The grid must be at least 2 by 2')
+
+        if not 0 <= slip < 1:
+            raise ValueError('slip must be in [0, 1)')
+
+        self.width = width
+        self.height = height
+        self.slip = slip
+
+        generator = random.Random(seed)
+
+        cells = [
+            (x, y)
+            for y in range(1, height + 1)
+            for x in range(1, width + 1)
+        ]
+
+        if random_goal:
+            self.initial, self.goal = generator.sample(cells, 2)
+        else:
+            self.initial, self.goal = (1, 1), (width, height)
+
+        self.walls = {
+            cell for cell in cells
+            if cell not in [self.initial, self.goal]
+            and generator.random() < wall_density
+        }
+
+        # The initial cell must reach the goal, so walls are removed
+        # until it does, then the cells cut off are walled.
+        reachable = self.get_reachable()
+
+        while self.initial not in reachable:
+            self.walls.remove(generator.choice(sorted(self.walls)))
+
+            reachable = self.get_reachable()
+
+        self.walls = set(cells) - reachable
+
+    def __repr__(self):
+        return f'NavigationGrid({self.width}, {self.height})'
+
+    def is_free(self, cell):
+        """
+        Description
+        -----------
+        Checks if a cell is inside the grid and is not a wall.
+
+        Parameters
+        ----------
+        cell: tuple \\
+            -- (x, y) of the cell.
+
+        Returns
+        -------
+        bool \\
+            -- True if the cell can be reached.
+        """
+
+        x, y = cell
+
+        return (
+            1 <= x <= self.width and 1 <= y <= self.height
+            and cell not in self.walls
+        )
+
+    def get_reachable(self):
+        """
+        Description
+        -----------
+        Finds the cells that can reach the goal, with a breadth-first
+        search from the goal. Moves are reversible, so these are the
+        cells the goal can reach.
+
+        Returns
+        -------
+        set \\
+            -- (x, y) of the cells.
+        """
+
+        reachable = {self.goal}
+
+        queue = deque([self.goal])
+
+        while queue:
+            x, y = queue.popleft()
+
+            for direction, (dx, dy) in MOVES:
+                cell = (x + dx, y + dy)
+
+                if self.is_free(cell) and cell not in reachable:
+                    reachable.add(cell)
+                    queue.append(cell)
+
+        return reachable
+
+    def get_states(self):
+        """
+        Description
+        -----------
+        Returns the free cells, in the order used by the files,
+        row by row from the bottom.
+
+        Returns
+        -------
+        list \\
+            -- (x, y) of the cells.
+        """
+
+        return [
+            (x, y)
+            for y in range(1, self.height + 1)
+            for x in range(1, self.width + 1)
+            if (x, y) not in self.walls
+        ]
+
+    def get_code(self, cell):
+        """
+        Description
+        -----------
+        Returns the code of a cell on the Grid section.
+        Free cells with a wall on any of the 8 cells around
+        them are marked as `NEAR_WALL`, like the TestesGrid files.
+
+        Parameters
+        ----------
+        cell: tuple \\
+            -- (x, y) of the cell.
+
+        Returns
+        -------
+        int \\
+            -- The code of the cell.
+        """
+
+        if cell == self.initial:
+            return INITIAL
+
+        if cell == self.goal:
+            return GOAL
+
+        if cell in self.walls:
+            return WALL
+
+        x, y = cell
+
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                if (x + dx, y + dy) in self.walls:
+                    return NEAR_WALL
+
+        return FREE
+
+    def to_net(self):
+        """
+        Description
+        -----------
+        Writes the problem in the .net format read by `tests.Test`.
+
+        Returns
+        -------
+        str \\
+            -- The contents of the .net file.
+        """
+
+        def name(cell):
+            return f'robot-at-x{cell[0]}y{cell[1]}'
+
+        def transition(start, end, probability):
+            return (
+                f'\t{name(start)} {name(end)} '
+                f'{probability:.6f} {probability:.6f}'
+            )
+
+        states = self.get_states()
+
+        lines = ['states', '\t' + ', '.join(name(s) for s in states)]
+        lines.append('endstates')
+
+        for direction, (dx, dy) in MOVES:
+            lines += ['', f'action move-{direction}']
+
+            for state in states:
+                end = (state[0] + dx, state[1] + dy)
+
+                if state == self.goal or not self.is_free(end):
+                    lines.append(transition(state, state, 1.0))
+                    continue
+
+                lines.append(transition(state, end, 1 - self.slip))
+
+                if self.slip > 0:
+                    lines.append(transition(state, state, self.slip))
+
+            lines.append('endaction')
+
+        lines += ['\t', 'cost']
+
+        for state in states:
+            if state == self.goal:
+                continue
+
+            for direction, step in MOVES:
+                lines.append(f'\t{name(state)} move-{direction} 1.000000')
+
+        lines.append('endcost')
+
+        lines += [
+            '', 'initialstate', f'\t{name(self.initial)}', 'endinitialstate',
+            '', 'goalstate', f'\t{name(self.goal)}', 'endgoalstate',
+            '', 'Grid:'
+        ]
+
+        for y in range(self.height, 0, -1):
+            lines.append(''.join(
+                f'{self.get_code((x, y))} '
+                for x in range(1, self.width + 1)
+            ))
+
+        return '\n'.join(lines) + '\n\n'
+
+    def write(self, path):
+        """
+        Description
+        -----------
+        Writes the .net file.
+
+        Parameters
+        ----------
+        path: str \\
+            -- Path to the file.
+        """
+
+        with open(path, 'w') as net_file:
+            net_file.write(self.to_net())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Generates a random navigation .net file'
+    )
+
+    parser.add_argument('path', help='where the .net file is written')
+    parser.add_argument('--width', type=int, default=20)
+    parser.add_argument('--height', type=int, default=20)
+    parser.add_argument(
+        '--wall-density', type=float, default=0.2,
+        help='chance of each cell being a wall'
+    )
+    parser.add_argument(
+        '--slip', type=float, default=0.5,
+        help='chance of a move staying on the same cell'
+    )
+    parser.add_argument(
+        '--random-goal', action='store_true',
+        help='choose the initial and goal cells at random'
+    )
+    parser.add_argument('--seed', type=int, default=None)
+
+    args = parser.parse_args()
+
+    NavigationGrid(
+        args.width, args.height, wall_density=args.wall_density,
+        slip=args.slip, random_goal=args.random_goal, seed=args.seed
+    ).write(args.path)
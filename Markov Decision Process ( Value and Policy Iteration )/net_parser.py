@@ -0,0 +1,264 @@
+import numpy as np
+from compiled_mdp import DIRECTIONS
+
+
+class ParsedNet():
+    """
+    Description
+    -----------
+    Class that stores a .net file as compact arrays.
+
+    States are interned to integer ids, which are their position
+    in the `states` section of the file.
+
+    Attributes
+    ----------
+    names: list \\
+        -- Names of the states, the index of each name is the state's id.
+
+    x: numpy.ndarray \\
+        -- Value of x of each state, as written in its name.
+
+    y: numpy.ndarray \\
+        -- Value of y of each state, as written in its name.
+
+    sources: list \\
+        -- For each direction in `DIRECTIONS`, the ids of the states where
+        each transition begins, in the same order as the file.
+
+    destinations: list \\
+        -- For each direction in `DIRECTIONS`, the ids of the states where
+        each transition ends.
+
+    probabilities: list \\
+        -- For each direction in `DIRECTIONS`, the probability
+        of each transition.
+
+    action_order: list \\
+        -- Indexes in `DIRECTIONS` in the order the actions appear
+        in the file, used to rebuild the predecessors in the same order.
+
+    cost_states: numpy.ndarray \\
+        -- Id of the state of each cost line.
+
+    cost_actions: numpy.ndarray \\
+        -- Index in `DIRECTIONS` of the action of each cost line.
+
+    cost_values: numpy.ndarray \\
+        -- Value of each cost line.
+
+    initial_state: int \\
+        -- Id of the initial state.
+
+    goal_state: int \\
+        -- Id of the goal state.
+
+    grid: list \\
+        -- A list containing the codes of each row of the grid.
+    """
+
+    def __init__(self):
+        self.names = []
+
+        self.x = None
+        self.y = None
+
+        self.sources = []
+        self.destinations = []
+        self.probabilities = []
+
+        self.action_order = []
+
+        self.cost_states = None
+        self.cost_actions = None
+        self.cost_values = None
+
+        self.initial_state = None
+        self.goal_state = None
+
+        self.grid = []
+
+    def __repr__(self):
+        return f'ParsedNet({len(self.names)})'
+
+    def populate(self, states, grid):
+        """
+        Description
+        -----------
+        Loads the parsed file into the StateSpace() and Grid()
+        objects, just like `Test.load_attributes` does.
+
+        Parameters
+        ----------
+        states: StateSpace() \\
+            -- Empty StateSpace() to be filled.
+
+        grid: Grid() \\
+            -- Empty Grid() to be filled.
+
+        Returns
+        -------
+        initial_state: State() \\
+            -- The initial state.
+
+        goal_state: State() \\
+            -- The goal state.
+        """
+
+        states.load_states_list(self.names)
+
+        state_objects = [states.get_state(name) for name in self.names]
+
+        for a in self.action_order:
+            direction = DIRECTIONS[a]
+
+            transitions = zip(
+                self.sources[a].tolist(),
+                self.destinations[a].tolist(),
+                self.probabilities[a].tolist()
+            )
+
+            for source, destination, probability in transitions:
+                state_objects[source].update_action(
+                    direction, state_objects[destination], probability
+                )
+
+        costs = zip(
+            self.cost_states.tolist(),
+            self.cost_actions.tolist(),
+            self.cost_values.tolist()
+        )
+
+        for state, action, cost in costs:
+            state_objects[state].update_action_cost(DIRECTIONS[action], cost)
+
+        for row in self.grid:
+            grid.add_row(row)
+
+        return (
+            state_objects[self.initial_state], state_objects[self.goal_state]
+        )
+
+
+def get_direction(action_name):
+    """
+    Description
+    -----------
+    Returns the index in `DIRECTIONS` of an action name,
+    following the same rule as `ActionSet.get_action`.
+
+    Parameters
+    ----------
+    action_name: str \\
+        -- Name of the action, like 'move-north'.
+
+    Returns
+    -------
+    int \\
+        -- Index of the direction.
+    """
+
+    for i, direction in enumerate(DIRECTIONS):
+        if direction in action_name:
+            return i
+
+    raise ValueError(f'Unknown action {action_name}')
+
+
+def parse_net_file(path):
+    """
+    Description
+    -----------
+    Parses a .net file into a ParsedNet().
+
+    The whole file is read with a single call and split into tokens,
+    then each section is found by its delimiters and converted with
+    slices of the token list, instead of reading one line at a time.
+
+    The grid is the only section that depends on the lines,
+    so it is split from the rest of the file first.
+
+    Parameters
+    ----------
+    path: str \\
+        -- Path to the .net file.
+
+    Returns
+    -------
+    ParsedNet() \\
+        -- The parsed file.
+    """
+
+    with open(path, 'r') as net_file:
+        text = net_file.read()
+
+    text, grid_text = text.split('Grid:', 1)
+
+    tokens = text.split()
+
+    parsed = ParsedNet()
+
+    start = tokens.index('states') + 1
+    end = tokens.index('endstates', start)
+
+    parsed.names = [name.rstrip(',') for name in tokens[start:end]]
+
+    index = {name: i for i, name in enumerate(parsed.names)}
+
+    coordinates = [name.split('x')[-1].split('y') for name in parsed.names]
+
+    parsed.x = np.array([int(c[0]) for c in coordinates], dtype=np.int64)
+    parsed.y = np.array([int(c[1]) for c in coordinates], dtype=np.int64)
+
+    parsed.sources = [None] * len(DIRECTIONS)
+    parsed.destinations = [None] * len(DIRECTIONS)
+    parsed.probabilities = [None] * len(DIRECTIONS)
+
+    # Every transition line is 'init_state end_state probability discard'
+    for i in range(len(DIRECTIONS)):
+        start = tokens.index('action', end) + 2
+        end = tokens.index('endaction', start)
+
+        a = get_direction(tokens[start - 1])
+
+        parsed.action_order.append(a)
+
+        parsed.sources[a] = np.array(
+            [index[name] for name in tokens[start:end:4]], dtype=np.int64
+        )
+        parsed.destinations[a] = np.array(
+            [index[name] for name in tokens[start + 1:end:4]], dtype=np.int64
+        )
+        parsed.probabilities[a] = np.array(
+            tokens[start + 2:end:4], dtype=float
+        )
+
+    # Every cost line is 'state action cost'
+    start = tokens.index('cost', end) + 1
+    end = tokens.index('endcost', start)
+
+    parsed.cost_states = np.array(
+        [index[name] for name in tokens[start:end:3]], dtype=np.int64
+    )
+    parsed.cost_actions = np.array(
+        [get_direction(name) for name in tokens[start + 1:end:3]],
+        dtype=np.int64
+    )
+    parsed.cost_values = np.array(tokens[start + 2:end:3], dtype=float)
+
+    start = tokens.index('initialstate', end) + 1
+    parsed.initial_state = index[tokens[start]]
+
+    start = tokens.index('goalstate', start) + 1
+    parsed.goal_state = index[tokens[start]]
+
+    # Same as `Test.load_grid`, the grid ends on the first empty line
+    for line in grid_text.split('\n')[1:]:
+        row = line.split()
+
+        if row == []:
+            break
+
+        parsed.grid.append([int(value) for value in row])
+
+    return parsed
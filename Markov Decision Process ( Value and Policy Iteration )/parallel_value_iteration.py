@@ -0,0 +1,494 @@
+import os
+import time
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+import numpy as np
+from compiled_mdp import DIRECTIONS
+from sparse_value_iteration import SparseValueIteration
+
+
+class ParallelValueIteration(SparseValueIteration):
+    """
+    Description
+    -----------
+    Class that defines the Value Iteration algorithm running the
+    Bellman backups of each iteration on many processes.
+
+    The states are split into `workers` blocks of whole grid rows, with
+    about the same number of states each, and every block is updated by
+    its own worker process. The costs live in shared memory, so no
+    costs are copied between the processes: there are two cost vectors,
+    the workers read the costs of the previous iteration from one and
+    write the new costs to the other, then they are swapped.
+
+    Each iteration is synchronized with a barrier, every worker writes
+    the largest residual of its block, and the main process takes the
+    largest of them once every worker is done.
+
+    If a worker raises or is killed the barrier is aborted, so that
+    the main process stops waiting, terminates the other workers and
+    raises a RuntimeError instead of blocking forever.
+
+    It produces the same `costs`, `policies` and `answer_grid`
+    as the `SparseValueIteration` class.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object, based on which the algorithm will run.
+
+    epsilon: float \\
+        -- Used to stop tha algorithm. default = 1.0.
+
+    workers: int \\
+        -- Number of worker processes. default = 2.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    Attributes
+    ----------
+    workers: int \\
+        -- Number of worker processes.
+
+    blocks: list \\
+        -- Ids of the states of each block, sorted.
+
+    startup_time_elapsed: float \\
+        -- Time in milliseconds spent creating the shared memory and
+        starting the workers, not included in `time_elapsed`.
+    """
+
+    def __init__(self, test, epsilon=1.0, workers=2, profiler=None):
+        super().__init__(test, epsilon=epsilon, profiler=profiler)
+
+        if workers < 1:
+            raise ValueError('There must be at least one worker')
+
+        self.workers = workers
+
+        self.blocks = []
+
+        self.startup_time_elapsed = 0
+
+    def __repr__(self):
+        return f'ParallelValueIteration({self.file_name}, {self.workers})'
+
+    def __str__(self):
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Initial: {self.init}
+Goal: {self.goal}
+Epsilon: {self.epsilon}
+Workers: {self.workers}
+
+Time: {self.time_elapsed} ms
+    Compile Time: {self.compile_time_elapsed} ms
+    Startup Time: {self.startup_time_elapsed} ms
+Iterations: {self.iterations}
+
+Costs: {self.costs}
+Policies: {self.policies}
+
+Grid: {self.grid}
+
+AnswerGrid: {self.answer_grid}'''
+
+    def run(self):
+        """
+        Description
+        -----------
+        Runs the algorithm, storing number of iterations and time elapsed.
+        """
+
+        self.compile_time_elapsed = self.time_it(self.compile, span='compile')
+
+        self.calculate_initial_cost()
+
+        n = len(self.mdp)
+
+        start = time.perf_counter_ns()
+
+        # [costs of even iterations, costs of odd iterations]
+        costs_memory = shared_memory.SharedMemory(
+            create=True, size=2 * n * np.dtype(float).itemsize
+        )
+        policies_memory = shared_memory.SharedMemory(
+            create=True, size=n * np.dtype(np.int64).itemsize
+        )
+        # [largest residual of each worker..., stop flag]
+        control_memory = shared_memory.SharedMemory(
+            create=True, size=(self.workers + 1) * np.dtype(float).itemsize
+        )
+
+        processes = []
+
+        watcher = None
+
+        try:
+            costs = np.ndarray((2, n), dtype=float, buffer=costs_memory.buf)
+            control = np.ndarray(
+                self.workers + 1, dtype=float, buffer=control_memory.buf
+            )
+
+            costs[0] = self.cost_vector
+            control[:] = 0.0
+
+            barrier = multiprocessing.Barrier(self.workers + 1)
+
+            for w, block in enumerate(self.blocks):
+                process = multiprocessing.Process(
+                    target=run_worker,
+                    args=(
+                        w, block, self.get_block_actions(block),
+                        self.goal_id, n, costs_memory.name,
+                        policies_memory.name, control_memory.name,
+                        self.workers, barrier
+                    ),
+                    daemon=True
+                )
+
+                process.start()
+
+                processes.append(process)
+
+            watcher = threading.Thread(
+                target=watch_workers, args=(processes, barrier), daemon=True
+            )
+
+            watcher.start()
+
+            self.startup_time_elapsed = (
+                time.perf_counter_ns() - start
+            ) / 1_000_000
+
+            try:
+                while self.max_residual >= self.epsilon:
+                    self.time_elapsed += self.time_it(
+                        self.update_costs_and_policies, barrier, control,
+                        span='backup'
+                    )
+
+                    self.iterations += 1
+
+                    self.profiler.sample(
+                        'residual', self.iterations, self.max_residual
+                    )
+
+                control[-1] = 1.0
+
+                barrier.wait()
+
+            except threading.BrokenBarrierError as error:
+                raise RuntimeError(
+                    f'A worker stopped on iteration {self.iterations}'
+                ) from error
+
+            for process in processes:
+                process.join()
+
+            if self.iterations > 0:
+                self.cost_vector = costs[self.iterations % 2].copy()
+                self.policy_vector = np.ndarray(
+                    n, dtype=np.int64, buffer=policies_memory.buf
+                ).copy()
+
+            del costs, control
+
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+            if watcher is not None:
+                watcher.join()
+
+            for memory in [costs_memory, policies_memory, control_memory]:
+                memory.close()
+                memory.unlink()
+
+        self.update_states()
+
+        self.update_answer()
+
+    def compile(self):
+        """
+        Description
+        -----------
+        Compiles the StateSpace() into a CompiledMDP() and splits
+        the states into blocks.
+        """
+
+        super().compile()
+
+        self.blocks = self.get_blocks()
+
+    def get_blocks(self):
+        """
+        Description
+        -----------
+        Splits the states into `workers` blocks of whole grid rows, with
+        about the same number of states each.
+
+        Returns
+        -------
+        list \\
+            -- Sorted ids of the states of each block.
+        """
+
+        rows, counts = np.unique(self.mdp.y, return_counts=True)
+
+        # Each row goes to the block where the middle of the row
+        # falls, so that the blocks have about the same size
+        middles = np.cumsum(counts) - counts / 2
+
+        row_blocks = np.minimum(
+            (middles * self.workers / len(self.mdp)).astype(np.int64),
+            self.workers - 1
+        )
+
+        state_blocks = row_blocks[np.searchsorted(rows, self.mdp.y)]
+
+        return [
+            np.flatnonzero(state_blocks == w) for w in range(self.workers)
+        ]
+
+    def get_block_actions(self, block):
+        """
+        Description
+        -----------
+        Selects the part of the CompiledMDP() a worker needs, the end
+        states of the actions of the states in its block.
+
+        Parameters
+        ----------
+        block: numpy.ndarray \\
+            -- Sorted ids of the states of the block.
+
+        Returns
+        -------
+        list \\
+            -- For each action, a tuple of (
+                position on the block of each state where the action
+                is available, offsets of each state, ids of the end
+                states, probabilities, costs
+            ).
+        """
+
+        actions = []
+
+        for a in range(len(DIRECTIONS)):
+            keep = np.isin(self.mdp.rows[a], block)
+
+            starts = self.mdp.indptr[a][:-1][keep]
+            lengths = self.mdp.indptr[a][1:][keep] - starts
+
+            indptr = np.zeros(lengths.size + 1, dtype=np.int64)
+            np.cumsum(lengths, out=indptr[1:])
+
+            entries = (
+                np.repeat(starts - indptr[:-1], lengths)
+                + np.arange(indptr[-1])
+            )
+
+            rows = self.mdp.rows[a][keep]
+
+            actions.append((
+                np.searchsorted(block, rows), indptr,
+                self.mdp.indices[a][entries],
+                self.mdp.probabilities[a][entries],
+                self.mdp.costs[a][entries]
+            ))
+
+        return actions
+
+    def update_costs_and_policies(self, barrier, control):
+        """
+        Description
+        -----------
+        Runs one iteration on the workers: the first barrier starts it,
+        the second one waits for every block to be updated, then the
+        largest residual is taken.
+
+        Parameters
+        ----------
+        barrier: multiprocessing.Barrier \\
+            -- Barrier shared with the workers.
+
+        control: numpy.ndarray \\
+            -- The residual of each worker and the stop flag.
+        """
+
+        barrier.wait()
+        barrier.wait()
+
+        self.max_residual = float(np.max(control[:-1]))
+
+        self.backups += len(self.mdp) - 1
+
+
+def run_worker(w, block, actions, goal, n, costs_name, policies_name,
+               control_name, workers, barrier):
+    """
+    Description
+    -----------
+    Loop of a worker of the `ParallelValueIteration`, updating the costs
+    and policies of its block on each iteration, until the stop flag
+    is set.
+
+    On iteration i the costs are read from `costs[i % 2]` and written
+    to `costs[(i + 1) % 2]`.
+
+    Parameters
+    ----------
+    w: int \\
+        -- Index of the worker.
+
+    block: numpy.ndarray \\
+        -- Sorted ids of the states of the block.
+
+    actions: list \\
+        -- The actions of the block, see
+        `ParallelValueIteration.get_block_actions`.
+
+    goal: int \\
+        -- Id of the goal state.
+
+    n: int \\
+        -- Number of states.
+
+    costs_name: str \\
+        -- Name of the shared memory of the costs.
+
+    policies_name: str \\
+        -- Name of the shared memory of the policies.
+
+    control_name: str \\
+        -- Name of the shared memory of the residuals and stop flag.
+
+    workers: int \\
+        -- Number of workers.
+
+    barrier: multiprocessing.Barrier \\
+        -- Barrier shared with the main process and the other workers.
+    """
+
+    try:
+        worker_loop(
+            w, block, actions, goal, n, costs_name, policies_name,
+            control_name, workers, barrier
+        )
+
+    except BaseException:
+        # So that the main process and the other workers
+        # don't wait for this one forever
+        barrier.abort()
+
+        raise
+
+
+def worker_loop(w, block, actions, goal, n, costs_name, policies_name,
+                control_name, workers, barrier):
+    """
+    Description
+    -----------
+    The loop run by `run_worker`, which takes the same parameters.
+    """
+
+    costs_memory = shared_memory.SharedMemory(name=costs_name)
+    policies_memory = shared_memory.SharedMemory(name=policies_name)
+    control_memory = shared_memory.SharedMemory(name=control_name)
+
+    costs = np.ndarray((2, n), dtype=float, buffer=costs_memory.buf)
+    policies = np.ndarray(n, dtype=np.int64, buffer=policies_memory.buf)
+    control = np.ndarray(workers + 1, dtype=float, buffer=control_memory.buf)
+
+    is_goal = block == goal
+
+    last = len(DIRECTIONS) - 1
+
+    iteration = 0
+
+    while True:
+        barrier.wait()
+
+        if control[-1] != 0.0:
+            break
+
+        old_costs = costs[iteration % 2]
+        new_costs = costs[(iteration + 1) % 2]
+
+        q = np.full((len(DIRECTIONS), block.size), np.inf)
+
+        for a, (rows, indptr, indices, probabilities,
+                action_costs) in enumerate(actions):
+            if rows.size == 0:
+                continue
+
+            terms = probabilities * (action_costs + old_costs[indices])
+
+            q[a, rows] = np.add.reduceat(terms, indptr[:-1])
+
+        # Same tie break as `CompiledMDP.select_actions`
+        block_policies = last - np.argmin(q[::-1], axis=0)
+
+        block_costs = q[block_policies, np.arange(block.size)]
+
+        no_action = np.isinf(block_costs) | is_goal
+
+        block_costs[no_action] = 0.0
+        block_policies[no_action] = -1
+
+        control[w] = (
+            float(np.max(np.abs(block_costs - old_costs[block])))
+            if block.size > 0 else 0.0
+        )
+
+        new_costs[block] = block_costs
+        policies[block] = block_policies
+
+        iteration += 1
+
+        barrier.wait()
+
+    del costs, policies, control
+
+    for memory in [costs_memory, policies_memory, control_memory]:
+        memory.close()
+
+
+def watch_workers(processes, barrier):
+    """
+    Description
+    -----------
+    Runs on a thread of the main process, waiting for the workers to
+    exit. If one of them exits with an error, or is killed, before the
+    stop flag the barrier is aborted so that nobody waits for it.
+
+    Parameters
+    ----------
+    processes: list \\
+        -- The worker processes.
+
+    barrier: multiprocessing.Barrier \\
+        -- Barrier shared with the main process and the workers.
+    """
+
+    running = list(processes)
+
+    while running:
+        finished = wait([process.sentinel for process in running])
+
+        for process in list(running):
+            if process.sentinel not in finished:
+                continue
+
+            process.join()
+
+            running.remove(process)
+
+            if process.exitcode != 0:
+                barrier.abort()
+
+                return
@@ -1,7 +1,21 @@
 import os
 import time
+import numpy as np
+from scipy import sparse
+from scipy.sparse import linalg
 from grids import AnswerGrid
+from compiled_mdp import CompiledMDP, DIRECTIONS
 from value_iteration import ValueIteration
+from determinization import DETERMINIZATIONS, get_goal_distances
+
+
+# 'sweep' is the ordered evaluation, the others solve
+# the linear system of the policy.
+EVALUATORS = ['sweep', 'direct', 'gmres', 'bicgstab']
+
+# 'breadth-first' walks the predecessors from the goal, the others
+# are the policies of `get_goal_distances` with that determinization.
+INITIAL_POLICIES = ['breadth-first'] + DETERMINIZATIONS
 
 
 class PolicyIteration(ValueIteration):
@@ -20,6 +34,27 @@ class PolicyIteration(ValueIteration):
     test: Test() \\
         -- Test() object, based on which the algorithm will run.
 
+    evaluator: str \\
+        -- How the policies are evaluated, one of `EVALUATORS`. \\
+        'sweep' uses the ordered evaluation of `get_policy_cost`. \\
+        'direct' solves (I - P) * costs = c with a sparse LU. \\
+        'gmres' and 'bicgstab' solve the same system iteratively,
+        preconditioned by an incomplete LU. \\
+        default = 'sweep'.
+
+    incremental: bool \\
+        -- If True, the 'sweep' evaluator only evaluates the states whose
+        policy changed and the states that reach them following the
+        policies, the others keep the cost of the last evaluation,
+        since their policies lead to the same states. default = True.
+
+    initial_policy: str \\
+        -- One of `INITIAL_POLICIES`, how the initial policy is built.
+        default = 'breadth-first'.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
     Attributes
     ----------
     folder_name: str \\
@@ -86,10 +121,55 @@ class PolicyIteration(ValueIteration):
     policy_cost_calculation_time_elapsed: int \\
         -- Time in milliseconds spent on cost calculation step.
         Part of `evaluation_cost_time_elapsed`.
+
+    evaluator: str \\
+        -- How the policies are evaluated, one of `EVALUATORS`.
+
+    mdp: CompiledMDP() \\
+        -- The compiled StateSpace(), only used by the linear evaluators.
+
+    solve_time_elapsed: int \\
+        -- Time in milliseconds spent building and solving the linear
+        system of each policy. Part of `evaluation_time_elapsed`, but not
+        of `evaluation_cost_time_elapsed`.
+
+    incremental: bool \\
+        -- If only the states affected by the improvement are evaluated.
+
+    evaluated_states: list \\
+        -- Number of states evaluated on each iteration.
+
+    initial_policy: str \\
+        -- One of `INITIAL_POLICIES`.
     """
 
-    def __init__(self, test):
-        super().__init__(test)
+    def __init__(self, test, evaluator='sweep', incremental=True,
+                 initial_policy='breadth-first', profiler=None):
+        super().__init__(test, profiler=profiler)
+
+        if evaluator not in EVALUATORS:
+            raise ValueError(
+                f'Unknown evaluator {evaluator}, use one of {EVALUATORS}'
+            )
+
+        if initial_policy not in INITIAL_POLICIES:
+            raise ValueError(
+                f'Unknown initial policy {initial_policy}, '
+                f'use one of {INITIAL_POLICIES}'
+            )
+
+        self.initial_policy = initial_policy
+
+        self.evaluator = evaluator
+
+        self.incremental = incremental
+        self.evaluated_states = []
+
+        self.mdp = None
+        self.transition_matrices = []
+        self.expected_costs = []
+
+        self.solve_time_elapsed = 0
 
         self.initial_policy_grid = None
 
@@ -118,7 +198,9 @@ Total Time: {self.time_elapsed} ms
         List Creation Time: {self.evaluation_list_time_elapsed} ms
         Evaluation Function Time: {self.evaluation_cost_time_elapsed} ms
             Calculation Time: {self.policy_cost_calculation_time_elapsed} ms
+        Solve Time ({self.evaluator}): {self.solve_time_elapsed} ms
 Iterations: {self.iterations}
+Evaluated States: {self.evaluated_states}
 
 Costs: {self.costs}
 Policies: {self.policies}
@@ -135,9 +217,31 @@ AnswerGrid: {self.answer_grid}'''
         -----------
         Computes the initial policy and cost for each state.
 
-        Uses a breadth-first search approach.
+        Uses a breadth-first search approach, or the policies and costs
+        found by `get_goal_distances`, depending on `initial_policy`.
         """
 
+        if self.initial_policy != 'breadth-first':
+            self.initial_time_elapsed, (costs, policies) = self.time_it(
+                get_goal_distances, self.states, self.goal,
+                self.initial_policy, span='initial'
+            )
+
+            for name, policy in policies.items():
+                state = self.states.get_state(name)
+
+                state.update_policy(policy)
+                state.update_cost(costs[name])
+
+            self.policies.update(policies)
+
+            self.initial_policy_grid = AnswerGrid(
+                self.states, self.policies, self.grid.shape,
+                self.init, self.goal
+            ).arrow_grid
+
+            return
+
         self.policies.update({self.goal.name: '-'})
 
         self.goal.update_policy('-')
@@ -233,11 +337,17 @@ AnswerGrid: {self.answer_grid}'''
             self.old_costs = self.costs.copy()
 
             self.improvement_time_elapsed += self.time_it(
-                self.update_costs_and_policies
+                self.update_costs_and_policies, span='improvement'
             )
 
+            affected_states = None
+
+            # The first evaluation has no previous costs to keep
+            if self.incremental and self.iterations > 0:
+                affected_states = self.get_affected_states(old_policies)
+
             self.evaluation_time_elapsed += self.time_it(
-                self.evaluate_policies
+                self.evaluate_policies, affected_states, span='evaluation'
             )
 
             self.iterations += 1
@@ -247,6 +357,7 @@ AnswerGrid: {self.answer_grid}'''
 
         self.time_elapsed = (
             self.improvement_time_elapsed + self.evaluation_time_elapsed
+            + self.initial_time_elapsed
         )
 
         self.update_answer()
@@ -267,29 +378,131 @@ AnswerGrid: {self.answer_grid}'''
 
             self.costs.update({name: float(cost)})
 
-    def evaluate_policies(self):
+        # The linear evaluators start from the real cost of the
+        # initial policy, so that every improvement is made on exact costs.
+        if self.evaluator != 'sweep':
+            self.time_it(self.compile, span='compile')
+
+            self.evaluation_time_elapsed += self.time_it(
+                self.evaluate_policies, span='evaluation'
+            )
+
+        # The costs of `get_goal_distances` are estimates, not the
+        # costs of its policies, so they are evaluated once as well.
+        elif self.initial_policy != 'breadth-first':
+            self.old_costs = self.costs.copy()
+
+            self.evaluation_time_elapsed += self.time_it(
+                self.evaluate_policies, span='evaluation'
+            )
+
+    def compile(self):
+        """
+        Description
+        -----------
+        Compiles the StateSpace() and builds the transition matrix and
+        the expected costs of each action, used by the linear evaluators.
+        """
+
+        self.mdp = CompiledMDP(self.states)
+
+        for a in range(len(DIRECTIONS)):
+            self.transition_matrices.append(self.mdp.transition_matrix(a))
+            self.expected_costs.append(self.mdp.expected_costs(a))
+
+    def get_affected_states(self, old_policies):
+        """
+        Description
+        -----------
+        Finds the states whose cost may have changed on the last
+        improvement: the states whose policy changed and every state
+        that reaches one of them following the policies, found through
+        the `policy_predecessors` built by the improvement.
+
+        Parameters
+        ----------
+        old_policies: dict \\
+            -- The policies before the improvement.
+
+        Returns
+        -------
+        set \\
+            -- Names of the affected states.
+        """
+
+        stack = [
+            self.states.get_state(name)
+            for name, policy in self.policies.items()
+            if old_policies.get(name) != policy
+        ]
+
+        affected_states = {state.name for state in stack}
+
+        while stack:
+            state = stack.pop()
+
+            for predecessor in state.policy_predecessors:
+                if predecessor.name not in affected_states:
+                    affected_states.add(predecessor.name)
+
+                    stack.append(predecessor)
+
+        return affected_states
+
+    def evaluate_policies(self, affected_states=None):
         """
         Description
         -----------
         Computes the cost of each new policy and then replaces
         the current costs with those.
+
+        Parameters
+        ----------
+        affected_states: set \\
+            -- If given, only these states are evaluated by the 'sweep'
+            evaluator, the others keep their costs from the last
+            evaluation. default = None, which evaluates every state.
         """
 
+        if self.evaluator != 'sweep':
+            solve_time_spent, policies_costs = self.time_it(
+                self.get_solved_costs
+            )
+
+            self.solve_time_elapsed += solve_time_spent
+
+            self.costs = policies_costs
+
+            self.evaluated_states.append(len(policies_costs))
+
+            return None
+
         evaluation_list_time_spent, states_sorted = self.time_it(
-            self.get_evaluation_order
+            self.get_evaluation_order, affected_states
         )
 
         self.evaluation_list_time_elapsed += evaluation_list_time_spent
 
+        self.evaluated_states.append(len(states_sorted))
+
+        known_costs = {}
+
+        if affected_states is not None:
+            for name, cost in self.old_costs.items():
+                if name not in affected_states:
+                    known_costs.update({name: cost})
+
+                    self.states.get_state(name).update_cost(cost)
+
         evaluation_cost_time_spent, policies_costs = self.time_it(
-            self.get_evaluation_costs, states_sorted
+            self.get_evaluation_costs, states_sorted, known_costs
         )
 
         self.evaluation_cost_time_elapsed += evaluation_cost_time_spent
 
         self.costs = policies_costs
 
-    def get_evaluation_order(self):
+    def get_evaluation_order(self, affected_states=None):
         """
         Description
         -----------
@@ -297,24 +510,33 @@ AnswerGrid: {self.answer_grid}'''
 
         It is used to evaluate policy in order.
 
+        Parameters
+        ----------
+        affected_states: set \\
+            -- If given, only these states are listed. default = None.
+
         Returns
         -------
         list \\
             -- Sorted list of states' names.
         """
 
-        index = 0
+        costs = self.costs.items()
+
+        if affected_states is not None:
+            costs = [
+                (name, cost) for name, cost in costs
+                if name in affected_states
+            ]
 
         next_states = list({
             name: cost
-            for name, cost in sorted(
-                self.costs.items(), key=lambda item: item[1]
-            )
+            for name, cost in sorted(costs, key=lambda item: item[1])
         }.keys())
 
         return next_states
 
-    def get_evaluation_costs(self, states_sorted):
+    def get_evaluation_costs(self, states_sorted, known_costs=None):
         """
         Description
         -----------
@@ -326,6 +548,10 @@ AnswerGrid: {self.answer_grid}'''
         states_sorted: list \\
             -- List of states' names sorted by cost.
 
+        known_costs: dict \\
+            -- Costs of the states that are not evaluated, which are
+            kept as they are. default = None.
+
         Returns
         -------
         dict \\
@@ -334,6 +560,11 @@ AnswerGrid: {self.answer_grid}'''
 
         new_costs = {}
 
+        if known_costs is not None:
+            new_costs.update(known_costs)
+
+        calculation_time = 0
+
         while states_sorted != []:
             name = states_sorted.pop(0)
 
@@ -348,17 +579,22 @@ AnswerGrid: {self.answer_grid}'''
 
             action = state.actions.get_action(policy)
 
-            time_spent, policy_cost = self.time_it(
-                self.get_policy_cost,
-                state, action, new_costs
-            )
+            # Timed inline, `time_it` would cost more than the
+            # call it measures on the smaller states.
+            start = time.perf_counter_ns()
+
+            policy_cost = self.get_policy_cost(state, action, new_costs)
 
-            self.policy_cost_calculation_time_elapsed += time_spent
+            calculation_time += time.perf_counter_ns() - start
 
             new_costs.update({name: policy_cost})
 
             state.update_cost(policy_cost)
 
+        self.policy_cost_calculation_time_elapsed += (
+            calculation_time / 1_000_000
+        )
+
         return new_costs
 
     def get_policy_cost(self, state, action, costs):
@@ -524,3 +760,107 @@ AnswerGrid: {self.answer_grid}'''
                 cost += probability * (action.cost + costs[end.name])
 
         return round(cost / factor, 5)
+
+    def get_solved_costs(self):
+        """
+        Description
+        -----------
+        Evaluates the cost of following the policy for each state by
+        solving the linear system of the policy.
+
+        `costs = c + P * costs`, so `(I - P) * costs = c`
+
+        Where P is the transition matrix of the policy and c is
+        the cost of the action selected for each state. The goal state
+        and the states without policy have empty rows in P, so
+        their costs are 0.
+
+        Returns
+        -------
+        dict \\
+            -- Dict consisting of {state name: policy cost}.
+        """
+
+        n = len(self.mdp)
+
+        policies = np.array([
+            DIRECTIONS.index(self.policies[name])
+            if self.policies.get(name) in DIRECTIONS else -1
+            for name in self.mdp.names
+        ])
+
+        policies[self.mdp.get_id(self.goal)] = -1
+
+        policy_matrix = sparse.csr_matrix((n, n))
+        policy_costs = np.zeros(n)
+
+        for a in range(len(DIRECTIONS)):
+            selected = policies == a
+
+            policy_matrix = policy_matrix + (
+                sparse.diags(selected.astype(float))
+                @ self.transition_matrices[a]
+            )
+
+            policy_costs[selected] = self.expected_costs[a][selected]
+
+        system = (sparse.identity(n) - policy_matrix).tocsc()
+
+        costs = self.solve(system, policy_costs)
+
+        costs = np.round(costs, 5)
+
+        new_costs = dict(zip(self.mdp.names, costs.tolist()))
+
+        for name, cost in new_costs.items():
+            self.states.get_state(name).update_cost(cost)
+
+        return new_costs
+
+    def solve(self, system, policy_costs):
+        """
+        Description
+        -----------
+        Solves the linear system using the method in `evaluator`.
+
+        The iterative methods start from the current costs and fall back
+        to the direct solver if they do not converge.
+
+        Parameters
+        ----------
+        system: scipy.sparse.csc_matrix \\
+            -- The matrix (I - P).
+
+        policy_costs: numpy.ndarray \\
+            -- The cost of the policy of each state.
+
+        Returns
+        -------
+        numpy.ndarray \\
+            -- The cost of following the policy from each state.
+        """
+
+        if self.evaluator == 'direct':
+            return linalg.spsolve(system, policy_costs)
+
+        solver = linalg.gmres if self.evaluator == 'gmres' else linalg.bicgstab
+
+        preconditioner = linalg.spilu(system)
+
+        preconditioner = linalg.LinearOperator(
+            system.shape, preconditioner.solve
+        )
+
+        initial_costs = np.array([
+            self.costs.get(name, 0.0) for name in self.mdp.names
+        ])
+
+        costs, info = solver(
+            system, policy_costs, x0=initial_costs,
+            rtol=1e-10, M=preconditioner
+        )
+
+        if info != 0:
+            return linalg.spsolve(system, policy_costs)
+
+        return costs
@@ -0,0 +1,262 @@
+import os
+import math
+import heapq
+from value_iteration import ValueIteration
+
+
+class PrioritizedSweeping(ValueIteration):
+    """
+    Description
+    -----------
+    Class that defines the Prioritized Sweeping algorithm.
+    Instead of updating every state on every iteration, it keeps a heap
+    of states ordered by their Bellman residual and only updates the
+    state with the highest residual, then raises the priority of
+    its predecessors, which are the only ones affected by the update.
+
+    It inherits most of its attributes and methods from
+    the `ValueIteration` class.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object, based on which the algorithm will run.
+
+    epsilon: float \\
+        -- Used to stop tha algorithm. default = 1.0.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    Attributes
+    ----------
+    iterations: int \\
+        -- The `backups` as the number of full sweeps of the
+        `ValueIteration` with the same backups, rounded up, so that
+        it is comparable with the `iterations` of the other solvers.
+
+    updates: int \\
+        -- The number of states updated, each one is a single pop
+        from the heap.
+
+    backups: int \\
+        -- The number of times the cost of a single state was computed,
+        including the initial residuals and the final computation of
+        the policies. Comparable with the `backups` of the
+        `ValueIteration` class.
+
+    max_residual: float \\
+        -- The highest priority left when the algorithm stopped.
+
+    priorities: dict \\
+        -- A dict containing (name of the state, priority) tuples,
+        the priority is an upper bound of the state's residual.
+        Entries of the heap that don't match it are outdated.
+    """
+
+    def __init__(self, test, epsilon=1.0, profiler=None):
+        super().__init__(test, epsilon=epsilon, profiler=profiler)
+
+        self.priorities = {}
+
+        self.updates = 0
+
+    def __repr__(self):
+        return f'PrioritizedSweeping({self.file_name})'
+
+    def __str__(self):
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Initial: {self.init}
+Goal: {self.goal}
+Epsilon: {self.epsilon}
+
+Time: {self.time_elapsed} ms
+Iterations: {self.iterations}
+Updates: {self.updates}
+Backups: {self.backups}
+
+Costs: {self.costs}
+Policies: {self.policies}
+
+Grid: {self.grid}
+
+AnswerGrid: {self.answer_grid}'''
+
+    def run(self):
+        """
+        Description
+        -----------
+        Runs the algorithm, storing number of updates and time elapsed.
+        """
+
+        self.calculate_initial_cost()
+
+        self.time_elapsed += self.time_it(self.sweep, span='backup')
+
+        self.time_elapsed += self.time_it(
+            self.update_policies, span='argmin'
+        )
+
+        # A full sweep backs up every state but the goal
+        self.iterations = math.ceil(
+            self.backups / max(len(self.costs) - 1, 1)
+        )
+
+        self.update_answer()
+
+    def get_bellman_cost(self, state):
+        """
+        Description
+        -----------
+        Computes the cost of the least costly action of a state,
+        without updating anything else.
+
+        Parameters
+        ----------
+        state: State() \\
+            -- The state to compute the cost of.
+
+        Returns
+        -------
+        float \\
+            -- The new cost, 0 for the goal and states without actions.
+        """
+
+        if state == self.goal:
+            return 0
+
+        self.backups += 1
+
+        action_costs = [
+            self.compute_cost(action, self.costs) for action in state.actions
+        ]
+
+        if action_costs == []:
+            return 0
+
+        return min(action_costs)
+
+    def get_transition_probability(self, state, end_state):
+        """
+        Description
+        -----------
+        Returns the highest probability, among the actions of a state,
+        of winding up on `end_state`.
+
+        Parameters
+        ----------
+        state: State() \\
+            -- State where the actions begin.
+
+        end_state: State() \\
+            -- State where the actions may lead to.
+
+        Returns
+        -------
+        float \\
+            -- The highest probability.
+        """
+
+        probability = 0.0
+
+        for action in state.actions:
+            for end, end_probability in action.end:
+                if end.name == end_state.name:
+                    probability = max(probability, end_probability)
+
+        return probability
+
+    def push(self, name, priority, heap):
+        """
+        Description
+        -----------
+        Updates the priority of a state and pushes it to the heap
+        if it is not smaller than `epsilon`.
+
+        Parameters
+        ----------
+        name: str \\
+            -- Name of the state.
+
+        priority: float \\
+            -- New priority of the state.
+
+        heap: list \\
+            -- The heap of (-priority, name of the state) tuples.
+        """
+
+        self.priorities[name] = priority
+
+        if priority >= self.epsilon:
+            heapq.heappush(heap, (-priority, name))
+
+    def sweep(self):
+        """
+        Description
+        -----------
+        Updates the costs until the highest priority is smaller
+        than `epsilon`.
+
+        The priorities start as the residual of each state. When a state
+        is popped and its cost changes by `delta`, the cost of taking
+        any action of a predecessor changes by at most
+        `probability * delta`, so that amount is added to the priority
+        of the predecessor, without computing its cost. The state itself
+        is not one of its predecessors, so its priority becomes the
+        probability of its actions staying on it times `delta`.
+
+        That way the priority is never smaller than the real residual,
+        and stopping when every priority is smaller than `epsilon`
+        is as strict as the `ValueIteration` stopping criteria.
+        """
+
+        heap = []
+
+        for name in self.states:
+            state = self.states.get_state(name)
+
+            residual = abs(self.get_bellman_cost(state) - self.costs[name])
+
+            self.push(name, residual, heap)
+
+        while heap:
+            priority, name = heapq.heappop(heap)
+
+            # Outdated entry, the priority changed after being pushed
+            if -priority != self.priorities[name]:
+                continue
+
+            state = self.states.get_state(name)
+
+            new_cost = self.get_bellman_cost(state)
+
+            delta = abs(new_cost - self.costs[name])
+
+            self.costs.update({name: new_cost})
+
+            self.updates += 1
+
+            # The slip of its own actions, `predecessors` has no self-loops
+            self.push(
+                name,
+                self.get_transition_probability(state, state) * delta, heap
+            )
+
+            if delta == 0:
+                continue
+
+            for predecessor in state.predecessors:
+                if predecessor == self.goal:
+                    continue
+
+                probability = self.get_transition_probability(
+                    predecessor, state
+                )
+
+                self.push(
+                    predecessor.name,
+                    self.priorities[predecessor.name] + probability * delta,
+                    heap
+                )
+
+        self.max_residual = max(self.priorities.values())
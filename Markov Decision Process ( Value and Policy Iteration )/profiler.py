@@ -0,0 +1,287 @@
+import csv
+import json
+import time
+
+
+# Spans recorded by the loaders and the solvers, any other
+# name is rejected so that a typo doesn't create a new span.
+SPANS = [
+    'parse', 'compile', 'initial', 'scc', 'backup', 'residual', 'argmin',
+    'evaluation', 'improvement', 'bounds', 'coarse', 'level', 'correction'
+]
+
+
+class Profiler():
+    """
+    Description
+    -----------
+    Class that accumulates the time spent on named spans, measured
+    with `time.perf_counter_ns`, and optionally samples values on
+    each iteration, like the residual of the Value Iteration.
+
+    A span is measured with `start` and `stop`, which only read the
+    clock, or with `add` when the time was already measured. When
+    `enabled` is False every method returns right away, so a disabled
+    Profiler() can be left on any hot loop.
+
+    Parameters
+    ----------
+    label: str \\
+        -- Name of what is being profiled, used when exporting,
+        like 'FixedGoalInitialState/navigation_1.net/vi'. default = ''.
+
+    enabled: bool \\
+        -- If False, nothing is recorded. default = True.
+
+    sample_every: int \\
+        -- Samples one of every `sample_every` iterations,
+        0 disables the sampling. default = 0.
+
+    Attributes
+    ----------
+    label: str \\
+        -- Name of what is being profiled.
+
+    enabled: bool \\
+        -- If False, nothing is recorded.
+
+    sample_every: int \\
+        -- Samples one of every `sample_every` iterations.
+
+    spans: dict \\
+        -- A dict containing (name of the span, [total ns, calls]) tuples.
+
+    samples: dict \\
+        -- A dict containing (name of the sample, list of
+        (iteration, value) tuples) tuples.
+    """
+
+    def __init__(self, label='', enabled=True, sample_every=0):
+        self.label = label
+        self.enabled = enabled
+        self.sample_every = sample_every
+
+        self.spans = {}
+        self.samples = {}
+
+    def __repr__(self):
+        return f'Profiler({self.label})'
+
+    def __str__(self):
+        lines = [f'{name}: {ms} ms' for name, ms in self.get_times().items()]
+
+        return '\n'.join([f'Profile: {self.label}'] + lines)
+
+    def start(self):
+        """
+        Description
+        -----------
+        Reads the clock at the start of a span.
+
+        Returns
+        -------
+        int \\
+            -- The current time in nanoseconds, 0 if disabled.
+        """
+
+        if not self.enabled:
+            return 0
+
+        return time.perf_counter_ns()
+
+    def stop(self, name, start):
+        """
+        Description
+        -----------
+        Reads the clock at the end of a span and adds it to the total.
+
+        Parameters
+        ----------
+        name: str \\
+            -- Name of the span, one of `SPANS`.
+
+        start: int \\
+            -- The value returned by `start`.
+        """
+
+        if not self.enabled:
+            return
+
+        self.add(name, time.perf_counter_ns() - start)
+
+    def add(self, name, elapsed):
+        """
+        Description
+        -----------
+        Adds an already measured time to a span.
+
+        The name is only checked the first time the span is recorded,
+        so it costs nothing on the next calls.
+
+        Parameters
+        ----------
+        name: str \\
+            -- Name of the span, one of `SPANS`.
+
+        elapsed: int \\
+            -- Time in nanoseconds.
+        """
+
+        if not self.enabled:
+            return
+
+        span = self.spans.get(name)
+
+        if span is None:
+            if name not in SPANS:
+                raise ValueError(f'Unknown span {name}, use one of {SPANS}')
+
+            self.spans[name] = [elapsed, 1]
+        else:
+            span[0] += elapsed
+            span[1] += 1
+
+    def sample(self, name, iteration, value):
+        """
+        Description
+        -----------
+        Records a value of an iteration, if sampling is enabled and
+        the iteration is one of every `sample_every`.
+
+        Parameters
+        ----------
+        name: str \\
+            -- Name of the sample, like 'residual'.
+
+        iteration: int \\
+            -- Number of the iteration.
+
+        value: float \\
+            -- The value sampled.
+        """
+
+        if not self.enabled or self.sample_every <= 0:
+            return
+
+        if iteration % self.sample_every == 0:
+            self.samples.setdefault(name, []).append(
+                (iteration, float(value))
+            )
+
+    def get_times(self):
+        """
+        Description
+        -----------
+        Returns the total time of each span.
+
+        Returns
+        -------
+        dict \\
+            -- A dict containing (name of the span, milliseconds) tuples.
+        """
+
+        return {
+            name: total / 1_000_000 for name, (total, calls)
+            in self.spans.items()
+        }
+
+    def to_dict(self):
+        """
+        Description
+        -----------
+        Returns everything recorded, in a format that can be
+        written as JSON.
+
+        Returns
+        -------
+        dict \\
+            -- The label, the spans and the samples.
+        """
+
+        return {
+            'label': self.label,
+            'spans': {
+                name: {'calls': calls, 'total_ns': total}
+                for name, (total, calls) in self.spans.items()
+            },
+            'samples': {
+                name: [list(sample) for sample in samples]
+                for name, samples in self.samples.items()
+            }
+        }
+
+
+def export_csv(profilers, path):
+    """
+    Description
+    -----------
+    Writes the spans of several Profiler() objects to a csv file,
+    one row per (label, span).
+
+    Parameters
+    ----------
+    profilers: list \\
+        -- The Profiler() objects.
+
+    path: str \\
+        -- Path to the csv file.
+    """
+
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+
+        writer.writerow(['label', 'span', 'calls', 'total_ms', 'mean_ms'])
+
+        for profiler in profilers:
+            for name, (total, calls) in profiler.spans.items():
+                writer.writerow([
+                    profiler.label, name, calls,
+                    total / 1_000_000, total / calls / 1_000_000
+                ])
+
+
+def export_samples_csv(profilers, path):
+    """
+    Description
+    -----------
+    Writes the samples of several Profiler() objects to a csv file,
+    one row per (label, sample, iteration).
+
+    Parameters
+    ----------
+    profilers: list \\
+        -- The Profiler() objects.
+
+    path: str \\
+        -- Path to the csv file.
+    """
+
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+
+        writer.writerow(['label', 'sample', 'iteration', 'value'])
+
+        for profiler in profilers:
+            for name, samples in profiler.samples.items():
+                for iteration, value in samples:
+                    writer.writerow([profiler.label, name, iteration, value])
+
+
+def export_json(profilers, path):
+    """
+    Description
+    -----------
+    Writes the spans and samples of several Profiler() objects
+    to a json file.
+
+    Parameters
+    ----------
+    profilers: list \\
+        -- The Profiler() objects.
+
+    path: str \\
+        -- Path to the json file.
+    """
+
+    with open(path, 'w') as json_file:
+        json.dump([profiler.to_dict() for profiler in profilers], json_file)
@@ -0,0 +1,294 @@
+import os
+import argparse
+import multiprocessing
+import pandas as pd
+from tests import Test, TESTS_FOLDER, list_test_files
+from net_cache import NetCache
+from main import (
+    METRICS_COLUMNS, execute_value_iteration_test,
+    execute_policy_iteration_test
+)
+
+
+ALGORITHMS = ['vi', 'pi']
+
+
+def run_job(test_path, algorithm, epsilon, output, cache):
+    """
+    Description
+    -----------
+    Runs a single (test, algorithm, epsilon) job.
+    It is executed inside a worker process, which loads its own Test().
+
+    Parameters
+    ----------
+    test_path: str \\
+        -- Path to the test file.
+
+    algorithm: str \\
+        -- 'vi' or 'pi'.
+
+    epsilon: float \\
+        -- Stopping criteria of the Value Iteration.
+
+    output: str \\
+        -- Where the output of the algorithm goes, see `output_processing`.
+
+    cache: bool \\
+        -- If True, the test is loaded from the NetCache().
+
+    Returns
+    -------
+    time_elapsed: float \\
+        -- The time reported by the algorithm.
+
+    iterations: int \\
+        -- The iterations reported by the algorithm.
+
+    compile_time: float \\
+        -- Time in milliseconds spent compiling the JIT kernels, 0 for
+        the other backends.
+    """
+
+    with open(test_path, 'r') as test_file:
+        if cache:
+            net_cache = NetCache(os.path.join(TESTS_FOLDER, '.cache'))
+
+            test = Test(test_file, parsed_net=net_cache.get(test_path))
+        else:
+            test = Test(test_file)
+
+    if algorithm == 'vi':
+        result = execute_value_iteration_test(test, epsilon, output=output)
+    else:
+        result = execute_policy_iteration_test(test, output=output)
+
+    return (
+        result.time_elapsed, result.iterations,
+        getattr(result, 'jit_compile_time_elapsed', 0)
+    )
+
+
+def run_jobs(jobs, job_keys, epsilon, output, timeout, cache):
+    """
+    Description
+    -----------
+    Runs every (test path, algorithm) job on a pool of `jobs` worker
+    processes and waits for them in order.
+
+    The timeout is enforced by the main process, which waits for each
+    result for at most `timeout` seconds. The jobs run in the order
+    they are sent, so a job is already running when the main process
+    starts waiting for it, and it is only stopped after running for at
+    least `timeout` seconds. Since a worker can't be stopped alone, the
+    whole pool is terminated, even in the middle of a NumPy or SciPy
+    call, and the jobs that didn't finish are sent again to a new pool.
+
+    Parameters
+    ----------
+    jobs: int \\
+        -- Number of worker processes.
+
+    job_keys: list \\
+        -- The (test path, algorithm) of each job.
+
+    epsilon: float \\
+        -- Stopping criteria of the Value Iteration.
+
+    output: str \\
+        -- Where the output of each algorithm goes.
+
+    timeout: int \\
+        -- Maximum time in seconds each job may run, 0 disables it.
+
+    cache: bool \\
+        -- If True, the tests are loaded from the NetCache().
+
+    Returns
+    -------
+    dict \\
+        -- A dict containing ((test path, algorithm), result of
+        `run_job`), the result is (None, None, None) if it timed out.
+    """
+
+    results = {}
+
+    pending = list(job_keys)
+
+    while pending:
+        pool = multiprocessing.Pool(processes=jobs)
+
+        try:
+            async_results = [
+                (key, pool.apply_async(
+                    run_job, (*key, epsilon, output, cache)
+                ))
+                for key in pending
+            ]
+
+            for key, async_result in async_results:
+                try:
+                    results[key] = async_result.get(timeout or None)
+
+                except multiprocessing.TimeoutError:
+                    results[key] = (None, None, None)
+
+                    break
+
+            # Keeps the jobs that finished while waiting for the one
+            # that timed out, so that they don't run again
+            for key, async_result in async_results:
+                if key not in results and async_result.ready():
+                    results[key] = async_result.get()
+
+        finally:
+            pool.terminate()
+            pool.join()
+
+        pending = [key for key in pending if key not in results]
+
+    return results
+
+
+def get_test_name(test_path):
+    """
+    Description
+    -----------
+    Returns the name used on metrics.csv, folder and file name.
+
+    Parameters
+    ----------
+    test_path: str \\
+        -- Path to the test file.
+
+    Returns
+    -------
+    str \\
+        -- The name of the test.
+    """
+
+    folder_name = os.path.basename(os.path.dirname(test_path))
+
+    return str(os.path.join(folder_name, os.path.basename(test_path)))
+
+
+def run_suite(jobs, epsilon, output, timeout, cache, metrics_path):
+    """
+    Description
+    -----------
+    Runs one job per (test, algorithm) with `run_jobs` and writes the
+    results to `metrics_path` with the same columns used by main.py.
+
+    Rows follow the order of the tests, not the order in which the jobs
+    finish, so the file is the same for any number of workers.
+
+    Parameters
+    ----------
+    jobs: int \\
+        -- Number of worker processes.
+
+    epsilon: float \\
+        -- Stopping criteria of the Value Iteration.
+
+    output: str \\
+        -- Where the output of each algorithm goes.
+
+    timeout: int \\
+        -- Maximum time in seconds each job may run, 0 disables it.
+
+    cache: bool \\
+        -- If True, the tests are loaded from the NetCache().
+
+    metrics_path: str \\
+        -- Path to the csv file.
+
+    Returns
+    -------
+    pandas.DataFrame \\
+        -- The metrics written to the file.
+    """
+
+    test_paths = list_test_files('FixedGoal') + list_test_files('RandomGoal')
+
+    # Built once here, so the workers only read it
+    if cache:
+        net_cache = NetCache(os.path.join(TESTS_FOLDER, '.cache'))
+
+        for test_path in test_paths:
+            net_cache.get(test_path)
+
+    results = run_jobs(
+        jobs,
+        [
+            (test_path, algorithm)
+            for test_path in test_paths
+            for algorithm in ALGORITHMS
+        ],
+        epsilon, output, timeout, cache
+    )
+
+    rows = []
+
+    for test_path in test_paths:
+        vi_time, vi_iter, vi_compile_time = results[(test_path, 'vi')]
+        pi_time, pi_iter, pi_compile_time = results[(test_path, 'pi')]
+
+        for algorithm, value in [('vi', vi_time), ('pi', pi_time)]:
+            if value is None:
+                print(f'{get_test_name(test_path)} {algorithm} timed out')
+
+        rows.append([
+            get_test_name(test_path), vi_time, vi_iter, vi_compile_time,
+            pi_time, pi_iter, pi_compile_time
+        ])
+
+    metrics_df = pd.DataFrame(rows, columns=METRICS_COLUMNS)
+
+    # Keeps the iterations as integers when a job timed out
+    for column in ['vi_iter', 'pi_iter']:
+        metrics_df[column] = metrics_df[column].astype('Int64')
+
+    metrics_df.to_csv(metrics_path, index=False)
+
+    return metrics_df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Runs every test on parallel worker processes'
+    )
+
+    parser.add_argument(
+        '--jobs', type=int, default=os.cpu_count(),
+        help='number of worker processes'
+    )
+    parser.add_argument(
+        '--epsilon', type=float, default=0.1,
+        help='stopping criteria of the Value Iteration'
+    )
+    parser.add_argument(
+        '--timeout', type=int, default=0,
+        help='maximum seconds per job, 0 disables it'
+    )
+    parser.add_argument(
+        '--output', default='file', choices=['file', 'console', 'none'],
+        help='where the output of each algorithm goes'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='parse the .net files from text instead of using the cache'
+    )
+    parser.add_argument(
+        '--metrics', default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            'outputs', 'metrics.csv'
+        ),
+        help='path to the metrics csv file'
+    )
+
+    args = parser.parse_args()
+
+    run_suite(
+        args.jobs, args.epsilon, args.output, args.timeout,
+        not args.no_cache, args.metrics
+    )
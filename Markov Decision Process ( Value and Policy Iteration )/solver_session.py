@@ -0,0 +1,348 @@
+import time
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from grids import AnswerGrid
+from compiled_mdp import CompiledMDP, DIRECTIONS
+
+
+# 'manhattan' is the same start used by `ValueIteration`,
+# 'distance' is the number of moves to the goal times the cheapest
+# action and 'previous' is the solution of the last goal solved.
+# With any of them the states that can't reach the goal start from
+# the manhattan distance, like `ValueIteration`.
+WARM_STARTS = ['manhattan', 'distance', 'previous']
+
+
+class SolverSession():
+    """
+    Description
+    -----------
+    Class that answers many goal queries on the same map.
+
+    The map is compiled into a CompiledMDP() once, then each query
+    runs Value Iteration on the arrays, starting from `warm_start`
+    instead of compiling and starting from scratch.
+
+    The costs and policies don't depend on the initial state, so each
+    goal is solved only once. Queries for a goal that was already
+    solved, with any initial state, are answered from `solutions`.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object with the map. Its goal is not used.
+
+    epsilon: float \\
+        -- Used to stop the Value Iteration of each query. default = 1.0.
+
+    warm_start: str \\
+        -- One of `WARM_STARTS`, the costs each query starts from. \\
+        'distance' never overestimates the costs, like 'manhattan',
+        but it follows the walls. \\
+        default = 'distance'.
+
+    Attributes
+    ----------
+    states: StateSpace() \\
+        -- StateSpace() object containing all the states.
+
+    grid: Grid() \\
+        -- The grid of the map.
+
+    epsilon: float \\
+        -- Used to stop the Value Iteration of each query.
+
+    warm_start: str \\
+        -- One of `WARM_STARTS`.
+
+    mdp: CompiledMDP() \\
+        -- The compiled map.
+
+    graph: scipy.sparse.csr_matrix \\
+        -- Matrix with a 1 for each (end state, state) pair where an
+        action of the state may lead to the end state, so that the
+        searches from the goal follow the actions backwards.
+
+    step_cost: float \\
+        -- Cost of the cheapest action.
+
+    solutions: dict \\
+        -- A dict containing (id of the goal, GoalSolution()) tuples.
+
+    last_solution: GoalSolution() \\
+        -- The last goal solved, used by the 'previous' warm start.
+
+    compile_time_elapsed: float \\
+        -- Time in milliseconds spent compiling the map.
+    """
+
+    def __init__(self, test, epsilon=1.0, warm_start='distance'):
+        if warm_start not in WARM_STARTS:
+            raise ValueError(
+                f'Unknown warm start {warm_start}, use one of {WARM_STARTS}'
+            )
+
+        self.states = test.states
+        self.grid = test.grid
+
+        self.epsilon = epsilon
+        self.warm_start = warm_start
+
+        self.mdp = None
+        self.graph = None
+        self.step_cost = 0.0
+
+        self.solutions = {}
+        self.last_solution = None
+
+        start = time.perf_counter_ns()
+
+        self.compile()
+
+        self.compile_time_elapsed = (time.perf_counter_ns() - start) / 1e6
+
+    def __repr__(self):
+        return f'SolverSession({len(self.mdp)})'
+
+    def compile(self):
+        """
+        Description
+        -----------
+        Compiles the map and builds the graph used by the
+        'distance' warm start.
+        """
+
+        self.mdp = CompiledMDP(self.states)
+
+        n = len(self.mdp)
+
+        graph = sparse.csr_matrix((n, n))
+
+        for a in range(len(DIRECTIONS)):
+            graph = graph + self.mdp.transition_matrix(a)
+
+        graph = graph.T.tocsr()
+
+        graph.setdiag(0)
+        graph.eliminate_zeros()
+
+        graph.data[:] = 1.0
+
+        self.graph = graph
+
+        costs = np.concatenate(self.mdp.costs)
+        costs = costs[costs > 0]
+
+        if costs.size > 0:
+            self.step_cost = float(costs.min())
+
+    def get_initial_costs(self, goal):
+        """
+        Description
+        -----------
+        Computes the costs a query starts from, following `warm_start`.
+
+        The states that can't reach the goal never get a new cost from
+        the states that can, so they start from the manhattan distance,
+        the same cost they end with on `ValueIteration`. Starting them
+        from 0, or from the cost of the last goal, would turn a dead end
+        like the cell of an old goal into a free trap.
+
+        Parameters
+        ----------
+        goal: int \\
+            -- Id of the goal state.
+
+        Returns
+        -------
+        numpy.ndarray \\
+            -- The initial cost of each state.
+        """
+
+        costs = (
+            np.abs(self.mdp.x - self.mdp.x[goal])
+            + np.abs(self.mdp.y - self.mdp.y[goal])
+        ).astype(float)
+
+        if self.warm_start == 'manhattan':
+            return costs
+
+        moves = csgraph.shortest_path(
+            self.graph, indices=goal, unweighted=True
+        )
+
+        reachable = ~np.isinf(moves)
+
+        if self.warm_start == 'previous' and self.last_solution is not None:
+            costs[reachable] = self.last_solution.costs[reachable]
+
+        elif self.warm_start == 'distance':
+            costs[reachable] = moves[reachable] * self.step_cost
+
+        costs[goal] = 0.0
+
+        return costs
+
+    def solve(self, goal):
+        """
+        Description
+        -----------
+        Returns the solution of a goal, running Value Iteration
+        only if the goal was not solved before.
+
+        Parameters
+        ----------
+        goal: str \\
+            -- Name of the goal state.
+
+        Returns
+        -------
+        GoalSolution() \\
+            -- The costs and policies for the goal.
+        """
+
+        goal_id = self.mdp.index[goal]
+
+        if goal_id in self.solutions:
+            return self.solutions[goal_id]
+
+        start = time.perf_counter_ns()
+
+        costs = self.get_initial_costs(goal_id)
+        policies = None
+
+        iterations = 0
+
+        max_residual = self.epsilon
+
+        while max_residual >= self.epsilon:
+            new_costs, policies = self.mdp.bellman_backup(costs, goal_id)
+
+            max_residual = float(np.max(np.abs(new_costs - costs)))
+
+            costs = new_costs
+
+            iterations += 1
+
+        solution = GoalSolution(
+            self.mdp, goal_id, costs, policies, iterations,
+            (time.perf_counter_ns() - start) / 1e6
+        )
+
+        self.solutions[goal_id] = solution
+        self.last_solution = solution
+
+        return solution
+
+    def query(self, initial, goal):
+        """
+        Description
+        -----------
+        Answers a query, returning the policies to go from the initial
+        state to the goal as an ArrowGrid(), like the `answer_grid` of
+        the solvers.
+
+        Parameters
+        ----------
+        initial: str \\
+            -- Name of the initial state.
+
+        goal: str \\
+            -- Name of the goal state.
+
+        Returns
+        -------
+        solution: GoalSolution() \\
+            -- The costs and policies for the goal.
+
+        answer_grid: ArrowGrid() \\
+            -- The policies drawn on the grid.
+        """
+
+        solution = self.solve(goal)
+
+        answer_grid = AnswerGrid(
+            self.states, solution.get_policies(), self.grid.shape,
+            self.states.get_state(initial), self.states.get_state(goal)
+        ).arrow_grid
+
+        return solution, answer_grid
+
+
+class GoalSolution():
+    """
+    Description
+    -----------
+    Class that stores the solution of a goal found by a SolverSession().
+
+    Parameters
+    ----------
+    mdp: CompiledMDP() \\
+        -- The compiled map.
+
+    goal: int \\
+        -- Id of the goal state.
+
+    costs: numpy.ndarray \\
+        -- Cost of each state.
+
+    policies: numpy.ndarray \\
+        -- Index in `DIRECTIONS` of the policy of each state.
+
+    iterations: int \\
+        -- Number of iterations of the Value Iteration.
+
+    time_elapsed: float \\
+        -- Time in milliseconds spent solving the goal.
+
+    Attributes
+    ----------
+    Same as the parameters.
+    """
+
+    def __init__(self, mdp, goal, costs, policies, iterations, time_elapsed):
+        self.mdp = mdp
+        self.goal = goal
+
+        self.costs = costs
+        self.policies = policies
+
+        self.iterations = iterations
+        self.time_elapsed = time_elapsed
+
+    def __repr__(self):
+        return f'GoalSolution({self.mdp.names[self.goal]})'
+
+    def get_cost(self, state):
+        """
+        Description
+        -----------
+        Returns the cost of going from a state to the goal.
+
+        Parameters
+        ----------
+        state: str \\
+            -- Name of the state.
+
+        Returns
+        -------
+        float \\
+            -- The cost.
+        """
+
+        return float(self.costs[self.mdp.index[state]])
+
+    def get_policies(self):
+        """
+        Description
+        -----------
+        Returns the policies as the dict used by the solvers.
+
+        Returns
+        -------
+        dict \\
+            -- A dict containing (name of the state, direction to follow).
+        """
+
+        return self.mdp.to_dicts(self.costs, self.policies, self.goal)[1]
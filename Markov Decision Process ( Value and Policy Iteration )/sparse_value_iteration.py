@@ -0,0 +1,214 @@
+import os
+import numpy as np
+from compiled_mdp import CompiledMDP, DIRECTIONS
+from value_iteration import ValueIteration
+
+
+class SparseValueIteration(ValueIteration):
+    """
+    Description
+    -----------
+    Class that defines the Value Iteration algorithm using a
+    CompiledMDP() instead of the State() objects.
+
+    The StateSpace() is compiled once into CSR arrays, then every
+    iteration is a few NumPy operations per action followed by
+    an argmin across the actions.
+
+    It produces the same `costs`, `policies` and `answer_grid`
+    as the `ValueIteration` class.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object, based on which the algorithm will run.
+
+    epsilon: float \\
+        -- Used to stop tha algorithm. default = 1.0.
+
+    initial_cost: str \\
+        -- One of `INITIAL_COSTS`, see `ValueIteration`.
+        default = 'manhattan'.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    Attributes
+    ----------
+    mdp: CompiledMDP() \\
+        -- The compiled version of the StateSpace().
+
+    compile_time_elapsed: float \\
+        -- Time in milliseconds spent compiling the StateSpace(),
+        not included in `time_elapsed`.
+
+    cost_vector: numpy.ndarray \\
+        -- Current cost of each state, indexed by the state's id.
+
+    policy_vector: numpy.ndarray \\
+        -- Index in `DIRECTIONS` of the policy of each state.
+
+    goal_id: int \\
+        -- Id of the goal state.
+    """
+
+    def __init__(self, test, epsilon=1.0, initial_cost='manhattan',
+                 profiler=None):
+        super().__init__(
+            test, epsilon=epsilon, initial_cost=initial_cost,
+            profiler=profiler
+        )
+
+        self.mdp = None
+        self.compile_time_elapsed = 0
+
+        self.cost_vector = None
+        self.policy_vector = None
+
+        self.goal_id = None
+
+    def __repr__(self):
+        return f'SparseValueIteration({self.file_name})'
+
+    def __str__(self):
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Initial: {self.init}
+Goal: {self.goal}
+Epsilon: {self.epsilon}
+
+Time: {self.time_elapsed} ms
+    Compile Time: {self.compile_time_elapsed} ms
+Iterations: {self.iterations}
+
+Costs: {self.costs}
+Policies: {self.policies}
+
+Grid: {self.grid}
+
+AnswerGrid: {self.answer_grid}'''
+
+    def run(self):
+        """
+        Description
+        -----------
+        Runs the algorithm, storing number of iterations and time elapsed.
+        """
+
+        self.compile_time_elapsed = self.time_it(self.compile, span='compile')
+
+        self.calculate_initial_cost()
+
+        while self.max_residual >= self.epsilon:
+            self.time_elapsed += self.time_it(
+                self.update_costs_and_policies
+            )
+
+            self.iterations += 1
+
+            self.profiler.sample(
+                'residual', self.iterations, self.max_residual
+            )
+
+        self.update_states()
+
+        self.update_answer()
+
+    def compile(self):
+        """
+        Description
+        -----------
+        Compiles the StateSpace() into a CompiledMDP().
+        """
+
+        self.mdp = CompiledMDP(self.states)
+
+        self.goal_id = self.mdp.get_id(self.goal)
+
+    def calculate_initial_cost(self):
+        """
+        Description
+        -----------
+        Computes the initial cost of each state.
+        The cost is simply the manhattan distance from
+        the state to the goal, or the cost found by
+        `get_goal_distances`, depending on `initial_cost`.
+        """
+
+        if self.initial_cost != 'manhattan':
+            super().calculate_initial_cost()
+
+            self.cost_vector = np.array(
+                [self.costs[name] for name in self.mdp.names], dtype=float
+            )
+
+            return
+
+        self.cost_vector = (
+            np.abs(self.mdp.x - self.goal.x) + np.abs(self.mdp.y - self.goal.y)
+        ).astype(float)
+
+    def update_costs_and_policies(self):
+        """
+        Description
+        -----------
+        Updates the cost and the repective policy for each state
+        with a single Bellman backup over the whole cost vector.
+
+        Then computes the difference between each new cost and the old cost.
+        """
+
+        start = self.profiler.start()
+
+        q = self.mdp.q_values(self.cost_vector)
+
+        self.profiler.stop('backup', start)
+
+        start = self.profiler.start()
+
+        new_costs, self.policy_vector = self.mdp.select_actions(
+            q, self.goal_id
+        )
+
+        self.profiler.stop('argmin', start)
+
+        start = self.profiler.start()
+
+        residuals = np.abs(new_costs - self.cost_vector)
+
+        self.max_residual = float(np.max(residuals))
+
+        self.profiler.stop('residual', start)
+
+        self.cost_vector = new_costs
+
+        self.backups += len(self.mdp) - 1
+
+    def update_states(self):
+        """
+        Description
+        -----------
+        Converts the vectors to the `costs` and `policies` dicts and
+        updates each State() the same way the `ValueIteration` does.
+        """
+
+        if self.policy_vector is None:
+            return
+
+        self.costs, self.policies = self.mdp.to_dicts(
+            self.cost_vector, self.policy_vector, self.goal_id
+        )
+
+        for name in self.states:
+            self.states.get_state(name).clean_policy_predecessors()
+
+        for name in self.states:
+            state = self.states.get_state(name)
+
+            policy = self.policies[name]
+
+            state.update_cost(self.costs[name])
+            state.update_policy(policy)
+
+            if policy in DIRECTIONS:
+                for end, probability in state.actions.get_action(policy).end:
+                    end.add_policy_predecessor(state)
@@ -64,7 +64,8 @@ class StateSpace():
             the new coordinates.
         """
 
-        max_coordinate = grid.shape[0]
+        # shape is [columns, rows], y is converted to a row
+        max_coordinate = grid.shape[1]
 
         for name, state in self.states.items():
             state.update_coordinates(max_coordinate)
@@ -129,7 +130,12 @@ class State():
         -- cost of getting from the state to the goal.
 
     predecessors: list \\
-        -- list of states that lead to the current state.
+        -- list of states that lead to the current state,
+        in the order they were added.
+
+    predecessor_names: set \\
+        -- names of the states in `predecessors`, used to check
+        if a state is already there without walking the list.
 
     policy_predecessors: list \\
         -- list of states that lead to the current state
@@ -148,6 +154,7 @@ class State():
         self.cost = None
 
         self.predecessors = []
+        self.predecessor_names = set()
         self.policy_predecessors = []
 
     def __repr__(self):
@@ -168,7 +175,7 @@ class State():
         Parameters
         ----------
         max_coordinate: int \\
-            -- Edge size of the Grid() object.
+            -- Number of rows of the Grid() object.
         """
 
         self.x = self.x - 1
@@ -208,14 +215,19 @@ class State():
         -----------
         Function used to append a new state to the `predecessors` attribute.
 
+        Each state is added only once, which is checked on
+        `predecessor_names`, since `state in self.predecessors` would
+        compare it with every predecessor already added.
+
         Parameters
         ----------
         state: State() \\
             -- State to be appended.
         """
 
-        if state not in self.predecessors and state != self:
+        if state.name not in self.predecessor_names and state != self:
             self.predecessors.append(state)
+            self.predecessor_names.add(state.name)
 
     def add_policy_predecessor(self, state):
         """
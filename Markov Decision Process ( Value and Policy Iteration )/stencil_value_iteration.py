@@ -0,0 +1,474 @@
+import os
+import numpy as np
+from compiled_mdp import DIRECTIONS
+from sparse_value_iteration import SparseValueIteration
+
+
+class GridStencil():
+    """
+    Description
+    -----------
+    Class that lays a CompiledMDP() out on a 2D grid, when every action
+    of every state either stays on the state or moves to the same
+    neighbouring cell, like on the navigation files.
+
+    The costs are a (rows, columns) array indexed by the converted
+    `y` and `x` of the states, and the cost of each action on every
+    cell is computed at once from the costs array shifted by one cell
+    in the direction of the action:
+
+    q(a) = stay(a) * (cost(a) + costs) + move(a) * (cost(a) + shifted)
+
+    Where stay(a) and move(a) are the probabilities of staying and of
+    moving on each cell, 0 where that can't happen.
+
+    Use `GridStencil.from_mdp`, which returns None when the CompiledMDP()
+    does not fit on a grid.
+
+    Parameters
+    ----------
+    mdp: CompiledMDP() \\
+        -- The compiled StateSpace().
+
+    offsets: list \\
+        -- The (x, y) step of each action in `DIRECTIONS`, None for
+        actions that never move.
+
+    stay: numpy.ndarray \\
+        -- Probability of staying on each cell, per action.
+
+    move: numpy.ndarray \\
+        -- Probability of moving to the next cell, per action.
+
+    costs: numpy.ndarray \\
+        -- Cost of each action on each cell.
+
+    available: numpy.ndarray \\
+        -- True where the action is available, per action.
+
+    Attributes
+    ----------
+    Same as the parameters, plus
+
+    shape: tuple \\
+        -- (rows, columns) of the grid.
+
+    x: numpy.ndarray \\
+        -- Column of each state.
+
+    y: numpy.ndarray \\
+        -- Row of each state.
+
+    cells: numpy.ndarray \\
+        -- True on the cells that are states.
+
+    unavailable: numpy.ndarray \\
+        -- True where the action is not available, per action.
+
+    padded: numpy.ndarray \\
+        -- The costs with one cell of padding, reused by every backup,
+        so that every shift is a plain slice.
+    """
+
+    def __init__(self, mdp, offsets, stay, move, costs, available):
+        self.mdp = mdp
+
+        self.offsets = offsets
+
+        self.stay = stay
+        self.move = move
+        self.costs = costs
+        self.available = available
+
+        self.x = mdp.x - mdp.x.min()
+        self.y = mdp.y - mdp.y.min()
+
+        self.shape = (int(self.y.max()) + 1, int(self.x.max()) + 1)
+
+        self.cells = np.zeros(self.shape, dtype=bool)
+        self.cells[self.y, self.x] = True
+
+        self.unavailable = ~available
+
+        self.padded = np.zeros((self.shape[0] + 2, self.shape[1] + 2))
+
+    def __repr__(self):
+        return f'GridStencil({self.shape})'
+
+    @classmethod
+    def from_mdp(cls, mdp):
+        """
+        Description
+        -----------
+        Checks if a CompiledMDP() fits on a grid and builds
+        its GridStencil().
+
+        It fits when no two states share a cell and every action has at
+        most one end state on the state itself and at most one on the
+        neighbouring cell in the direction of the action, which must be
+        the same cell step for every state.
+
+        Parameters
+        ----------
+        mdp: CompiledMDP() \\
+            -- The compiled StateSpace().
+
+        Returns
+        -------
+        GridStencil() \\
+            -- The stencil, None if the CompiledMDP() doesn't fit.
+        """
+
+        if len(mdp) == 0:
+            return None
+
+        x = mdp.x - mdp.x.min()
+        y = mdp.y - mdp.y.min()
+
+        shape = (int(y.max()) + 1, int(x.max()) + 1)
+
+        if np.unique(y * shape[1] + x).size != len(mdp):
+            return None
+
+        full_shape = (len(DIRECTIONS),) + shape
+
+        stay = np.zeros(full_shape)
+        move = np.zeros(full_shape)
+        costs = np.zeros(full_shape)
+        available = np.zeros(full_shape, dtype=bool)
+
+        offsets = []
+
+        for a in range(len(DIRECTIONS)):
+            rows = mdp.rows[a]
+
+            sources = np.repeat(rows, np.diff(mdp.indptr[a]))
+            ends = mdp.indices[a]
+
+            steps = np.stack([x[ends] - x[sources], y[ends] - y[sources]])
+
+            moves = np.any(steps != 0, axis=0)
+
+            unique_steps = np.unique(steps[:, moves], axis=1)
+
+            if unique_steps.shape[1] > 1:
+                return None
+
+            offset = None
+
+            if unique_steps.shape[1] == 1:
+                offset = tuple(int(step) for step in unique_steps[:, 0])
+
+                if abs(offset[0]) + abs(offset[1]) != 1:
+                    return None
+
+            offsets.append(offset)
+
+            # At most one staying and one moving end state per state
+            for kind in [moves, ~moves]:
+                if np.unique(sources[kind]).size != np.sum(kind):
+                    return None
+
+            # Every end state of an action shares the action's cost
+            first_costs = np.repeat(
+                mdp.costs[a][mdp.indptr[a][:-1]], np.diff(mdp.indptr[a])
+            )
+
+            if np.any(mdp.costs[a] != first_costs):
+                return None
+
+            probabilities = mdp.probabilities[a]
+
+            move[a, y[sources[moves]], x[sources[moves]]] = (
+                probabilities[moves]
+            )
+            stay[a, y[sources[~moves]], x[sources[~moves]]] = (
+                probabilities[~moves]
+            )
+
+            costs[a, y[sources], x[sources]] = mdp.costs[a]
+            available[a, y[rows], x[rows]] = True
+
+        return cls(mdp, offsets, stay, move, costs, available)
+
+    def to_grid(self, vector, fill=0.0):
+        """
+        Description
+        -----------
+        Places a value of each state on its cell.
+
+        Parameters
+        ----------
+        vector: numpy.ndarray \\
+            -- Value of each state, indexed by the state's id.
+
+        fill: float \\
+            -- Value of the cells that are not states. default = 0.0.
+
+        Returns
+        -------
+        numpy.ndarray \\
+            -- Array shaped `shape`.
+        """
+
+        grid = np.full(self.shape, fill, dtype=vector.dtype)
+
+        grid[self.y, self.x] = vector
+
+        return grid
+
+    def to_vector(self, grid):
+        """
+        Description
+        -----------
+        Reads the value of each state from its cell.
+
+        Parameters
+        ----------
+        grid: numpy.ndarray \\
+            -- Array shaped `shape`.
+
+        Returns
+        -------
+        numpy.ndarray \\
+            -- Value of each state, indexed by the state's id.
+        """
+
+        return grid[self.y, self.x]
+
+    def q_values(self, costs):
+        """
+        Description
+        -----------
+        Computes the cost of taking each action on each cell, with
+        the same terms as `CompiledMDP.q_values`, so the results are
+        the same.
+
+        Parameters
+        ----------
+        costs: numpy.ndarray \\
+            -- Current cost of each cell.
+
+        Returns
+        -------
+        numpy.ndarray \\
+            -- Array shaped (number of actions, rows, columns), actions
+            that are not available cost `inf`.
+        """
+
+        rows, columns = self.shape
+
+        padded = self.padded
+        padded[1:-1, 1:-1] = costs
+
+        q = np.empty((len(DIRECTIONS),) + self.shape)
+
+        for a, offset in enumerate(self.offsets):
+            q[a] = self.stay[a] * (self.costs[a] + costs)
+
+            if offset is not None:
+                dx, dy = offset
+
+                shifted = padded[
+                    1 + dy:rows + 1 + dy, 1 + dx:columns + 1 + dx
+                ]
+
+                q[a] += self.move[a] * (self.costs[a] + shifted)
+
+        q[self.unavailable] = np.inf
+
+        return q
+
+    def bellman_backup(self, costs, goal):
+        """
+        Description
+        -----------
+        Computes the new cost and the policy of every cell, breaking
+        ties like `CompiledMDP.select_actions`.
+
+        Parameters
+        ----------
+        costs: numpy.ndarray \\
+            -- Current cost of each cell.
+
+        goal: int \\
+            -- Id of the goal state.
+
+        Returns
+        -------
+        new_costs: numpy.ndarray \\
+            -- The new cost of each cell.
+
+        policies: numpy.ndarray \\
+            -- Index in `DIRECTIONS` of the action selected for each
+            cell, -1 when there is no action (goal and walls included).
+        """
+
+        q = self.q_values(costs)
+
+        last = len(DIRECTIONS) - 1
+
+        policies = last - np.argmin(q[::-1], axis=0)
+
+        new_costs = np.take_along_axis(q, policies[None], axis=0)[0]
+
+        no_action = np.isinf(new_costs)
+
+        new_costs[no_action] = 0.0
+        policies[no_action] = -1
+
+        goal_cell = (self.y[goal], self.x[goal])
+
+        new_costs[goal_cell] = 0.0
+        policies[goal_cell] = -1
+
+        return new_costs, policies
+
+
+class StencilValueIteration(SparseValueIteration):
+    """
+    Description
+    -----------
+    Class that defines the Value Iteration algorithm on a GridStencil(),
+    when the test fits on a grid, so that each iteration is made of
+    shifted slices of 2D arrays instead of gathering the end states of
+    each action.
+
+    Tests that don't fit on a grid fall back to the
+    `SparseValueIteration`.
+
+    It produces the same `costs`, `policies` and `answer_grid`
+    as the `SparseValueIteration` class.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object, based on which the algorithm will run.
+
+    epsilon: float \\
+        -- Used to stop tha algorithm. default = 1.0.
+
+    initial_cost: str \\
+        -- One of `INITIAL_COSTS`, see `ValueIteration`.
+        default = 'manhattan'.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    Attributes
+    ----------
+    stencil: GridStencil() \\
+        -- The grid, None when the test doesn't fit on one.
+
+    cost_grid: numpy.ndarray \\
+        -- Current cost of each cell.
+
+    policy_grid: numpy.ndarray \\
+        -- Index in `DIRECTIONS` of the policy of each cell.
+    """
+
+    def __init__(self, test, epsilon=1.0, initial_cost='manhattan',
+                 profiler=None):
+        super().__init__(
+            test, epsilon=epsilon, initial_cost=initial_cost,
+            profiler=profiler
+        )
+
+        self.stencil = None
+
+        self.cost_grid = None
+        self.policy_grid = None
+
+    def __repr__(self):
+        return f'StencilValueIteration({self.file_name})'
+
+    def __str__(self):
+        backend = 'sparse' if self.stencil is None else 'stencil'
+
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Initial: {self.init}
+Goal: {self.goal}
+Epsilon: {self.epsilon}
+Backend: {backend}
+
+Time: {self.time_elapsed} ms
+    Compile Time: {self.compile_time_elapsed} ms
+Iterations: {self.iterations}
+
+Costs: {self.costs}
+Policies: {self.policies}
+
+Grid: {self.grid}
+
+AnswerGrid: {self.answer_grid}'''
+
+    def compile(self):
+        """
+        Description
+        -----------
+        Compiles the StateSpace() into a CompiledMDP() and lays it out
+        on a GridStencil(), if it fits.
+        """
+
+        super().compile()
+
+        self.stencil = GridStencil.from_mdp(self.mdp)
+
+    def calculate_initial_cost(self):
+        """
+        Description
+        -----------
+        Computes the initial cost of each state, like
+        `SparseValueIteration`, and places it on the grid.
+        """
+
+        super().calculate_initial_cost()
+
+        if self.stencil is not None:
+            self.cost_grid = self.stencil.to_grid(self.cost_vector)
+
+    def update_costs_and_policies(self):
+        """
+        Description
+        -----------
+        Updates the cost and the repective policy for each cell
+        with a single Bellman backup over the whole grid.
+
+        Then computes the difference between each new cost and the old cost.
+        """
+
+        if self.stencil is None:
+            return super().update_costs_and_policies()
+
+        start = self.profiler.start()
+
+        new_costs, self.policy_grid = self.stencil.bellman_backup(
+            self.cost_grid, self.goal_id
+        )
+
+        self.profiler.stop('backup', start)
+
+        start = self.profiler.start()
+
+        # The cells that are not states are always 0
+        self.max_residual = float(np.max(np.abs(new_costs - self.cost_grid)))
+
+        self.profiler.stop('residual', start)
+
+        self.cost_grid = new_costs
+
+        self.backups += len(self.mdp) - 1
+
+    def update_states(self):
+        """
+        Description
+        -----------
+        Reads the vectors from the grids, then updates each State()
+        like `SparseValueIteration.update_states`.
+        """
+
+        if self.stencil is not None and self.policy_grid is not None:
+            self.cost_vector = self.stencil.to_vector(self.cost_grid)
+            self.policy_vector = self.stencil.to_vector(self.policy_grid)
+
+        super().update_states()
@@ -0,0 +1,245 @@
+import os
+import random
+import numpy as np
+import pytest
+from tests import list_test_files
+from compiled_mdp import DIRECTIONS
+from benchmarks import load_test, compare_solutions
+from value_iteration import ValueIteration
+from sparse_value_iteration import SparseValueIteration
+from stencil_value_iteration import StencilValueIteration
+from parallel_value_iteration import ParallelValueIteration
+from jit_value_iteration import JitValueIteration
+from multigrid_value_iteration import MultigridValueIteration
+from batched_value_iteration import BatchedValueIteration
+from solver_session import SolverSession, WARM_STARTS
+from prioritized_sweeping import PrioritizedSweeping
+
+
+# The small tests, and a RandomGoal one, where the cell of the old
+# goal is a dead end that can't reach the other goals.
+TEST_PATHS = [
+    path for path in list_test_files('FixedGoal')
+    if os.path.basename(path) in [
+        'class_example.net', 'a_test.net', 'navigation_1.net'
+    ]
+] + [
+    path for path in list_test_files('RandomGoal')
+    if os.path.basename(path) == 'navigation_1.net'
+]
+
+TEST_IDS = [
+    os.path.join(
+        os.path.basename(os.path.dirname(path)), os.path.basename(path)
+    )
+    for path in TEST_PATHS
+]
+
+# Stopping criteria of the solvers that follow the same iterations
+# as the ValueIteration, so they must give the same answer.
+EPSILON = 0.1
+
+# Stopping criteria of the solvers that take another path to the
+# costs, small enough for every solver to be close to the real costs.
+TIGHT_EPSILON = 1e-6
+
+TOLERANCE = 1e-3
+
+# Number of goals solved by the solvers that answer many goals.
+GOALS = 3
+
+
+def get_goals(path):
+    """
+    Description
+    -----------
+    Returns the goal of a test file followed by random states, with
+    a fixed seed, used as the goals of the solvers that answer many.
+    """
+
+    test = load_test(path, 'bulk')
+
+    names = [name for name in test.states if name != test.goal_state.name]
+
+    return [test.goal_state.name] + random.Random(0).sample(
+        names, min(GOALS - 1, len(names))
+    )
+
+
+def solve_reference(path, epsilon, goal=None):
+    """
+    Description
+    -----------
+    Runs the `ValueIteration` on a test file, with another goal
+    if `goal` is given.
+
+    Returns
+    -------
+    ValueIteration() \\
+        -- The solver, after running.
+    """
+
+    test = load_test(path, 'bulk')
+
+    if goal is not None:
+        test.goal_state = test.states.get_state(goal)
+
+    solver = ValueIteration(test, epsilon=epsilon)
+
+    solver.run()
+
+    return solver
+
+
+def to_vectors(mdp, costs, policies):
+    """
+    Description
+    -----------
+    Converts the `costs` and `policies` dicts of a solver to vectors
+    indexed by the ids of the CompiledMDP().
+
+    Returns
+    -------
+    costs: numpy.ndarray \\
+        -- Cost of each state.
+
+    policies: numpy.ndarray \\
+        -- Index in `DIRECTIONS` of the policy of each state, -1 when
+        there is none.
+    """
+
+    cost_vector = np.array([costs[name] for name in mdp.names], dtype=float)
+
+    policy_vector = np.array([
+        DIRECTIONS.index(policies[name])
+        if policies[name] in DIRECTIONS else -1
+        for name in mdp.names
+    ], dtype=np.int64)
+
+    return cost_vector, policy_vector
+
+
+def assert_close_to_reference(path, mdp, costs, policies, goal=None):
+    """
+    Description
+    -----------
+    Checks a solution found with `TIGHT_EPSILON` against the
+    `ValueIteration`, see `compare_solutions`.
+
+    Parameters
+    ----------
+    path: str \\
+        -- Path to the test file.
+
+    mdp: CompiledMDP() \\
+        -- The compiled test, the ids of `costs` and `policies`.
+
+    costs: numpy.ndarray \\
+        -- Cost of each state.
+
+    policies: numpy.ndarray \\
+        -- Index in `DIRECTIONS` of the policy of each state.
+
+    goal: str \\
+        -- Name of the goal, if not the one of the test file.
+    """
+
+    reference = solve_reference(path, TIGHT_EPSILON, goal)
+
+    reference_costs, _ = to_vectors(
+        mdp, reference.costs, reference.policies
+    )
+
+    goal = mdp.index[reference.goal.name]
+
+    max_cost_diff, policy_diffs = compare_solutions(
+        mdp, goal, costs, policies, reference_costs, TOLERANCE
+    )
+
+    assert max_cost_diff < TOLERANCE
+    assert policy_diffs == 0
+
+
+@pytest.mark.parametrize('path', TEST_PATHS, ids=TEST_IDS)
+@pytest.mark.parametrize('algorithm', [
+    SparseValueIteration, StencilValueIteration, JitValueIteration,
+    ParallelValueIteration
+])
+def test_same_iterations_as_value_iteration(algorithm, path):
+    reference = solve_reference(path, EPSILON)
+
+    solver = algorithm(load_test(path, 'bulk'), epsilon=EPSILON)
+
+    solver.run()
+
+    assert solver.iterations == reference.iterations
+    assert solver.policies == reference.policies
+
+    for name, cost in reference.costs.items():
+        assert solver.costs[name] == pytest.approx(cost, abs=1e-9)
+
+
+@pytest.mark.parametrize('path', TEST_PATHS, ids=TEST_IDS)
+def test_multigrid(path):
+    solver = MultigridValueIteration(
+        load_test(path, 'bulk'), epsilon=TIGHT_EPSILON
+    )
+
+    solver.run()
+
+    costs, policies = to_vectors(solver.mdp, solver.costs, solver.policies)
+
+    assert_close_to_reference(path, solver.mdp, costs, policies)
+
+
+@pytest.mark.parametrize('path', TEST_PATHS, ids=TEST_IDS)
+def test_batched(path):
+    goals = get_goals(path)
+
+    solver = BatchedValueIteration(
+        load_test(path, 'bulk'), goals, epsilon=TIGHT_EPSILON
+    )
+
+    solver.run()
+
+    for goal in goals:
+        solution = solver.solutions[goal]
+
+        assert_close_to_reference(
+            path, solver.mdp, solution.costs, solution.policies, goal
+        )
+
+
+@pytest.mark.parametrize('path', TEST_PATHS, ids=TEST_IDS)
+@pytest.mark.parametrize('warm_start', WARM_STARTS)
+def test_session(warm_start, path):
+    session = SolverSession(
+        load_test(path, 'bulk'), epsilon=TIGHT_EPSILON,
+        warm_start=warm_start
+    )
+
+    # One after the other, so that 'previous' starts from the
+    # costs of the goal before
+    for goal in get_goals(path):
+        solution = session.solve(goal)
+
+        assert_close_to_reference(
+            path, session.mdp, solution.costs, solution.policies, goal
+        )
+
+
+@pytest.mark.parametrize('path', TEST_PATHS, ids=TEST_IDS)
+def test_prioritized_sweeping_residual(path):
+    solver = PrioritizedSweeping(load_test(path, 'bulk'), epsilon=EPSILON)
+
+    solver.run()
+
+    residual = max(
+        abs(
+            solver.get_bellman_cost(solver.states.get_state(name))
+            - solver.costs[name]
+        )
+        for name in solver.states
+    )
+
+    assert residual < EPSILON
@@ -1,6 +1,74 @@
 import os
+import fnmatch
 from states import StateSpace
+from array_states import ArrayStateSpace
 from grids import Grid
+from net_parser import parse_net_file
+from net_cache import NetCache
+from profiler import Profiler
+
+
+TESTS_FOLDER = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'TestesGrid'
+)
+
+
+def list_test_files(test_type):
+    """
+    Description
+    -----------
+    Function used to list the test files of a type, sorted by name.
+
+    Parameters
+    ----------
+    test_type: str \\
+        -- 'FixedGoal' or 'RandomGoal', used to find the folder.
+
+    Returns
+    -------
+    list \\
+        -- A list of paths to the test files.
+    """
+
+    tests_folder = os.path.join(TESTS_FOLDER, f'{test_type}InitialState')
+
+    return [
+        os.path.join(tests_folder, test)
+        for test in sorted(os.listdir(tests_folder))
+    ]
+
+
+def count_states(test_path):
+    """
+    Description
+    -----------
+    Function used to count the states of a test file, reading only
+    the lines up to the end of the states section.
+
+    Parameters
+    ----------
+    test_path: str \\
+        -- Path to the test file.
+
+    Returns
+    -------
+    int \\
+        -- The number of states.
+    """
+
+    states = 0
+
+    with open(test_path, 'r') as test_file:
+        for line in test_file:
+            line = line.strip()
+
+            if line == 'endstates':
+                break
+
+            if line != 'states' and line != '':
+                states += len([name for name in line.split(',') if name])
+
+    return states
 
 
 class LoadTests():
@@ -9,7 +77,33 @@ class LoadTests():
     -----------
     Class used to load and store tests.
     When instantiated, it will call the function
-    responsible for loading the tests.
+    responsible for finding the tests, which are only
+    read when their TestSet() is iterated.
+
+    Parameters
+    ----------
+    parser: str \\
+        -- Parser used by each Test(), see `Test`. default = 'line'.
+
+    cache: bool \\
+        -- If True, the files are loaded from a NetCache() stored in
+        `TestesGrid/.cache`, and parsed only when they change. \\
+        default = False.
+
+    rebuild_cache: bool \\
+        -- If True, every entry of the cache is rebuilt. default = False.
+
+    profile: bool \\
+        -- If True, each Test() gets an enabled Profiler(), labeled with
+        its folder and file name. default = False.
+
+    names: list \\
+        -- If given, only the tests whose file name matches one of these
+        patterns are loaded, see `TestSet.filter`. default = None.
+
+    max_states: int \\
+        -- If given, only the tests with at most this number of states
+        are loaded. default = None.
 
     Attributes
     ----------
@@ -24,14 +118,37 @@ class LoadTests():
     current_file_folder: str \\
         -- A string containing the full path to the folder
         where this file is stored.
+
+    parser: str \\
+        -- Parser used by each Test().
+
+    net_cache: NetCache() \\
+        -- The cache used to load the files, None if it is not used.
+
+    profile: bool \\
+        -- If True, the tests are loaded with an enabled Profiler().
     """
 
-    def __init__(self):
+    def __init__(self, parser='line', cache=False, rebuild_cache=False,
+                 profile=False, names=None, max_states=None):
         self.fixed_goal_tests = TestSet()
         self.random_goal_tests = TestSet()
 
+        self.names = names
+        self.max_states = max_states
+
+        self.parser = parser
+        self.profile = profile
+
         self.current_file_folder = os.path.dirname(os.path.abspath(__file__))
 
+        self.net_cache = None
+
+        if cache:
+            self.net_cache = NetCache(
+                os.path.join(TESTS_FOLDER, '.cache'), rebuild=rebuild_cache
+            )
+
         self.load_tests()
 
     def load_tests(self):
@@ -41,41 +158,50 @@ class LoadTests():
         Function used to add tests to both TestSet() instances of the class.
         """
 
-        self.fixed_goal_tests.add_testset_list(self.read_tests('FixedGoal'))
-        self.random_goal_tests.add_testset_list(self.read_tests('RandomGoal'))
+        self.fixed_goal_tests = TestSet(
+            list_test_files('FixedGoal'), self.read_test
+        ).filter(names=self.names, max_states=self.max_states)
 
-    def read_tests(self, test_type):
+        self.random_goal_tests = TestSet(
+            list_test_files('RandomGoal'), self.read_test
+        ).filter(names=self.names, max_states=self.max_states)
+
+    def read_test(self, test_path):
         """
         Description
         -----------
-        Function used to open and read the test files.
-        It instantiates Test() objects using the files
-        as parameters and appends them to a list.
+        Function used to open and read a test file.
+        It instantiates a Test() object using the file
+        as parameter, then closes the file.
 
         Parameters
         ----------
-        test_type: str \\
-            -- A str that is used to get the type of the test,
-            this information will be used to find the folder.
+        test_path: str \\
+            -- Path to the test file.
 
         Returns
         -------
-        list \\
-            -- A list of Test() objects.
+        Test() \\
+            -- The Test() read from the file.
         """
 
-        tests_folder = os.path.join(
-            self.current_file_folder, 'TestesGrid', f'{test_type}InitialState'
+        profiler = Profiler(
+            label=os.path.join(
+                os.path.basename(os.path.dirname(test_path)),
+                os.path.basename(test_path)
+            ),
+            enabled=self.profile
         )
 
-        tests = []
-
-        for test in sorted(os.listdir(tests_folder)):
-            test_file = open(os.path.join(tests_folder, test), 'r+')
-
-            tests.append(Test(test_file))
+        with open(test_path, 'r') as test_file:
+            if self.net_cache is not None:
+                return Test(
+                    test_file, parser=self.parser,
+                    parsed_net=self.net_cache.get(test_path),
+                    profiler=profiler
+                )
 
-        return tests
+            return Test(test_file, parser=self.parser, profiler=profiler)
 
 
 class TestSet():
@@ -84,31 +210,84 @@ class TestSet():
     -----------
     Class used to store tests.
 
+    Only the paths are stored, each Test() is read when it is reached
+    while iterating, so the tests are never all in memory at the same
+    time: a Test() can be freed as soon as the loop moves on to the
+    next one, if nothing else keeps it.
+
+    Parameters
+    ----------
+    test_paths: list \\
+        -- Paths to the test files. default = None, which is empty.
+
+    read_test: function \\
+        -- Function that reads a path into a Test(). default = None.
+
     Attributes
     ----------
-    tests: list \\
-        -- A list containing all the tests loaded.
+    test_paths: list \\
+        -- Paths to the test files.
+
+    read_test: function \\
+        -- Function that reads a path into a Test().
     """
 
-    def __init__(self):
-        self.tests = []
+    def __init__(self, test_paths=None, read_test=None):
+        self.test_paths = list(test_paths) if test_paths is not None else []
+
+        self.read_test = read_test
+
+    def __repr__(self):
+        return f'TestSet({len(self.test_paths)})'
 
     def __iter__(self):
-        return iter(self.tests)
+        for test_path in self.test_paths:
+            yield self.read_test(test_path)
+
+    def __len__(self):
+        return len(self.test_paths)
 
-    def add_testset_list(self, test_set_list):
+    def filter(self, names=None, max_states=None):
         """
         Description
         -----------
-        Function used to update the `tests` attribute.
+        Function used to select some of the tests, without reading them.
 
         Parameters
         ----------
-        test_set_list: list \\
-            -- A list containing the Test() objects.
+        names: list \\
+            -- Patterns matched against the file name of each test, like
+            'navigation_*' or 'navigation_[12].net'. default = None,
+            which keeps every test.
+
+        max_states: int \\
+            -- Largest number of states a test can have, counted with
+            `count_states`. default = None, which keeps every test.
+
+        Returns
+        -------
+        TestSet() \\
+            -- A TestSet() with the selected tests.
         """
 
-        self.tests = test_set_list
+        test_paths = self.test_paths
+
+        if names is not None:
+            test_paths = [
+                test_path for test_path in test_paths
+                if any(
+                    fnmatch.fnmatch(os.path.basename(test_path), name)
+                    for name in names
+                )
+            ]
+
+        if max_states is not None:
+            test_paths = [
+                test_path for test_path in test_paths
+                if count_states(test_path) <= max_states
+            ]
+
+        return TestSet(test_paths, self.read_test)
 
 
 class Test():
@@ -123,6 +302,19 @@ class Test():
     test_file: file \\
         -- The file conataining the test info.
 
+    parser: str \\
+        -- 'line' reads the file one line at a time,
+        'bulk' uses `parse_net_file` and 'array' also uses it, but stores
+        the states in an ArrayStateSpace(). default = 'line'.
+
+    parsed_net: ParsedNet() \\
+        -- An already parsed version of the file, usually from a
+        NetCache(). If given, the file is not read. default = None.
+
+    profiler: Profiler() \\
+        -- Where the time spent loading the file is recorded, as
+        the 'parse' span. default = None, which records nothing.
+
     Attributes
     ----------
     file: file \\
@@ -140,8 +332,12 @@ class Test():
     current_line: str \\
         -- The current line that was read from the file.
 
+    parser: str \\
+        -- Parser used to load the file.
+
     states: StateSpace() \\
-        -- A StateSpace() instance that has the states read from the file.
+        -- A StateSpace() instance that has the states read from the file,
+        or an ArrayStateSpace() when using the 'array' parser.
 
     initial_state: State() \\
         -- The initial state read from the file.
@@ -151,9 +347,17 @@ class Test():
 
     grid: Grid() \\
         -- A Grid() instance that stores the grid read form the file.
+
+    parsed_net: ParsedNet() \\
+        -- The compact arrays read from the file,
+        only when using the 'bulk' parser or a cache.
+
+    profiler: Profiler() \\
+        -- Where the time spent loading the file is recorded.
     """
 
-    def __init__(self, test_file):
+    def __init__(self, test_file, parser='line', parsed_net=None,
+                 profiler=None):
         self.file = test_file
         self.file_name = os.path.basename(self.file.name)
         self.full_folder = os.path.dirname(self.file.name)
@@ -165,10 +369,25 @@ class Test():
         self.goal_state = None
         self.grid = Grid()
 
-        self.load_attributes()
+        self.parser = parser
+        self.parsed_net = parsed_net
+
+        if profiler is None:
+            profiler = Profiler(enabled=False)
+
+        self.profiler = profiler
+
+        start = self.profiler.start()
+
+        if parser in ['bulk', 'array'] or parsed_net is not None:
+            self.load_parsed_attributes()
+        else:
+            self.load_attributes()
 
         self.update_coordinates()
 
+        self.profiler.stop('parse', start)
+
     def __repr__(self):
         return f'Test({self.file_name})'
 
@@ -234,6 +453,36 @@ Grid: {self.grid}'''
 
         self.load_grid()
 
+    def load_parsed_attributes(self):
+        """
+        Description
+        -----------
+        Function used to update the same attributes as `load_attributes`,
+        but parsing the whole file at once with `parse_net_file`.
+        """
+
+        if self.parsed_net is None:
+            self.parsed_net = parse_net_file(self.file.name)
+
+        if self.parser == 'array':
+            self.states = ArrayStateSpace(self.parsed_net)
+
+            for row in self.parsed_net.grid:
+                self.grid.add_row(row)
+
+            self.initial_state = self.states.get_state_by_id(
+                self.parsed_net.initial_state
+            )
+            self.goal_state = self.states.get_state_by_id(
+                self.parsed_net.goal_state
+            )
+
+            return
+
+        self.initial_state, self.goal_state = self.parsed_net.populate(
+            self.states, self.grid
+        )
+
     def load_states(self):
         """
         Description
@@ -0,0 +1,332 @@
+import os
+from value_iteration import ValueIteration
+
+
+class TopologicalValueIteration(ValueIteration):
+    """
+    Description
+    -----------
+    Class that defines the Topological Value Iteration algorithm.
+
+    The states are split into strongly connected components of the
+    graph where each state points to the end states of its actions.
+    A component only depends on the components it can reach, so they
+    are solved one at a time, in reverse topological order, each one
+    until its own residual is smaller than `epsilon`. Converged
+    components are never swept again.
+
+    It inherits most of its attributes and methods from
+    the `ValueIteration` class.
+
+    Parameters
+    ----------
+    test: Test() \\
+        -- Test() object, based on which the algorithm will run.
+
+    epsilon: float \\
+        -- Used to stop tha algorithm. default = 1.0.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded. default = None.
+
+    Attributes
+    ----------
+    iterations: int \\
+        -- The number of sweeps, added up over all the components.
+
+    components: list \\
+        -- Lists of names of the states of each component,
+        in the order they are solved.
+
+    component_iterations: list \\
+        -- Number of sweeps each component took to converge.
+
+    scc_time_elapsed: float \\
+        -- Time in milliseconds spent finding the components.
+
+    solve_time_elapsed: float \\
+        -- Time in milliseconds spent solving the components.
+    """
+
+    def __init__(self, test, epsilon=1.0, profiler=None):
+        super().__init__(test, epsilon=epsilon, profiler=profiler)
+
+        self.components = []
+        self.component_iterations = []
+
+        self.scc_time_elapsed = 0
+        self.solve_time_elapsed = 0
+
+    def __repr__(self):
+        return f'TopologicalValueIteration({self.file_name})'
+
+    def __str__(self):
+        largest = max([len(c) for c in self.components], default=0)
+
+        return f'''File: {os.path.join(self.folder_name, self.file_name)}
+Initial: {self.init}
+Goal: {self.goal}
+Epsilon: {self.epsilon}
+
+Time: {self.time_elapsed} ms
+    SCC Time: {self.scc_time_elapsed} ms
+    Solve Time: {self.solve_time_elapsed} ms
+Iterations: {self.iterations}
+Backups: {self.backups}
+Components: {len(self.components)} (largest: {largest} states)
+
+Costs: {self.costs}
+Policies: {self.policies}
+
+Grid: {self.grid}
+
+AnswerGrid: {self.answer_grid}'''
+
+    def run(self):
+        """
+        Description
+        -----------
+        Runs the algorithm, storing number of iterations and time elapsed.
+        """
+
+        self.calculate_initial_cost()
+
+        self.scc_time_elapsed = self.time_it(
+            self.find_components, span='scc'
+        )
+
+        self.solve_time_elapsed = self.time_it(
+            self.solve_components, span='backup'
+        )
+
+        self.solve_time_elapsed += self.time_it(
+            self.update_policies, span='argmin'
+        )
+
+        self.time_elapsed = self.scc_time_elapsed + self.solve_time_elapsed
+
+        self.update_answer()
+
+    def get_successors(self, state):
+        """
+        Description
+        -----------
+        Returns the names of the states the actions of a state lead to.
+        The goal has no successors, since its cost never changes.
+
+        Parameters
+        ----------
+        state: State() \\
+            -- The state where the actions begin.
+
+        Returns
+        -------
+        list \\
+            -- Names of the end states, without repetitions.
+        """
+
+        if state == self.goal:
+            return []
+
+        successors = {}
+
+        for action in state.actions:
+            for end, probability in action.end:
+                successors.update({end.name: None})
+
+        return list(successors)
+
+    def find_components(self):
+        """
+        Description
+        -----------
+        Finds the strongly connected components with Tarjan's algorithm,
+        using an explicit stack instead of recursion, since the
+        components of the larger grids are deeper than Python's
+        recursion limit.
+
+        Tarjan's algorithm finishes a component only after every
+        component reachable from it, so the order it finds them
+        is already the order they must be solved.
+        """
+
+        index = {}
+        lowlink = {}
+
+        stack = []
+        on_stack = set()
+
+        for root in self.states:
+            if root in index:
+                continue
+
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+
+            work = [(root, iter(self.get_successors(
+                self.states.get_state(root)
+            )))]
+
+            while work:
+                name, successors = work[-1]
+
+                advanced = False
+
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = lowlink[successor] = len(index)
+                        stack.append(successor)
+                        on_stack.add(successor)
+
+                        work.append((successor, iter(self.get_successors(
+                            self.states.get_state(successor)
+                        ))))
+
+                        advanced = True
+
+                        break
+
+                    elif successor in on_stack:
+                        lowlink[name] = min(lowlink[name], index[successor])
+
+                if advanced:
+                    continue
+
+                work.pop()
+
+                if work:
+                    parent = work[-1][0]
+
+                    lowlink[parent] = min(lowlink[parent], lowlink[name])
+
+                if lowlink[name] == index[name]:
+                    component = []
+
+                    while True:
+                        member = stack.pop()
+                        on_stack.remove(member)
+
+                        component.append(member)
+
+                        if member == name:
+                            break
+
+                    self.components.append(component)
+
+    def solve_components(self):
+        """
+        Description
+        -----------
+        Solves each component with Value Iteration sweeps restricted to
+        its states. The states of the components solved before are
+        already converged and are only read.
+        """
+
+        for component in self.components:
+            iterations = 0
+
+            members = set(component)
+
+            # States of the components solved before where the policies
+            # of this component may lead
+            boundary = {
+                end.name
+                for name in component
+                for action in self.states.get_state(name).actions
+                for end, probability in action.end
+                if end.name not in members
+            }
+
+            max_residual = self.epsilon
+
+            while max_residual >= self.epsilon:
+                self.clean_component(members, boundary)
+
+                max_residual = self.update_component(component)
+
+                iterations += 1
+
+            self.component_iterations.append(iterations)
+
+            self.iterations += iterations
+
+        self.max_residual = 0.0
+
+    def clean_component(self, members, boundary):
+        """
+        Description
+        -----------
+        Cleans the `policy_predecessors` added by the last sweep of a
+        component, like `update_costs_and_policies` does before each
+        iteration, so that they are not repeated on every sweep.
+
+        The states of the component only have predecessors from the
+        component itself, the components that lead to it are solved
+        later, so they are cleaned. The states on the `boundary` keep
+        the predecessors from their own component.
+
+        Parameters
+        ----------
+        members: set \\
+            -- Names of the states of the component.
+
+        boundary: set \\
+            -- Names of the states outside of the component
+            its actions lead to.
+        """
+
+        for name in members:
+            self.states.get_state(name).clean_policy_predecessors()
+
+        for name in boundary:
+            state = self.states.get_state(name)
+
+            state.policy_predecessors = [
+                predecessor for predecessor in state.policy_predecessors
+                if predecessor.name not in members
+            ]
+
+    def update_component(self, component):
+        """
+        Description
+        -----------
+        Updates the costs of the states of a component once, reading the
+        costs from before the sweep, like `update_costs_and_policies`.
+
+        Parameters
+        ----------
+        component: list \\
+            -- Names of the states of the component.
+
+        Returns
+        -------
+        float \\
+            -- The maximum residual of the component.
+        """
+
+        new_costs = {}
+
+        for name in component:
+            state = self.states.get_state(name)
+
+            new_cost = 0
+
+            if state != self.goal:
+                new_cost, policy = self.get_min_cost(state, self.costs)
+
+                self.backups += 1
+
+            new_costs.update({name: new_cost})
+
+        max_residual = 0
+
+        for name, new_cost in new_costs.items():
+            residual = abs(new_cost - self.costs[name])
+
+            if residual > max_residual:
+                max_residual = residual
+
+        self.costs.update(new_costs)
+
+        return max_residual
@@ -1,6 +1,28 @@
 import os
 import time
+from collections import deque
+from scipy import sparse
+from scipy.sparse import linalg
 from grids import AnswerGrid
+from profiler import Profiler
+from determinization import DETERMINIZATIONS, get_goal_distances
+
+
+# 'jacobi' reads the costs of the previous iteration,
+# 'gauss-seidel' reads the costs already updated in the current one.
+MODES = ['jacobi', 'gauss-seidel']
+
+# 'default' follows the StateSpace(), 'goal-distance' starts from the
+# goal and follows the predecessors, breadth-first.
+ORDERS = ['default', 'goal-distance']
+
+# 'manhattan' ignores the walls, the others are the costs of
+# `get_goal_distances` with that determinization.
+INITIAL_COSTS = ['manhattan'] + DETERMINIZATIONS
+
+# The initial costs that never overestimate the real ones, the only
+# ones that can be the lower bound of the bounded stopping.
+LOWER_BOUND_COSTS = ['manhattan', 'all-outcome']
 
 
 class ValueIteration():
@@ -19,6 +41,43 @@ class ValueIteration():
     epsilon: float \\
         -- Used to stop tha algorithm. default = 1.0.
 
+    mode: str \\
+        -- One of `MODES`. 'gauss-seidel' updates the costs in place, so
+        the states later in the sweep use the new costs. default = 'jacobi'.
+
+    order: str \\
+        -- One of `ORDERS`, the order in which the states are updated
+        on each iteration. default = 'default'.
+
+    skip_converged: bool \\
+        -- If True, a state is only updated when its own residual or the
+        residual of a state its actions lead to was not smaller than
+        `epsilon` on the previous iteration, the others keep their costs
+        and policies. default = False.
+
+    bounded: bool \\
+        -- If True, an upper bound of the costs is updated along with
+        the costs, which are a lower bound, and the algorithm stops when
+        the largest gap between them is smaller than `epsilon`, instead
+        of the residual. The upper bound starts from the exact cost of a
+        policy that always moves closer to the goal, so it is never
+        below the real cost. The lower bound only holds when the
+        manhattan distance does not overestimate the cost, which is the
+        case on the navigation files, where every move costs 1.
+        Only the `initial_cost` in `LOWER_BOUND_COSTS` can be used.
+        default = False.
+
+    initial_cost: str \\
+        -- One of `INITIAL_COSTS`, the costs the states start from.
+        'all-outcome' never overestimates the costs either, and is
+        closer to them than the manhattan distance where there are
+        walls. 'most-likely' can overestimate them, so it can't be
+        used with `bounded`. default = 'manhattan'.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded, see `Profiler`.
+        default = None, which records nothing.
+
     Attributes
     ----------
     name: str \\
@@ -52,6 +111,10 @@ class ValueIteration():
     iterations: int \\
         -- The number of iterations the algorithms took to converge.
 
+    backups: int \\
+        -- The number of times the cost of a single state was computed
+        from the costs of the states its actions lead to.
+
     answer_grid: ArrowsGrid() \\
         -- A grid that represents the direction to follow when on each state.
 
@@ -67,9 +130,49 @@ class ValueIteration():
         -- The maximum difference by subtracting the past costs of
         each state from the current costs. Used to stop the algorithm
         along with `epsilon`.
+
+    mode: str \\
+        -- One of `MODES`.
+
+    order: str \\
+        -- One of `ORDERS`.
+
+    sweep_order: list \\
+        -- Names of the states in the order they are updated.
+
+    skip_converged: bool \\
+        -- If the converged states are skipped.
+
+    active_states: set \\
+        -- Names of the states updated on the next iteration,
+        None when every state is.
+
+    bounded: bool \\
+        -- If the algorithm stops on the gap between the bounds.
+
+    upper_costs: dict \\
+        -- A dict containing (name of the state, upper bound of the cost)
+        tuples, only used if `bounded` is True. States that can't reach
+        the goal are left out.
+
+    gap: float \\
+        -- The largest difference between the upper bound and the cost
+        of a state.
+
+    initial_cost: str \\
+        -- One of `INITIAL_COSTS`.
+
+    initial_time_elapsed: float \\
+        -- Time in milliseconds spent computing the initial costs,
+        included in `time_elapsed`, 0 for 'manhattan'.
+
+    profiler: Profiler() \\
+        -- Where the time of each step is recorded.
     """
 
-    def __init__(self, test, epsilon=1.0):
+    def __init__(self, test, epsilon=1.0, mode='jacobi', order='default',
+                 skip_converged=False, bounded=False,
+                 initial_cost='manhattan', profiler=None):
         self.folder_name = test.folder_name
         self.file_name = test.file_name
 
@@ -84,6 +187,7 @@ class ValueIteration():
 
         self.time_elapsed = 0
         self.iterations = 0
+        self.backups = 0
         self.answer_grid = None
 
         self.costs = {}
@@ -92,6 +196,44 @@ class ValueIteration():
 
         self.max_residual = 1.0
 
+        if mode not in MODES:
+            raise ValueError(f'Unknown mode {mode}, use one of {MODES}')
+
+        if order not in ORDERS:
+            raise ValueError(f'Unknown order {order}, use one of {ORDERS}')
+
+        self.mode = mode
+        self.order = order
+
+        self.sweep_order = None
+
+        self.skip_converged = skip_converged
+        self.active_states = None
+
+        self.bounded = bounded
+        self.upper_costs = {}
+        self.gap = float('inf')
+
+        if initial_cost not in INITIAL_COSTS:
+            raise ValueError(
+                f'Unknown initial cost {initial_cost}, '
+                f'use one of {INITIAL_COSTS}'
+            )
+
+        if bounded and initial_cost not in LOWER_BOUND_COSTS:
+            raise ValueError(
+                f'The initial cost {initial_cost} is not a lower bound, '
+                f'use one of {LOWER_BOUND_COSTS} when bounded'
+            )
+
+        self.initial_cost = initial_cost
+        self.initial_time_elapsed = 0
+
+        if profiler is None:
+            profiler = Profiler(enabled=False)
+
+        self.profiler = profiler
+
     def __repr__(self):
         return f'ValueIteration({self.Test})'
 
@@ -100,9 +242,17 @@ class ValueIteration():
 Initial: {self.init}
 Goal: {self.goal}
 Epsilon: {self.epsilon}
+Mode: {self.mode}
+Order: {self.order}
+
+Skip Converged: {self.skip_converged}
+Bounded: {self.bounded}
 
 Time: {self.time_elapsed} ms
 Iterations: {self.iterations}
+Backups: {self.backups}
+Max Residual: {self.max_residual}
+Gap: {self.gap}
 
 Costs: {self.costs}
 Policies: {self.policies}
@@ -111,7 +261,7 @@ Grid: {self.grid}
 
 AnswerGrid: {self.answer_grid}'''
 
-    def time_it(self, func, *args):
+    def time_it(self, func, *args, span=None):
         """
         Description
         -----------
@@ -120,6 +270,9 @@ AnswerGrid: {self.answer_grid}'''
         start = current time - 0 \\
         time_elapsed = current time - start
 
+        The clock is `time.perf_counter_ns`, so short calls are not
+        reported as 0, and the time is not rounded.
+
         Parameters
         ----------
         func: function \\
@@ -127,15 +280,22 @@ AnswerGrid: {self.answer_grid}'''
 
         *args: list \\
             -- Arguments to be passed on to the function as parameters.
+
+        span: str \\
+            -- If given, the time is also added to this span of
+            the `profiler`. default = None.
         """
 
-        start = (time.time() * 1000)
+        start = time.perf_counter_ns()
 
         func_return = func(*args)
 
-        time_elapsed = (time.time() * 1000) - start
+        elapsed = time.perf_counter_ns() - start
 
-        time_elapsed = round(time_elapsed, 2)
+        if span is not None:
+            self.profiler.add(span, elapsed)
+
+        time_elapsed = elapsed / 1_000_000
 
         if func_return is not None:
             return time_elapsed, func_return
@@ -151,25 +311,67 @@ AnswerGrid: {self.answer_grid}'''
 
         self.calculate_initial_cost()
 
-        while self.max_residual >= self.epsilon:
+        if self.bounded:
+            self.time_elapsed += self.time_it(self.calculate_upper_cost)
+
+        while not self.has_converged():
             self.time_elapsed += self.time_it(
                 self.update_costs_and_policies
             )
 
             self.iterations += 1
 
+            self.profiler.sample(
+                'residual', self.iterations, self.max_residual
+            )
+
         self.update_answer()
 
+    def has_converged(self):
+        """
+        Description
+        -----------
+        Checks the stopping criteria, the gap between the bounds when
+        `bounded` is True, the residual otherwise.
+
+        Returns
+        -------
+        bool \\
+            -- True if the algorithm should stop.
+        """
+
+        if self.bounded:
+            return self.gap < self.epsilon
+
+        return self.max_residual < self.epsilon
+
     def calculate_initial_cost(self):
         """
         Description
         -----------
         Computes the initial cost of each state.
         The cost is simply the manhattan distance from
-        the state to the goal.
+        the state to the goal, or the cost found by
+        `get_goal_distances`, depending on `initial_cost`.
         """
 
+        if self.initial_cost != 'manhattan':
+            self.initial_time_elapsed, (distances, _) = self.time_it(
+                get_goal_distances, self.states, self.goal,
+                self.initial_cost, span='initial'
+            )
+
+            self.time_elapsed += self.initial_time_elapsed
+        else:
+            distances = {}
+
+        # States that can't reach the goal keep the manhattan distance
         for name in self.states:
+            if name in distances:
+                self.costs.update({name: distances[name]})
+
+                continue
+
             state = self.states.get_state(name)
 
             x_dif = abs(state.x - self.goal.x)
@@ -179,6 +381,146 @@ AnswerGrid: {self.answer_grid}'''
 
             self.costs.update({name: float(cost)})
 
+    def calculate_upper_cost(self):
+        """
+        Description
+        -----------
+        Computes the initial upper bound of the cost of each state, the
+        exact cost of a policy where every state takes an action that
+        may lead it closer to the goal, solving the linear system of
+        the policy:
+
+        `upper = c + P * upper`, so `(I - P) * upper = c`
+
+        That policy always reaches the goal, so its costs are finite
+        and never smaller than the costs of the best policy.
+
+        A state is left out when none of its actions may lead it closer
+        to the goal without possibly leading it to a state left out.
+        """
+
+        distances = {self.goal.name: 0}
+
+        queue = deque([self.goal])
+
+        while queue:
+            current_state = queue.popleft()
+
+            for state in current_state.predecessors:
+                if state.name not in distances:
+                    distances[state.name] = distances[current_state.name] + 1
+
+                    queue.append(state)
+
+        included = set(distances)
+
+        policies = {}
+
+        changed = True
+
+        while changed:
+            changed = False
+
+            for name in list(included):
+                if name == self.goal.name:
+                    continue
+
+                state = self.states.get_state(name)
+
+                policies[name] = None
+
+                for action in state.actions:
+                    ends = [end.name for end, probability in action.end]
+
+                    closer = any(
+                        distances[end] < distances[name]
+                        for end in ends if end in included
+                    )
+
+                    if closer and all(end in included for end in ends):
+                        policies[name] = action
+
+                        break
+
+                if policies[name] is None:
+                    included.remove(name)
+
+                    changed = True
+
+        names = [name for name in distances if name in included]
+
+        index = {name: i for i, name in enumerate(names)}
+
+        rows, columns, probabilities = [], [], []
+        policy_costs = [0.0] * len(names)
+
+        for name in names:
+            if name == self.goal.name:
+                continue
+
+            action = policies[name]
+
+            for end, probability in action.end:
+                rows.append(index[name])
+                columns.append(index[end.name])
+                probabilities.append(probability)
+
+            policy_costs[index[name]] = action.cost
+
+        policy_matrix = sparse.csr_matrix(
+            (probabilities, (rows, columns)), shape=(len(names), len(names))
+        )
+
+        system = (sparse.identity(len(names)) - policy_matrix).tocsc()
+
+        costs = linalg.spsolve(system, policy_costs)
+
+        self.upper_costs = dict(zip(names, costs.tolist()))
+
+        self.upper_costs[self.goal.name] = 0.0
+
+    def update_upper_costs(self):
+        """
+        Description
+        -----------
+        Updates the upper bound of each state with the least costly
+        action, following `mode` like the costs, then computes
+        the largest gap between the bounds.
+        """
+
+        if self.mode == 'gauss-seidel':
+            read_costs = self.upper_costs
+        else:
+            read_costs = self.upper_costs.copy()
+
+        infinity = float('inf')
+
+        gap = 0
+
+        for name in self.get_sweep_order():
+            if name not in self.upper_costs or name == self.goal.name:
+                continue
+
+            upper_cost = self.upper_costs[name]
+
+            for action in self.states.get_state(name).actions:
+                cost = 0
+
+                for end, probability in action.end:
+                    cost += probability * (
+                        action.cost + read_costs.get(end.name, infinity)
+                    )
+
+                if cost < upper_cost:
+                    upper_cost = cost
+
+            self.upper_costs.update({name: upper_cost})
+
+            if upper_cost - self.costs[name] > gap:
+                gap = upper_cost - self.costs[name]
+
+        self.gap = gap
+
     def update_costs_and_policies(self):
         """
         Description
@@ -187,25 +529,57 @@ AnswerGrid: {self.answer_grid}'''
         taking the minimum cost of all the actions and the action
         itself as the policy.
 
-        Then computes the difference between each new cost and the old cost.
+        The difference between each new cost and the old cost is
+        computed along with the cost, keeping the largest one.
+
+        When `mode` is 'gauss-seidel' the costs are read from `costs`
+        itself, so each state sees the costs updated before it.
+
+        When `skip_converged` is True, only the `active_states` are
+        updated, and the states updated on the next iteration are the
+        ones whose residual was not smaller than `epsilon` along with
+        their predecessors.
+
+        When `bounded` is True, the upper bounds are updated afterwards.
         """
 
         old_costs = self.costs.copy()
 
+        if self.mode == 'gauss-seidel':
+            read_costs = self.costs
+        else:
+            read_costs = old_costs
+
         for name in self.states:
             state = self.states.get_state(name)
 
             state.clean_policy_predecessors()
 
-        for name in self.states:
+        start = self.profiler.start()
+
+        max_residual = 0
+
+        changed_states = []
+
+        for name in self.get_sweep_order():
             state = self.states.get_state(name)
 
+            if (
+                self.active_states is not None
+                and name not in self.active_states
+            ):
+                self.keep_policy(state)
+
+                continue
+
             new_cost, policy = 0, '-'
 
             if state == self.goal:
                 pass
             else:
-                new_cost, policy = self.get_min_cost(state, old_costs)
+                new_cost, policy = self.get_min_cost(state, read_costs)
+
+                self.backups += 1
 
             self.costs.update({name: new_cost})
             self.policies.update({name: policy})
@@ -213,16 +587,129 @@ AnswerGrid: {self.answer_grid}'''
             state.update_cost(new_cost)
             state.update_policy(policy)
 
-        max_residual = 0
-
-        for name in old_costs:
-            residual = abs(self.costs[name] - old_costs[name])
+            residual = abs(new_cost - old_costs[name])
 
             if residual > max_residual:
                 max_residual = residual
 
+            if residual >= self.epsilon:
+                changed_states.append(state)
+
         self.max_residual = max_residual
 
+        self.profiler.stop('backup', start)
+
+        if self.skip_converged:
+            self.active_states = self.get_active_states(changed_states)
+
+        if self.bounded:
+            start = self.profiler.start()
+
+            self.update_upper_costs()
+
+            self.profiler.stop('bounds', start)
+
+    def get_active_states(self, changed_states):
+        """
+        Description
+        -----------
+        Returns the states that must be updated on the next iteration,
+        the states that changed and their predecessors. The costs of
+        the other states would change by less than `epsilon`, since
+        none of the states their actions lead to changed more than that.
+
+        Parameters
+        ----------
+        changed_states: list \\
+            -- States whose residual was not smaller than `epsilon`.
+
+        Returns
+        -------
+        set \\
+            -- Names of the states.
+        """
+
+        active_states = set()
+
+        for state in changed_states:
+            active_states.add(state.name)
+
+            for predecessor in state.predecessors:
+                active_states.add(predecessor.name)
+
+        return active_states
+
+    def keep_policy(self, state):
+        """
+        Description
+        -----------
+        Adds a skipped state back to the `policy_predecessors` of the
+        states its policy leads to, since they are cleaned on every
+        iteration.
+
+        Parameters
+        ----------
+        state: State() \\
+            -- The skipped state.
+        """
+
+        policy = self.policies.get(state.name, '-')
+
+        if policy == '-':
+            return None
+
+        for end, probability in state.actions.get_action(policy).end:
+            end.add_policy_predecessor(state)
+
+    def get_sweep_order(self):
+        """
+        Description
+        -----------
+        Returns the names of the states in the order they are updated,
+        computing it on the first call.
+
+        With the 'goal-distance' order, the states are sorted by their
+        breadth-first distance to the goal following the predecessors,
+        so a state is usually updated after the states it leads to.
+        States that can't reach the goal go last.
+
+        Returns
+        -------
+        list \\
+            -- Names of the states.
+        """
+
+        if self.sweep_order is not None:
+            return self.sweep_order
+
+        if self.order == 'default':
+            self.sweep_order = list(self.states)
+
+            return self.sweep_order
+
+        visited = {self.goal.name}
+        sweep_order = [self.goal.name]
+
+        queue = deque([self.goal])
+
+        while queue:
+            current_state = queue.popleft()
+
+            for state in current_state.predecessors:
+                if state.name not in visited:
+                    visited.add(state.name)
+                    sweep_order.append(state.name)
+
+                    queue.append(state)
+
+        for name in self.states:
+            if name not in visited:
+                sweep_order.append(name)
+
+        self.sweep_order = sweep_order
+
+        return self.sweep_order
+
     def get_min_cost(self, state, old_costs):
         """
         Description
@@ -306,6 +793,33 @@ AnswerGrid: {self.answer_grid}'''
 
         return cost
 
+    def update_policies(self):
+        """
+        Description
+        -----------
+        Computes the policy of each state from the current costs,
+        without changing them. Used by the algorithms that don't update
+        the policies while updating the costs.
+        """
+
+        for name in self.states:
+            self.states.get_state(name).clean_policy_predecessors()
+
+        for name in self.states:
+            state = self.states.get_state(name)
+
+            new_cost, policy = 0, '-'
+
+            if state != self.goal:
+                new_cost, policy = self.get_min_cost(state, self.costs)
+
+                self.backups += 1
+
+            self.policies.update({name: policy})
+
+            state.update_cost(self.costs[name])
+            state.update_policy(policy)
+
     def update_answer(self):
         """
         Description